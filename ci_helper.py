@@ -2,13 +2,36 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import cProfile
+import concurrent.futures
+import contextlib
+import fnmatch
+import gzip
+import html
+import io
+import itertools
 import json
+import os
+import pstats
+import queue
+import random
 import re
+import shlex
+import shutil
+import signal
+import sqlite3
 import ssl
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 
+from collections import OrderedDict, deque, namedtuple
 from datetime import datetime
 from urllib.error import HTTPError
+from urllib.parse import quote, unquote, urlencode
 from urllib.request import Request, urlopen
 
 
@@ -17,11 +40,36 @@ class CommitError(Exception):
     pass
 
 
+class DeadlineExceeded(Exception):
+    """Deadline exceeded"""
+    pass
+
+
+class EndpointUnavailable(Exception):
+    """Endpoint unavailable"""
+    pass
+
+
+class InvalidChangelog(Exception):
+    """Invalid changelog"""
+    pass
+
+
+class InvalidFormat(Exception):
+    """Invalid format"""
+    pass
+
+
 class InvalidVersion(Exception):
     """Invalid version"""
     pass
 
 
+class MergeError(Exception):
+    """Merge error"""
+    pass
+
+
 class NoChanges(Exception):
     """No Changes"""
     pass
@@ -32,28 +80,272 @@ class PushError(Exception):
     pass
 
 
+ChangelogEntry = namedtuple('ChangelogEntry', ['version', 'changes', 'date', 'offset', 'length'])
+
+ChangelogTemplate = namedtuple('ChangelogTemplate', ['entry', 'change', 'separator', 'escape'])
+
+CHANGELOG_TEMPLATES = {
+    'markdown': ChangelogTemplate(entry='{version}\n\n{changes}\n\n{date}\n\n'.format,
+                                  change='  - {}'.format, separator='\n', escape=str),
+    'json': ChangelogTemplate(entry='{{"version": {version}, "date": {date}, "changes": [{changes}]}}'.format,
+                              change='{}'.format, separator=', ', escape=json.dumps),
+    'html': ChangelogTemplate(entry='<section class="changelog-entry">\n<h2>{version}</h2>\n<ul>\n{changes}\n'
+                                    '</ul>\n<p><time>{date}</time></p>\n</section>\n'.format,
+                              change='<li>{}</li>'.format, separator='\n', escape=html.escape),
+    'release': ChangelogTemplate(entry='{changes}'.format, change='- {}'.format, separator='\n', escape=str),
+}
+
+OUTPUT_FORMATS = ('markdown', 'json', 'html')
+
+
+MERGE_RETRY_CODES = (405, 406, 409, 422)
+
+MERGE_POLL_INITIAL_DELAY = 2
+
+MERGE_POLL_MAX_DELAY = 30
+
+COMMAND_TIMEOUT = 600
+
+_OPEN_MERGE_REQUESTS = {}
+
+_OPEN_MERGE_REQUESTS_LOCK = threading.Lock()
+
+_TRANSPORT = {'primary_endpoint': None, 'read_endpoint': None, 'consistency_window': 30, 'written_at': None,
+              'timeout': 30, 'hedge_percentile': None, 'hedge_delay': 1.0, 'failure_threshold': 3,
+              'recovery_time': 30}
+
+_LATENCIES = deque(maxlen=200)
+
+_DEADLINE = {'budget': None, 'expires_at': None, 'stack': [], 'stages': []}
+
+_CIRCUITS = {}
+
+_CIRCUITS_LOCK = threading.Lock()
+
+_PROFILE = {'mode': None, 'directory': 'profile', 'sample_rate': 1.0, 'top': 25, 'stack': [], 'count': 0}
+
+CHANGELOG_ITEM_PATTERN = re.compile(r'^\s*[-*+]\s+(.*)$')
+
+CHANGELOG_VERSION_PATTERN = re.compile(r'^(?:#+\s*)?\[?v?(\d+\.\d+\.\d+(-rc\.\d+)?)\b', re.IGNORECASE)
+
+CHANGELOG_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL UNIQUE,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    patch INTEGER NOT NULL,
+    rc INTEGER,
+    date TEXT NOT NULL,
+    released_at TEXT NOT NULL,
+    branch TEXT,
+    commit_sha TEXT
+);
+CREATE TABLE IF NOT EXISTS changes (
+    version_id INTEGER NOT NULL REFERENCES versions (id),
+    position INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    PRIMARY KEY (version_id, position)
+);
+CREATE INDEX IF NOT EXISTS versions_released_at ON versions (released_at);
+CREATE INDEX IF NOT EXISTS versions_number ON versions (major, minor, patch, rc);
+CREATE INDEX IF NOT EXISTS versions_branch ON versions (branch, rc);
+"""
+
+SEARCH_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    version TEXT NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    patch INTEGER NOT NULL,
+    rc INTEGER,
+    position INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    description TEXT NOT NULL,
+    UNIQUE (version, description)
+);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    entry_id INTEGER NOT NULL REFERENCES entries (id),
+    PRIMARY KEY (token, entry_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_number ON entries (major, minor, patch, rc IS NULL, rc, position);
+"""
+
+SEARCH_TOKEN_PATTERN = re.compile(r'[#\w]+(?:[-./:][#\w]+)*')
+
+HOOK_QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS events_pending ON events (next_attempt_at) WHERE delivered_at IS NULL;
+"""
+
+HOOK_RETRY_MAX_DELAY = 300
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS merge_requests (
+    iid INTEGER PRIMARY KEY,
+    merge_commit_sha TEXT,
+    squash_commit_sha TEXT,
+    description TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    title TEXT,
+    committed_date TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tags (
+    name TEXT PRIMARY KEY,
+    target TEXT,
+    release_description TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cursors (
+    resource TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS merge_requests_merge_commit ON merge_requests (merge_commit_sha);
+CREATE INDEX IF NOT EXISTS merge_requests_squash_commit ON merge_requests (squash_commit_sha);
+"""
+
+
 def main(args):
     """Main function"""
-    if args['command'] == 'publish_version':
-        publish_version(gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
-                        project_id=args['project_id'], commit_sha=args['commit_sha'],
-                        target_branch=args['target_branch'], changelog_file_path=args['changelog_file_path'])
-    elif args['command'] == 'create_mr':
-        create_auto_merge_request(gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
-                                  project_id=args['project_id'], source_branch=args['source_branch'],
-                                  target_branch=args['target_branch'], users=args['users'],
-                                  tag_name=args['tag_name'])
-
-
-def publish_version(gitlab_endpoint, gitlab_token, project_id, commit_sha, target_branch, changelog_file_path):
+    configure_profiling(mode=args.get('profile'), directory=args.get('profile_dir') or 'profile',
+                        sample_rate=args.get('profile_sample_rate') or 1.0)
+    configure_deadline(args.get('deadline'))
+    configure_transport(primary_endpoint=args.get('gitlab_endpoint'), read_endpoint=args.get('gitlab_read_endpoint'),
+                        timeout=args.get('request_timeout'), hedge_percentile=args.get('hedge_percentile'),
+                        hedge_delay=args.get('hedge_delay') or 1.0,
+                        failure_threshold=args.get('circuit_threshold') or 3,
+                        recovery_time=args.get('circuit_recovery') or 30)
+    with _stage(args['command']):
+        if args['command'] == 'publish_version' and args['manifest_file_path']:
+            with _open_data_source(args) as data_source:
+                publish_component_versions(gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
+                                           project_id=args['project_id'], commit_sha=args['commit_sha'],
+                                           target_branch=args['target_branch'],
+                                           manifest_file_path=args['manifest_file_path'],
+                                           max_workers=args['max_workers'], data_source=data_source)
+        elif args['command'] == 'publish_version':
+            with _open_data_source(args) as data_source:
+                publish_version(gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
+                                project_id=args['project_id'], commit_sha=args['commit_sha'],
+                                target_branch=args['target_branch'], changelog_file_path=args['changelog_file_path'],
+                                output_file_paths=dict(args['outputs'] or []), store_path=args['store_path'],
+                                keep_versions=args['keep_versions'], keep_major=args['keep_major'],
+                                archive_compress=args['archive_compress'], data_source=data_source,
+                                journal_path=args['journal_path'], index_path=args['index_path'],
+                                atomic_push=args['atomic_push'], workspace=args['workspace'],
+                                remote_url=args['remote_url'], fragments_dir=args['fragments_dir'],
+                                hook_urls=args['hook_urls'], hook_queue_path=args['hook_queue_path'])
+        elif args['command'] == 'create_mr':
+            with _open_data_source(args) as data_source:
+                create_auto_merge_request(gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
+                                          project_id=args['project_id'], source_branch=args['source_branch'],
+                                          target_branch=args['target_branch'], users=args['users'],
+                                          tag_name=args['tag_name'], max_workers=args['max_workers'],
+                                          merge_timeout=args['merge_timeout'], data_source=data_source)
+        elif args['command'] == 'republish':
+            updated_tag_names = republish_releases(gitlab_endpoint=args['gitlab_endpoint'],
+                                                   gitlab_token=args['gitlab_token'], project_id=args['project_id'],
+                                                   changelog_file_path=args['changelog_file_path'],
+                                                   tag_patterns=args['tag_patterns'], max_workers=args['max_workers'],
+                                                   rate_limit=args['rate_limit'], dry_run=args['dry_run'])
+            for tag_name in updated_tag_names:
+                print(tag_name)
+        elif args['command'] == 'deliver_hooks':
+            deliver_release_hooks(queue_path=args['hook_queue_path'], max_workers=args['max_workers'],
+                                  max_attempts=args['max_attempts'], wait=not args['no_wait'])
+        elif args['command'] == 'sync':
+            with GitlabCatalog(args['catalog_path'], args['gitlab_endpoint'], args['gitlab_token'],
+                               args['project_id']) as catalog:
+                catalog.sync()
+        elif args['command'] == 'rotate':
+            rotate_changelog(changelog_file_path=args['changelog_file_path'], keep_versions=args['keep_versions'],
+                             keep_major=args['keep_major'], archive_dir=args['archive_dir'],
+                             compress=args['archive_compress'], collapse_rc=args['collapse_rc'])
+        elif args['command'] == 'export':
+            export_changelog(changelog_file_path=args['changelog_file_path'], output_format=args['output_format'],
+                             limit=args['limit'])
+        elif args['command'] == 'validate':
+            problems = validate_changelog(changelog_file_path=args['changelog_file_path'])
+            for problem in problems:
+                _log(type='error', message=problem)
+            if problems:
+                raise InvalidChangelog('{} problem(s) found in {}'.format(len(problems), args['changelog_file_path']))
+        elif args['command'] == 'index':
+            build_search_index(index_path=args['index_path'], changelog_file_path=args['changelog_file_path'],
+                               gitlab_endpoint=args['gitlab_endpoint'], gitlab_token=args['gitlab_token'],
+                               project_id=args['project_id'])
+        elif args['command'] == 'search':
+            for entry in search_changelog(index_path=args['index_path'], query=' '.join(args['query']),
+                                          limit=args['limit']):
+                print(json.dumps(entry))
+        elif args['command'] == 'query':
+            for entry in query_changelog_store(store_path=args['store_path'], version=args['version'],
+                                               branch=args['branch'], since=args['since'], until=args['until'],
+                                               latest_rc=args['latest_rc']):
+                print(json.dumps(entry))
+
+
+def publish_version(gitlab_endpoint, gitlab_token, project_id, commit_sha, target_branch, changelog_file_path,
+                    output_file_paths=None, store_path=None, keep_versions=None, keep_major=False,
+                    archive_compress=False, data_source=None, journal_path=None, index_path=None, atomic_push=False,
+                    workspace=None, remote_url=None, fragments_dir=None, hook_urls=None, hook_queue_path=None):
     """It generates a version for the given project
 
+    When a rotation policy is given (keep_versions or keep_major), older entries are moved to the archive after the
+    changelog is generated, and rc entries are collapsed into the new version when it is a final release.
+
+    When a journal is given, every completed step is recorded in it with its output (version, changes, changelog
+    files, commit SHA, push and tag). A retried job publishing the same commit on the same branch resumes from the
+    first incomplete step, so the version is not bumped twice and the changelog entry is not duplicated. Once pushed,
+    the journaled commit is trusted even when it is missing from a fresh clone, since the tag only needs its SHA.
+
+    With atomic push, the tag is created locally as an annotated tag and pushed with the branch in a single atomic
+    push, so the commit is never published without its tag. The release is then created through the gitlab api.
+
+    When a workspace is given, the changelog is committed in a minimal clone of the target branch managed there (see
+    prepare_workspace) instead of the current repository. File paths are then relative to the repository root.
+
+    When a fragments directory is given, the changes of the pending fragments (see collect_changelog_fragments) come
+    first in the new entry, followed by the merge request changes they do not already list. The fragments are deleted
+    in the changelog commit.
+
+    When hooks are given, a release event for each of them is written to the hook queue once the tag exists, and a
+    detached process is started to deliver the queue (see deliver_release_hooks), so slow or failing hook endpoints
+    never delay nor fail the release.
+
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str commit_sha: The commit SHA
     :param str target_branch: The target branch name
     :param str changelog_file_path: The changelog file path
+    :param dict output_file_paths: Additional changelog outputs, mapping each format name to its file path
+    :param str store_path: The SQLite changelog store path, if any
+    :param int keep_versions: The number of versions to keep in the changelog file
+    :param bool keep_major: Whether all versions of the current major must be kept in the changelog file
+    :param bool archive_compress: Whether archive segments must be gzipped
+    :param data_source: The data source consulted before the gitlab api (e.g. a LocalGitRepository)
+    :param str journal_path: The step journal file path, if any
+    :param str index_path: The changelog search index path, if any
+    :param bool atomic_push: Whether the tag must be created locally and pushed with the branch
+    :param str workspace: The directory of the minimal clone the changelog is committed in, if any
+    :param str remote_url: The repository url cloned in the workspace. Defaults to the origin of the current repository
+    :param str fragments_dir: The changelog fragments directory, if any
+    :param list hook_urls: The urls the release event is posted to
+    :param str hook_queue_path: The SQLite hook queue path
     :raise HTTPError: If there is an error in HTTP request
     """
     # TODO: define when version type is major, minor or patch
@@ -61,46 +353,437 @@ def publish_version(gitlab_endpoint, gitlab_token, project_id, commit_sha, targe
     if target_branch == 'develop':
         version_type = 'rc'
 
-    new_version = generate_version(version=get_current_version(changelog_file_path), version_type=version_type)
-    new_version_changes = get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha)
-    generate_changelog(version=new_version, version_changes=new_version_changes,
-                       changelog_file_path=changelog_file_path)
-    changelog_commit_sha = git_commit(target_branch, changelog_file_path)
-    git_push(target_branch)
-    git_create_tag(gitlab_endpoint, gitlab_token, project_id, changelog_commit_sha, new_version_changes, new_version)
+    journal = _load_journal(journal_path, key='{}@{}'.format(commit_sha, target_branch))
+    # once pushed, the commit is on the remote and the remaining steps only need its SHA
+    if not journal.get('pushed') and 'commit' in journal and \
+            not _commit_exists(journal['commit'], workspace=workspace):
+        _log(type='warning', message='Journaled commit {} is missing. Regenerating it.'.format(journal['commit']))
+        for step in ('changelog', 'commit'):
+            journal.pop(step, None)
+    resumed = 'version' in journal
+
+    if workspace:
+        file_paths = [changelog_file_path] + list((output_file_paths or {}).values())
+        file_paths += [store_path] if store_path else []
+        file_paths += [os.path.join(fragments_dir, '')] if fragments_dir else []
+        if keep_versions or keep_major:
+            file_paths.append(os.path.join(os.path.dirname(changelog_file_path), 'CHANGELOG-archive', ''))
+        if 'changelog' not in journal:
+            with _stage('prepare_workspace'):
+                prepare_workspace(workspace, remote_url, target_branch, file_paths)
+        changelog_file_path = os.path.join(workspace, changelog_file_path)
+        output_file_paths = {output_format: os.path.join(workspace, output_file_path)
+                             for output_format, output_file_path in (output_file_paths or {}).items()}
+        store_path = os.path.join(workspace, store_path) if store_path else None
+        fragments_dir = os.path.join(workspace, fragments_dir) if fragments_dir else None
+
+    if 'version' not in journal:
+        with _stage('generate_version'):
+            journal['version'] = generate_version(version=get_current_version(changelog_file_path),
+                                                  version_type=version_type)
+        _save_journal(journal_path, journal)
+    if 'changes' not in journal:
+        with _stage('get_version_changes'):
+            changes, fragment_paths = collect_changelog_fragments(fragments_dir) if fragments_dir else ([], [])
+            merge_request_changes = get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha,
+                                                        data_source=data_source)
+            journal['changes'] = changes + [change for change in merge_request_changes if change not in changes]
+            if fragment_paths:
+                journal['fragments'] = fragment_paths
+        _save_journal(journal_path, journal)
+    new_version, new_version_changes = journal['version'], journal['changes']
+    if 'changelog' not in journal:
+        with _stage('generate_changelog'):
+            if resumed and get_current_version(changelog_file_path) == new_version:
+                # interrupted after the entry was written but before it was journaled
+                _log(type='warning', message='Changelog already has version {}. Skipping.'.format(new_version))
+            else:
+                generate_changelog(version=new_version, version_changes=new_version_changes,
+                                   changelog_file_path=changelog_file_path, output_file_paths=output_file_paths,
+                                   store_path=store_path, branch=target_branch, commit_sha=commit_sha,
+                                   index_path=index_path)
+            extra_file_paths = list((output_file_paths or {}).values()) + ([store_path] if store_path else [])
+            if keep_versions or keep_major:
+                extra_file_paths += rotate_changelog(changelog_file_path, keep_versions=keep_versions,
+                                                     keep_major=keep_major, compress=archive_compress,
+                                                     collapse_rc=version_type != 'rc')
+            for fragment_path in journal.get('fragments', []):
+                if os.path.exists(fragment_path):
+                    os.remove(fragment_path)
+            extra_file_paths += journal.get('fragments', [])
+        journal['changelog'] = [changelog_file_path] + extra_file_paths
+        _save_journal(journal_path, journal)
+    if 'commit' not in journal:
+        with _stage('git_commit'):
+            # interrupted after the commit but before it was journaled
+            commit_sha = resumed and _head_changelog_commit(target_branch, journal['changelog'], workspace=workspace)
+            if commit_sha:
+                _log(type='warning', message='Changelog is already committed in {}. Skipping.'.format(commit_sha))
+            journal['commit'] = commit_sha or git_commit(target_branch, *journal['changelog'], workspace=workspace)
+        _save_journal(journal_path, journal)
+    if not journal.get('pushed'):
+        with _stage('git_push'):
+            if atomic_push and resumed and _remote_tag_commit(new_version, workspace=workspace) == journal['commit']:
+                # interrupted after the atomic push but before it was journaled: the tag must not be created again
+                _log(type='warning', message='Tag {} is already pushed. Skipping.'.format(new_version))
+            elif atomic_push:
+                git_create_local_tag(journal['commit'], new_version_changes, new_version, workspace=workspace)
+                git_push(target_branch, new_version, workspace=workspace)
+            else:
+                git_push(target_branch, workspace=workspace)
+        journal['pushed'] = True
+        _save_journal(journal_path, journal)
+    if not journal.get('tagged'):
+        if atomic_push:
+            with _stage('git_create_release'):
+                git_create_release(gitlab_endpoint, gitlab_token, project_id, new_version_changes, new_version,
+                                   index_path=index_path)
+        else:
+            with _stage('git_create_tag'):
+                git_create_tag(gitlab_endpoint, gitlab_token, project_id, journal['commit'], new_version_changes,
+                               new_version, index_path=index_path)
+        journal['tagged'] = True
+        _save_journal(journal_path, journal)
+    else:
+        _log(type='warning', message='Version {} is already published. Skipping.'.format(new_version))
+    if hook_urls and hook_queue_path:
+        if not journal.get('hooked'):
+            with _stage('enqueue_release_hooks'):
+                enqueue_release_hooks(hook_queue_path, hook_urls,
+                                      {'event': 'release', 'project_id': project_id, 'tag_name': new_version,
+                                       'branch': target_branch, 'commit_sha': journal['commit'],
+                                       'changes': new_version_changes})
+            journal['hooked'] = True
+            _save_journal(journal_path, journal)
+        _spawn_hook_delivery(hook_queue_path)
+
+
+def publish_component_versions(gitlab_endpoint, gitlab_token, project_id, commit_sha, target_branch,
+                               manifest_file_path, max_workers=8, data_source=None):
+    """It generates a version for each component of a monorepo touched by the given commit
+
+    The components are described by a JSON manifest:
+    {"components": [{"name": "api", "paths": ["services/api/*"], "changelog": "services/api/CHANGELOG.md"}]}
+    An optional "tag" format (default '{name}-{version}') names the tag of each component.
+
+    The touched paths are retrieved with a single diff request. The version and changelog entry of each touched
+    component are generated concurrently, every changelog is committed and pushed at once, and the component tags are
+    created concurrently.
 
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :param str commit_sha: The commit SHA
+    :param str target_branch: The target branch name
+    :param str manifest_file_path: The component manifest file path
+    :param int max_workers: The maximum number of components handled at the same time
+    :param data_source: The data source consulted before the gitlab api
+    :rtype: dict
+    :return: The new version of each touched component, indexed by component name
+    :raise HTTPError: If there is an error in HTTP request
+    :raise InvalidFormat: If the manifest is invalid
+    """
+    version_type = 'rc' if target_branch == 'develop' else 'patch'
+    components = load_component_manifest(manifest_file_path)
+    with _stage('get_changed_paths'):
+        changed_paths = get_changed_paths(gitlab_endpoint, gitlab_token, project_id, commit_sha)
+    components = [component for component in components
+                  if any(fnmatch.fnmatchcase(path, pattern)
+                         for path in changed_paths for pattern in component['paths'])]
+    if not components:
+        _log(type='warning', message='No component was touched by commit {}. Skipping.'.format(commit_sha))
+        return {}
+    with _stage('get_version_changes'):
+        new_version_changes = get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha,
+                                                  data_source=data_source)
+
+    def generate(component):
+        new_version = generate_version(version=get_current_version(component['changelog']),
+                                       version_type=version_type)
+        generate_changelog(version=new_version, version_changes=new_version_changes,
+                           changelog_file_path=component['changelog'])
+        return new_version
+
+    workers = max(1, min(max_workers, len(components)))
+    with _stage('generate_changelog'), concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        new_versions = dict(zip([component['name'] for component in components],
+                                executor.map(generate, components)))
+    with _stage('git_commit'):
+        changelog_commit_sha = git_commit(target_branch, *[component['changelog'] for component in components])
+    with _stage('git_push'):
+        git_push(target_branch)
+    tag_names = [component.get('tag', '{name}-{version}').format(name=component['name'],
+                                                                 version=new_versions[component['name']])
+                 for component in components]
+    with _stage('git_create_tag'), concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda tag_name: git_create_tag(gitlab_endpoint, gitlab_token, project_id,
+                                                          changelog_commit_sha, new_version_changes, tag_name),
+                          tag_names))
+    return new_versions
+
+
+def load_component_manifest(manifest_file_path):
+    """It reads the monorepo component manifest
+
+    :param str manifest_file_path: The component manifest file path
+    :rtype: list
+    :return: The components, each one with a name, a list of path globs and a changelog file path
+    :raise InvalidFormat: If the manifest is invalid
+    """
+    with open(manifest_file_path, mode='r') as file:
+        try:
+            components = json.load(file).get('components')
+        except (ValueError, AttributeError):
+            components = None
+    if not isinstance(components, list) or \
+            not all(isinstance(component, dict) and {'name', 'paths', 'changelog'} <= set(component)
+                    for component in components):
+        raise InvalidFormat('Invalid component manifest {}'.format(manifest_file_path))
+    return components
+
+
+def get_changed_paths(gitlab_endpoint, gitlab_token, project_id, commit_sha):
+    """It retrieves the paths touched by the given commit (compared with its first parent)
 
-def create_auto_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branch, users, tag_name):
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :param str commit_sha: The commit SHA
+    :rtype: set
+    :return: The old and new paths of every changed file
+    :raise HTTPError: If there is an error in HTTP request
+    """
+    paths = set()
+    for diff in _paginate('{}/api/v4/projects/{}/repository/commits/{}/diff'.format(gitlab_endpoint, project_id,
+                                                                                    commit_sha),
+                          gitlab_token=gitlab_token):
+        paths.update(path for path in (diff.get('old_path'), diff.get('new_path')) if path)
+    return paths
+
+
+def create_auto_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branch, users, tag_name,
+                              max_workers=4, merge_timeout=600, data_source=None):
     """It creates and approves a merge request depending on the target branch
 
+    Several target branches (or glob patterns such as 'release/*') can be given. The tag release description is
+    fetched once, and the merge requests are created and accepted concurrently.
+
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str source_branch: The source branch name
-    :param str target_branch: The target branch name
+    :param target_branch: The target branch name, or a list of target branch names and glob patterns
     :param list users: Name of each user that must be included to verify merge request
     :param str tag_name: The tag name
+    :param int max_workers: The maximum number of target branches handled at the same time
+    :param int merge_timeout: The maximum number of seconds to wait for each merge request to become mergeable
+    :param data_source: The data source consulted before the gitlab api (e.g. a LocalGitRepository)
+    :rtype: dict
+    :return: The outcome of each target branch: the merge request iid or the error raised
     :raise HTTPError: If there is an error in HTTP request
     """
-    version_changes = git_get_tag_release_description(gitlab_endpoint, gitlab_token, project_id, tag_name)
-    merge_request_iid = git_create_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch,
-                                                 target_branch, users, version_changes)
-    git_accept_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branch, merge_request_iid)
+    with _stage('git_get_tag_release_description'):
+        version_changes = git_get_tag_release_description(gitlab_endpoint, gitlab_token, project_id, tag_name,
+                                                          data_source=data_source)
+    with _stage('resolve_target_branches'):
+        target_branches = _resolve_target_branches(gitlab_endpoint, gitlab_token, project_id, source_branch,
+                                                   [target_branch] if isinstance(target_branch, str)
+                                                   else target_branch)
+        # with several targets, one listing of the open merge requests replaces a lookup per target
+        merge_request_index = data_source.open_merge_requests(source_branch) if data_source else None
+        if merge_request_index is None and len(target_branches) > 1:
+            merge_request_index = get_open_merge_requests(gitlab_endpoint, gitlab_token, project_id, source_branch)
+
+    def merge_into(branch):
+        merge_request_iid = git_create_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch,
+                                                     branch, users, version_changes,
+                                                     merge_request_index=merge_request_index)
+        git_accept_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, branch,
+                                 merge_request_iid, timeout=merge_timeout)
+        return merge_request_iid
+
+    outcomes = {}
+    workers = max(1, min(max_workers, len(target_branches)))
+    with _stage('merge_requests'), concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(merge_into, branch): branch for branch in target_branches}
+        for future in concurrent.futures.as_completed(futures):
+            branch = futures[future]
+            try:
+                outcomes[branch] = future.result()
+                _log(type='debug', message='Merge request into {} handled with success'.format(branch))
+            except Exception as error:
+                outcomes[branch] = error
+                _log(type='error', message='Error occurred while merging into {}: {}'.format(branch, error))
+    errors = [outcomes[branch] for branch in target_branches if isinstance(outcomes[branch], Exception)]
+    if errors:
+        raise errors[0]
+    return outcomes
+
+
+def configure_profiling(mode=None, directory='profile', sample_rate=1.0, top=25):
+    """It configures the profiling of the main function and of each stage of the commands
+
+    Each profiled stage writes '<n>-<stage>.pstats' (cProfile, including its nested stages) and/or '<n>-<stage>.mem.txt'
+    (the top allocations made during the stage, from tracemalloc snapshots) to the given directory. Only the main
+    thread is profiled.
+
+    :param str mode: The profiling mode. Can be None (disabled), 'cpu', 'mem' or 'all'
+    :param str directory: The directory the reports are written to
+    :param float sample_rate: The fraction of stages that are profiled, to bound the overhead of repeated stages
+    :param int top: The number of allocation sites listed in memory reports
+    """
+    _PROFILE.update({'mode': mode, 'directory': directory, 'sample_rate': sample_rate, 'top': top})
+
+
+def configure_transport(primary_endpoint=None, read_endpoint=None, consistency_window=30, timeout=30,
+                        hedge_percentile=None, hedge_delay=1.0, failure_threshold=3, recovery_time=30):
+    """It configures where and how the gitlab api requests are sent
+
+    When a read endpoint is given (e.g. a Geo secondary), GET requests to the primary endpoint are sent to it instead
+    and fall back to the primary endpoint on 404, since the data may not be replicated yet, or when it is unreachable.
+    Reads sent less than consistency_window seconds after a write go to the primary endpoint, so they see that write.
+    Other requests always go to the primary endpoint.
+
+    When a hedge percentile is given, a GET request that has no response after that percentile of the recent GET
+    latencies (or after hedge_delay seconds until enough latencies are known) is sent a second time, and the first
+    response wins.
+
+    After failure_threshold consecutive connection errors, timeouts or 5xx responses, an endpoint is considered down
+    and requests to it fail fast with EndpointUnavailable for recovery_time seconds. A single request is then let
+    through to probe it while the others keep failing fast, and its failure opens the circuit again.
+
+    :param str primary_endpoint: The primary gitlab api endpoint
+    :param str read_endpoint: The read-only gitlab api endpoint
+    :param int consistency_window: The number of seconds reads are sent to the primary endpoint after a write
+    :param float timeout: The number of seconds each request waits for the endpoint
+    :param float hedge_percentile: The latency percentile (e.g. 95) after which GET requests are hedged
+    :param float hedge_delay: The number of seconds after which GET requests are hedged until latencies are known
+    :param int failure_threshold: The number of consecutive failures after which an endpoint is considered down
+    :param float recovery_time: The number of seconds requests to a down endpoint fail fast
+    """
+    _TRANSPORT.update({'primary_endpoint': primary_endpoint.rstrip('/') if primary_endpoint else None,
+                       'read_endpoint': read_endpoint.rstrip('/') if read_endpoint else None,
+                       'consistency_window': consistency_window, 'written_at': None, 'timeout': timeout,
+                       'hedge_percentile': hedge_percentile, 'hedge_delay': hedge_delay,
+                       'failure_threshold': failure_threshold, 'recovery_time': recovery_time})
+    _LATENCIES.clear()
+    with _CIRCUITS_LOCK:
+        _CIRCUITS.clear()
+
+
+def configure_deadline(seconds=None):
+    """It configures the time budget of the whole run
+
+    Every gitlab api request and every command is bounded by the remaining time. When the budget is exhausted, the
+    running request or command is cancelled and DeadlineExceeded is raised with the time spent in each stage.
+
+    :param float seconds: The number of seconds the run may take, None for no deadline
+    """
+    _DEADLINE.update({'budget': seconds, 'expires_at': time.monotonic() + seconds if seconds else None,
+                      'stack': [], 'stages': []})
 
 
 def get_current_version(changelog_file_path):
     """It reads the file content and extracts the current version
 
-    :param str changelog_file_path: The file path
+    :param str changelog_file_path: The file path. Gzipped files ('.gz') are read transparently
     :rtype: str
     :return: The current version
     """
-    with open(changelog_file_path, mode='r') as file:
+    with _open_changelog(changelog_file_path) as file:
         first_line = file.readline()
         version_search = re.search(r'(\d+\.\d+\.\d+(-rc\.\d+)?)', first_line, re.IGNORECASE)
         return version_search.group(0) if version_search else ''
 
 
+def parse_changelog(changelog_file_path, limit=None, chunk_size=65536):
+    """It lazily parses a changelog file, yielding one entry at a time
+
+    The expected entry format is the one written by generate_changelog: a version line, '  - ' items and a date line.
+    Legacy and hand-edited entries are tolerated: versions may be markdown headers (e.g. '## v1.2.3'), items may use
+    '-', '*' or '+' with any indentation, indented lines continue the previous item, and any other text before
+    the first version is ignored. Versions must start their line, so an indented line is never an entry header.
+
+    :param str changelog_file_path: The changelog file path. Gzipped files ('.gz') are read transparently
+    :param int limit: The maximum number of entries to yield
+    :param int chunk_size: The read buffer size in bytes
+    :rtype: generator
+    :return: A generator of ChangelogEntry, newest first. Offsets and lengths are in bytes
+    """
+    if limit is not None and limit <= 0:
+        return
+    count = 0
+    version, changes, date, entry_offset = None, [], '', 0
+    offset = 0
+    with _open_changelog(changelog_file_path, binary=True, chunk_size=chunk_size) as file:
+        for raw_line in file:
+            line_offset = offset
+            offset += len(raw_line)
+            stripped = raw_line.strip()
+            if not stripped:
+                continue
+            line = raw_line.decode('utf-8', errors='replace').rstrip('\r\n')
+            # cheap first-character dispatch keeps the regular expressions off the common lines
+            item_search = CHANGELOG_ITEM_PATTERN.match(line) if stripped[:1] in b'-*+' else None
+            version_search = CHANGELOG_VERSION_PATTERN.match(line) if not item_search else None
+            if version_search:
+                if version:
+                    yield ChangelogEntry(version, changes, date, entry_offset, line_offset - entry_offset)
+                    count += 1
+                    if count == limit:
+                        return
+                version, changes, date, entry_offset = version_search.group(1), [], '', line_offset
+            elif version and item_search:
+                changes.append(item_search.group(1).strip())
+            elif version and not date:
+                if changes and line[:1].isspace():
+                    changes[-1] = '{} {}'.format(changes[-1], line.strip())
+                else:
+                    date = line.lstrip()
+    if version:
+        yield ChangelogEntry(version, changes, date, entry_offset, offset - entry_offset)
+
+
+def validate_changelog(changelog_file_path):
+    """It checks that every changelog entry has changes and a date and that no version is repeated
+
+    :param str changelog_file_path: The changelog file path
+    :rtype: list
+    :return: A list of problem descriptions, empty if the changelog is valid
+    """
+    problems = []
+    versions = set()
+    for entry in parse_changelog(changelog_file_path):
+        if entry.version in versions:
+            problems.append('Version {} is duplicated (byte {})'.format(entry.version, entry.offset))
+        if not entry.changes:
+            problems.append('Version {} has no changes (byte {})'.format(entry.version, entry.offset))
+        if not entry.date:
+            problems.append('Version {} has no date (byte {})'.format(entry.version, entry.offset))
+        versions.add(entry.version)
+    return problems
+
+
+def export_changelog(changelog_file_path, output_format='json', limit=None, output=None):
+    """It streams the changelog entries to the given output in another format
+
+    :param str changelog_file_path: The changelog file path
+    :param str output_format: The output format. Can be 'markdown', 'json' or 'html'
+    :param int limit: The maximum number of entries to export
+    :param file output: The text stream to write to. Defaults to the standard output
+    :raise InvalidFormat: If the output format is unknown
+    """
+    output = output or sys.stdout
+    separator = ',\n' if output_format == 'json' else ''
+    if output_format == 'json':
+        output.write('[\n')
+    for index, entry in enumerate(parse_changelog(changelog_file_path, limit=limit)):
+        output.write('{}{}'.format(separator if index else '',
+                                   render_changelog_entry(entry.version, entry.changes, entry.date, output_format)))
+    if output_format == 'json':
+        output.write('\n]\n')
+
+
 def generate_version(version='', version_type='patch'):
     """It generates a version based on given version and version type
 
@@ -132,7 +815,7 @@ def generate_version(version='', version_type='patch'):
         return '{}.{}.{}-rc.{}'.format(major, minor, patch, int(rc) + 1)
 
 
-def get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha):
+def get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha, data_source=None):
     """It retrieves the relevant changes since the last version
 
     Note: If the given SHA belongs to a commit (or merge), the returned changes will be the commit title.
@@ -142,27 +825,33 @@ def get_version_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha):
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str commit_sha: The commit SHA
+    :param data_source: The data source consulted before the gitlab api
     :rtype: list
     :return: A list containing the relevant changes since last version or None
     :raise HTTPError: If there is an error in HTTP request
     """
-    merge_request_changes = get_merge_request_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha)
+    merge_request_changes = get_merge_request_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha,
+                                                      data_source=data_source)
     if merge_request_changes:
         return merge_request_changes
-    return get_commit_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha)
+    return get_commit_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha, data_source=data_source)
 
 
-def get_merge_request_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha):
+def get_merge_request_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha, data_source=None):
     """It retrieves the merge request relevant changes
 
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str commit_sha: The commit SHA
+    :param data_source: The data source consulted before the gitlab api
     :rtype: list
     :return: A list containing the merge request relevant changes
     :raise HTTPError: If there is an error in HTTP request
     """
+    description = data_source.merge_request_description(commit_sha) if data_source else None
+    if description is not None:
+        return clean_content(description)
     merge_requests = _request('{}/api/v4/projects/{}/merge_requests'.format(gitlab_endpoint, project_id),
                               gitlab_token=gitlab_token, method='GET')
     for merge_request in merge_requests:
@@ -173,22 +862,51 @@ def get_merge_request_changes(gitlab_endpoint, gitlab_token, project_id, commit_
     return []
 
 
-def get_commit_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha):
+def get_commit_changes(gitlab_endpoint, gitlab_token, project_id, commit_sha, data_source=None):
     """It retrieves the commit relevant changes
 
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str commit_sha: The commit SHA
+    :param data_source: The data source consulted before the gitlab api
     :rtype: list
     :return: A list containing the commit relevant changes
     :raise HTTPError: If there is an error in HTTP request
     """
+    title = data_source.commit_title(commit_sha) if data_source else None
+    if title is not None:
+        return clean_content(title)
     commit = _request('{}/api/v4/projects/{}/repository/commits/{}'.format(gitlab_endpoint, project_id, commit_sha),
                       gitlab_token=gitlab_token, method='GET')
     return clean_content(commit.get('title'))
 
 
+def collect_changelog_fragments(fragments_dir):
+    """It reads the pending changelog fragments in one pass
+
+    A fragment is a small file added by a merge request to the fragments directory (e.g. 'changelog.d/1234.md'),
+    holding its changes as a list. Fragments are read in file name order, line by line, and cleaned like merge request
+    descriptions. Hidden files (e.g. '.gitkeep') are ignored.
+
+    :param str fragments_dir: The fragments directory
+    :rtype: tuple
+    :return: The changes, without duplicates, and the fragment paths they were read from
+    """
+    changes, fragment_paths = [], []
+    if not os.path.isdir(fragments_dir):
+        return changes, fragment_paths
+    for entry in sorted(os.scandir(fragments_dir), key=lambda entry: entry.name):
+        if entry.name.startswith('.') or not entry.is_file():
+            continue
+        with open(entry.path, mode='r') as fragment_file:
+            for line in fragment_file:
+                changes.extend(change for change in clean_content(line) if change not in changes)
+        fragment_paths.append(entry.path)
+    _log(type='debug', message='{} change(s) read from {} fragment(s)'.format(len(changes), len(fragment_paths)))
+    return changes, fragment_paths
+
+
 def clean_content(text):
     """It split the given text into a list of items and keeps only those items that represents version changes
 
@@ -209,7 +927,8 @@ def clean_content(text):
     return [item for item in items if item]
 
 
-def generate_changelog(version, version_changes, changelog_file_path):
+def generate_changelog(version, version_changes, changelog_file_path, output_file_paths=None, store_path=None,
+                       branch=None, commit_sha=None, index_path=None):
     """It prepends a changelog entry to the given changelog file
 
     A changelog entry is composed by:
@@ -217,42 +936,413 @@ def generate_changelog(version, version_changes, changelog_file_path):
     - The version changes
     - The current date
 
+    When a store path is given, the entry is also inserted in the SQLite changelog store. The insert is committed
+    only if the changelog file was written, and the changelog file is restored if the insert cannot be committed.
+
     :param str version: The version
     :param list version_changes: The version changes
     :param str changelog_file_path: The changelog file path
+    :param dict output_file_paths: Additional outputs to update, mapping each format name to its file path
+    :param str store_path: The SQLite changelog store path
+    :param str branch: The branch the version was published on, recorded in the store
+    :param str commit_sha: The commit SHA the version was published for, recorded in the store
+    :param str index_path: The changelog search index path, updated with the entry
     :raise NoChanges: If version changes is empty
+    :raise InvalidFormat: If an output format is unknown
     """
     _log(type='debug', message='Generating changelog for version {}'.format(version))
     if version_changes:
-        now = datetime.strftime(datetime.now(), '%a, %b %d %Y %H:%M:%S %z %Z')
-        with open(changelog_file_path, mode='r') as file:
-            content = file.read()
-        with open(changelog_file_path, mode='w') as file:
-            entry_skeleton = '{}\n\n{}\n\n{}\n\n{}'
-            changes = '  - {}'.format('\n  - '.join(version_changes))
-            file.write(entry_skeleton.format(version, changes, now, content))
+        moment = datetime.now()
+        now = datetime.strftime(moment, '%a, %b %d %Y %H:%M:%S %z %Z')
+        connection = _open_changelog_store(store_path) if store_path else None
+        try:
+            if connection:
+                _insert_changelog_store_entry(connection, version, version_changes, now, moment, branch, commit_sha)
+            with open(changelog_file_path, mode='r') as file:
+                content = file.read()
+            with open(changelog_file_path, mode='w') as file:
+                file.write(render_changelog_entry(version, version_changes, now) + content)
+            if connection:
+                try:
+                    connection.commit()
+                except sqlite3.Error:
+                    with open(changelog_file_path, mode='w') as file:
+                        file.write(content)
+                    raise
+        finally:
+            if connection:
+                connection.close()
+        for output_format, output_file_path in (output_file_paths or {}).items():
+            splice_changelog_entry(render_changelog_entry(version, version_changes, now, output_format),
+                                   output_file_path, output_format)
+        if index_path:
+            index_changelog_entry(index_path, version, version_changes, source='changelog')
     else:
         _log(type='error', message='Error occurred while generating changelog for version {}'.format(version))
         raise NoChanges()
     _log(type='debug', message='Changelog generated with success for version {}'.format(version))
 
 
-def git_commit(target_branch, changelog_file_path):
+def render_changelog_entry(version, version_changes, date='', output_format='markdown'):
+    """It renders a single changelog entry using the precompiled template of the given format
+
+    :param str version: The version
+    :param list version_changes: The version changes
+    :param str date: The entry date
+    :param str output_format: The output format. Can be 'markdown', 'json', 'html' or 'release'
+    :rtype: str
+    :return: The rendered entry
+    :raise InvalidFormat: If the output format is unknown
+    """
+    template = CHANGELOG_TEMPLATES.get(output_format)
+    if template is None:
+        raise InvalidFormat('Invalid format {}'.format(output_format))
+    changes = template.separator.join([template.change(template.escape(change)) for change in version_changes])
+    return template.entry(version=template.escape(version), changes=changes, date=template.escape(date))
+
+
+def splice_changelog_entry(entry, file_path, output_format='markdown'):
+    """It splices a rendered entry into the top of an existing output without re-rendering its older entries
+
+    Markdown and HTML outputs are a plain sequence of entries, so the entry is prepended.
+    JSON outputs are an array, so the entry is inserted right after its opening bracket.
+
+    :param str entry: The rendered entry
+    :param str file_path: The output file path
+    :param str output_format: The output format. Can be 'markdown', 'json' or 'html'
+    :raise InvalidFormat: If the output format is unknown or a JSON output is not an array
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise InvalidFormat('Invalid output format {}'.format(output_format))
+    directory = os.path.dirname(os.path.abspath(file_path))
+    spliced_file = tempfile.NamedTemporaryFile(mode='w', dir=directory, delete=False)
+    try:
+        with spliced_file:
+            try:
+                with open(file_path, mode='r') as file:
+                    shutil.copymode(file_path, spliced_file.name)
+                    if output_format == 'json':
+                        # skip the opening bracket and peek whether the array is empty
+                        opening = _next_character(file)
+                        rest = _next_character(file) if opening == '[' else ''
+                        if opening and not rest:
+                            raise InvalidFormat('{} is not a JSON array'.format(file_path))
+                        spliced_file.write('[\n{}{}'.format(entry, '\n' if rest in ('', ']') else ',\n'))
+                        spliced_file.write(rest if rest else ']\n')
+                    else:
+                        spliced_file.write(entry)
+                    shutil.copyfileobj(file, spliced_file)
+            except FileNotFoundError:
+                spliced_file.write('[\n{}\n]\n'.format(entry) if output_format == 'json' else entry)
+        os.replace(spliced_file.name, file_path)
+    except BaseException:
+        os.unlink(spliced_file.name)
+        raise
+
+
+def query_changelog_store(store_path, version=None, branch=None, since=None, until=None, latest_rc=False):
+    """It queries the SQLite changelog store
+
+    :param str store_path: The SQLite changelog store path
+    :param str version: A version prefix such as '3', '3.x' or '3.1'
+    :param str branch: The branch name
+    :param str since: The earliest release date (ISO format)
+    :param str until: The latest release date (ISO format)
+    :param bool latest_rc: Whether only the latest rc version of each branch must be returned
+    :rtype: list
+    :return: A list of entries (dicts with version, date, released_at, branch, commit_sha and changes), newest first
+    :raise InvalidVersion: If the version prefix is invalid
+    """
+    conditions, parameters = [], []
+    if version:
+        numbers = [number for number in version.split('.') if number not in ('x', '*', '')]
+        if len(numbers) > 3 or not all(number.isdigit() for number in numbers):
+            raise InvalidVersion('Invalid version {}'.format(version))
+        for column, number in zip(['major', 'minor', 'patch'], numbers):
+            conditions.append('{} = ?'.format(column))
+            parameters.append(int(number))
+    if branch:
+        conditions.append('branch = ?')
+        parameters.append(branch)
+    if since:
+        conditions.append('released_at >= ?')
+        parameters.append(since)
+    if until:
+        conditions.append('released_at <= ?')
+        parameters.append(until)
+    if latest_rc:
+        conditions.append('rc IS NOT NULL')
+        # a correlated subquery rather than a window function, which needs SQLite 3.25
+        conditions.append('id = (SELECT id FROM versions AS latest WHERE latest.branch IS versions.branch AND {} '
+                          'ORDER BY major DESC, minor DESC, patch DESC, rc DESC LIMIT 1)'
+                          .format(' AND '.join(conditions)))
+        parameters += parameters
+    query = 'SELECT id, version, date, released_at, branch, commit_sha FROM versions{}'.format(
+        ' WHERE ' + ' AND '.join(conditions) if conditions else '')
+
+    connection = _open_changelog_store(store_path)
+    try:
+        entries = {}
+        for row in connection.execute('{} ORDER BY released_at DESC, id DESC'.format(query), parameters):
+            entries[row[0]] = {'version': row[1], 'date': row[2], 'released_at': row[3], 'branch': row[4],
+                               'commit_sha': row[5], 'changes': []}
+        for version_id, description in connection.execute(
+                'SELECT changes.version_id, changes.description FROM changes JOIN ({}) AS selected '
+                'ON selected.id = changes.version_id ORDER BY changes.version_id, changes.position'.format(query),
+                parameters):
+            entries[version_id]['changes'].append(description)
+        return list(entries.values())
+    finally:
+        connection.close()
+
+
+def index_changelog_entry(index_path, version, version_changes, source='changelog'):
+    """It adds a version and its changes to the changelog search index
+
+    Changes already indexed for the version (e.g. from both the changelog and the tag) are ignored.
+
+    :param str index_path: The changelog search index path
+    :param str version: The version
+    :param list version_changes: The version changes
+    :param str source: Where the changes come from ('changelog' or 'tag')
+    :raise InvalidVersion: If the version is invalid
+    """
+    connection = _open_search_index(index_path)
+    try:
+        with connection:
+            _insert_search_entries(connection, version, version_changes, source)
+    finally:
+        connection.close()
+
+
+def build_search_index(index_path, changelog_file_path=None, gitlab_endpoint=None, gitlab_token=None,
+                       project_id=None):
+    """It indexes the whole changelog history and, when a project is given, every tag release description
+
+    :param str index_path: The changelog search index path
+    :param str changelog_file_path: The changelog file path
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :rtype: int
+    :return: The number of indexed versions
+    :raise HTTPError: If there is an error in HTTP request
+    """
+    count = 0
+    connection = _open_search_index(index_path)
+    try:
+        with connection:
+            sources = []
+            if changelog_file_path:
+                sources.append(('changelog', ((entry.version, entry.changes)
+                                              for entry in parse_changelog(changelog_file_path))))
+            if project_id:
+                sources.append(('tag', ((tag['name'], clean_content(tag['release'].get('description')))
+                                        for tag in _paginate('{}/api/v4/projects/{}/repository/tags'
+                                                             .format(gitlab_endpoint, project_id),
+                                                             gitlab_token=gitlab_token)
+                                        if tag.get('release'))))
+            for source, entries in sources:
+                for version, version_changes in entries:
+                    try:
+                        _insert_search_entries(connection, version, version_changes, source)
+                        count += 1
+                    except InvalidVersion:
+                        _log(type='warning', message='Invalid version {} is not indexed'.format(version))
+    finally:
+        connection.close()
+    _log(type='debug', message='{} version(s) indexed in {}'.format(count, index_path))
+    return count
+
+
+def search_changelog(index_path, query, limit=20):
+    """It searches the changelog search index
+
+    Every term of the query must match. A term ending with '*' is a prefix (e.g. 'auth*' or 'PROJ-12*'), and ticket
+    identifiers (e.g. 'PROJ-123' or '#456') are matched as a whole.
+
+    :param str index_path: The changelog search index path
+    :param str query: The query
+    :param int limit: The maximum number of changes to return
+    :rtype: list
+    :return: The matching changes (dicts with version, source and change), oldest version first
+    """
+    terms = []
+    for term in query.lower().split():
+        tokens = SEARCH_TOKEN_PATTERN.findall(term)
+        for position, token in enumerate(tokens):
+            if term.endswith('*') and position == len(tokens) - 1:
+                terms.append(('token >= ? AND token < ?', [token, token + '\U0010ffff']))
+            else:
+                terms.append(('token = ?', [token]))
+    if not terms:
+        return []
+    connection = _open_search_index(index_path)
+    try:
+        # a selective term drives the search and the other ones only filter its postings, otherwise the entries are
+        # scanned in version order until enough of them match
+        counts = [connection.execute('SELECT COUNT(*) FROM (SELECT 1 FROM postings WHERE {} LIMIT 1000)'
+                                     .format(condition), condition_parameters).fetchone()[0]
+                  for condition, condition_parameters in terms]
+        terms = [term for _, term in sorted(zip(counts, terms), key=lambda item: item[0])]
+        selective = min(counts) < 1000
+        conditions, parameters = [], []
+        for index, (condition, condition_parameters) in enumerate(terms):
+            # exact tokens are point lookups, prefixes are materialized once
+            conditions.append('id IN (SELECT entry_id FROM postings WHERE {})'.format(condition)
+                              if (index == 0 and selective) or condition != 'token = ?' else
+                              'EXISTS (SELECT 1 FROM postings WHERE {} AND entry_id = entries.id)'.format(condition))
+            parameters += condition_parameters
+        query = 'SELECT version, source, description FROM entries{} WHERE {} ' \
+                'ORDER BY major, minor, patch, rc IS NULL, rc, position LIMIT ?'.format(
+                    '' if selective else ' INDEXED BY entries_number', ' AND '.join(conditions))
+        return [{'version': version, 'source': source, 'change': description}
+                for version, source, description in connection.execute(query, parameters + [limit])]
+    finally:
+        connection.close()
+
+
+def rotate_changelog(changelog_file_path, keep_versions=None, keep_major=False, archive_dir=None, compress=False,
+                     collapse_rc=False):
+    """It moves older changelog entries to archive segments so the changelog file stays small
+
+    Entries are kept while they are among the first keep_versions entries or, with keep_major, while they belong to
+    the current major. The remaining entries are moved, byte for byte, to '<archive_dir>/<major>.md' (or '.md.gz'),
+    newest first, ahead of the entries already archived there.
+
+    With collapse_rc, when the newest entry is a final release, the rc entries right below it (those shipped by that
+    release) are folded into it, keeping their changes that are not already listed.
+
+    :param str changelog_file_path: The changelog file path
+    :param int keep_versions: The number of versions to keep. Defaults to one when keep_major is not set
+    :param bool keep_major: Whether all versions of the current major must be kept
+    :param str archive_dir: The archive directory. Defaults to 'CHANGELOG-archive' next to the changelog file
+    :param bool compress: Whether archive segments must be gzipped
+    :param bool collapse_rc: Whether rc entries must be collapsed into the newest final release
+    :rtype: list
+    :return: The archive segment paths that were written
+    """
+    archive_dir = archive_dir or os.path.join(os.path.dirname(changelog_file_path), 'CHANGELOG-archive')
+    keep_versions = max(keep_versions or (0 if keep_major else 1), 1)
+    entries = parse_changelog(changelog_file_path)
+    head = next(entries, None)
+    if head is None:
+        return []
+    head_end = head.offset + head.length
+    current_major = _version_major(head.version)
+    following_entries = entries
+    if collapse_rc and '-rc.' not in head.version:
+        for entry in entries:
+            if '-rc.' not in entry.version:
+                following_entries = itertools.chain([entry], entries)
+                break
+            head.changes.extend([change for change in entry.changes if change not in head.changes])
+            head_end = entry.offset + entry.length
+    collapsed = head_end != head.offset + head.length
+
+    # the byte ranges archived in each major segment, in file order (majors may interleave, e.g. maintenance releases)
+    kept, cut, archived_ranges = 1, None, OrderedDict()
+    for entry in following_entries:
+        major = _version_major(entry.version)
+        if cut is None and (kept < keep_versions or (keep_major and major == current_major)):
+            kept += 1
+            continue
+        if cut is None:
+            cut = entry.offset
+        ranges = archived_ranges.setdefault(major, [])
+        if ranges and ranges[-1][1] == entry.offset:
+            ranges[-1][1] = entry.offset + entry.length
+        else:
+            ranges.append([entry.offset, entry.offset + entry.length])
+    if not collapsed and cut is None:
+        return []
+
+    archive_paths = []
+    with open(changelog_file_path, mode='rb') as file:
+        for major, ranges in archived_ranges.items():
+            archive_path = os.path.join(archive_dir, '{}.md{}'.format(major, '.gz' if compress else ''))
+            os.makedirs(archive_dir, exist_ok=True)
+            with _atomic_writer(archive_path, compress) as archive_file:
+                for start, end in ranges:
+                    _copy_range(file, archive_file, start, end)
+                if os.path.exists(archive_path):
+                    with _open_changelog(archive_path, binary=True) as old_archive_file:
+                        shutil.copyfileobj(old_archive_file, archive_file)
+            archive_paths.append(archive_path)
+        with _atomic_writer(changelog_file_path) as changelog_file:
+            _copy_range(file, changelog_file, 0, head.offset)
+            if collapsed:
+                changelog_file.write(render_changelog_entry(head.version, head.changes, head.date).encode('utf-8'))
+            else:
+                _copy_range(file, changelog_file, head.offset, head_end)
+            _copy_range(file, changelog_file, head_end, cut)
+    _log(type='debug', message='Changelog rotated, {} archive segment(s) updated'.format(len(archive_paths)))
+    return archive_paths
+
+
+def prepare_workspace(workspace, remote_url, target_branch, file_paths):
+    """It prepares a minimal workspace to commit the changelog in
+
+    The target branch is cloned (or fetched, when the workspace already exists) without history nor file contents
+    (--depth 1 --filter=blob:none), and only the given paths are checked out (sparse checkout). The other blobs are
+    never downloaded, so the cost does not depend on the repository size.
+
+    :param str workspace: The workspace directory
+    :param str remote_url: The repository url. Defaults to the origin of the current repository
+    :param str target_branch: The target branch name
+    :param list file_paths: The paths to check out, relative to the repository root. A trailing slash means a directory
+    :raise CommitError: If any error happens during clone, fetch or checkout
+    """
+    if not os.path.isdir(os.path.join(workspace, '.git')):
+        if not remote_url:
+            remote_url = _command(command='git remote get-url origin', exception=CommitError)[0].decode('utf-8').strip()
+        _command(command=['git', 'clone', '--quiet', '--filter=blob:none', '--no-checkout', '--depth', '1',
+                          '--single-branch', '--branch', target_branch, remote_url, workspace], exception=CommitError)
+    else:
+        _command(command=['git', 'fetch', '--quiet', '--filter=blob:none', '--depth', '1', 'origin',
+                          '+refs/heads/{0}:refs/remotes/origin/{0}'.format(target_branch)],
+                 exception=CommitError, cwd=workspace)
+    _command(command=['git', 'sparse-checkout', 'set', '--no-cone'] +
+             ['/' + file_path.replace(os.sep, '/').lstrip('/') for file_path in file_paths],
+             exception=CommitError, cwd=workspace)
+    _command(command=['git', 'checkout', '--quiet', '--force', '-B', target_branch, 'origin/' + target_branch],
+             exception=CommitError, cwd=workspace)
+
+
+def git_commit(target_branch, changelog_file_path, *extra_file_paths, workspace=None):
     """It commits the changelog changes
 
+    In a workspace (see prepare_workspace), the commit is written from the index only with plumbing commands, so the
+    sparse working tree is never scanned.
+
     :param str target_branch: The target branch name
     :param str changelog_file_path: The changelog file path
+    :param str extra_file_paths: Other file paths to include in the same commit
+    :param str workspace: The workspace directory, if any
     :rtype: str
     :return: The commit SHA
     :raise CommitError: If any error happens during commit
     """
-    _command(command='git add {}'.format(changelog_file_path), exception=CommitError)
+    if workspace:
+        file_paths = [os.path.relpath(file_path, workspace) for file_path in (changelog_file_path,) + extra_file_paths]
+        _command(command=['git', 'update-index', '--add', '--remove', '--'] + file_paths, exception=CommitError,
+                 cwd=workspace)
+        tree = _command(command='git write-tree', exception=CommitError, cwd=workspace)[0].decode('utf-8').strip()
+        parent = _command(command='git rev-parse HEAD', exception=CommitError, cwd=workspace)[0].decode('utf-8').strip()
+        commit_sha = _command(command=['git', 'commit-tree', tree, '-p', parent, '-m',
+                                       'Update changelog ({})'.format(target_branch)],
+                              exception=CommitError, cwd=workspace)[0].decode('utf-8').strip()
+        _command(command=['git', 'update-ref', 'refs/heads/{}'.format(target_branch), commit_sha, parent],
+                 exception=CommitError, cwd=workspace)
+        return commit_sha
+    _command(command=['git', 'add', changelog_file_path] + list(extra_file_paths), exception=CommitError)
     _command(command=['git', 'commit', '-m', 'Update changelog ({})'.format(target_branch)], exception=CommitError)
     stdout = _command(command='git log --format=%H -n 1'.format(target_branch), exception=CommitError)
     return stdout[0].decode('utf-8').strip()
 
 
-def git_create_tag(gitlab_endpoint, gitlab_token, project_id, commit_sha, version_changes, tag_name):
+def git_create_tag(gitlab_endpoint, gitlab_token, project_id, commit_sha, version_changes, tag_name,
+                   index_path=None):
     """It generates a tag
 
     :param str gitlab_endpoint: The gitlab api endpoint
@@ -261,43 +1351,249 @@ def git_create_tag(gitlab_endpoint, gitlab_token, project_id, commit_sha, versio
     :param str commit_sha: The commit SHA
     :param list version_changes: The version changes
     :param str tag_name: The tag name
+    :param str index_path: The changelog search index path, updated with the tag release description
     :raise HTTPError: If there is an error in HTTP request
     """
-    changes = '- {}'.format('\n- '.join(version_changes))
+    changes = render_changelog_entry(tag_name, version_changes, output_format='release')
     _request('{}/api/v4/projects/{}/repository/tags'.format(gitlab_endpoint, project_id),
              gitlab_token=gitlab_token, method='POST',
-             data={'tag_name': tag_name, 'ref': commit_sha, 'release_description': changes})
+             data={'tag_name': tag_name, 'ref': commit_sha, 'message': changes, 'release_description': changes})
+    if index_path:
+        index_changelog_entry(index_path, tag_name, version_changes, source='tag')
+
 
+def git_create_local_tag(commit_sha, version_changes, tag_name, workspace=None):
+    """It creates an annotated tag in the local repository, with the release description as message
 
-def git_get_tag_release_description(gitlab_endpoint, gitlab_token, project_id, tag_name):
+    An existing local tag with the same name (e.g. left by a failed push) is replaced.
+
+    :param str commit_sha: The commit SHA
+    :param list version_changes: The version changes
+    :param str tag_name: The tag name
+    :param str workspace: The workspace directory, if any
+    :raise CommitError: If any error happens during tag creation
+    """
+    _command(command=['git', 'tag', '--force', '--annotate', tag_name, '--message',
+                      render_changelog_entry(tag_name, version_changes, output_format='release'), commit_sha],
+             exception=CommitError, cwd=workspace)
+
+
+def git_create_release(gitlab_endpoint, gitlab_token, project_id, version_changes, tag_name, index_path=None):
+    """It creates the release of an existing tag
+
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :param list version_changes: The version changes
+    :param str tag_name: The tag name
+    :param str index_path: The changelog search index path, updated with the release description
+    :raise HTTPError: If there is an error in HTTP request
+    """
+    _request('{}/api/v4/projects/{}/releases'.format(gitlab_endpoint, project_id),
+             gitlab_token=gitlab_token, method='POST',
+             data={'tag_name': tag_name, 'name': tag_name,
+                   'description': render_changelog_entry(tag_name, version_changes, output_format='release')})
+    if index_path:
+        index_changelog_entry(index_path, tag_name, version_changes, source='tag')
+
+
+def git_get_tag_release_description(gitlab_endpoint, gitlab_token, project_id, tag_name, data_source=None):
     """It generates a tag
 
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str tag_name: The tag name
+    :param data_source: The data source consulted before the gitlab api
     :rtype: list
     :return: A list containing the release description of a given tag
     :raise HTTPError: If there is an error in HTTP request
     """
+    message = data_source.tag_message(tag_name) if data_source else None
+    if message is not None:
+        return clean_content(message)
     tag = _request('{}/api/v4/projects/{}/repository/tags/{}'.format(gitlab_endpoint, project_id, tag_name),
                    gitlab_token=gitlab_token, method='GET')
     return clean_content(tag['release'].get('description') if tag['release'] else None)
 
 
-def git_push(target_branch):
+def republish_releases(gitlab_endpoint, gitlab_token, project_id, changelog_file_path=None, tag_patterns=None,
+                       max_workers=8, rate_limit=10, dry_run=False):
+    """It regenerates the release description of existing tags and updates those that changed
+
+    The new description of a tag is rendered from its changelog entry when a changelog is given (tags without an entry
+    are left alone), or from its current description otherwise, cleaned again in both cases. Current descriptions are
+    fetched with the paginated tag list, and only the releases whose description differs are updated, concurrently and
+    at most rate_limit requests per second.
+
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :param str changelog_file_path: The changelog file path, if any
+    :param list tag_patterns: The tag names or glob patterns (e.g. 1.*) to republish. Defaults to every tag
+    :param int max_workers: The maximum number of releases updated at the same time
+    :param float rate_limit: The maximum number of update requests per second, if any
+    :param bool dry_run: Whether the changed releases must only be reported
+    :rtype: list
+    :return: The names of the tags whose release description changed
+    :raise HTTPError: If there is an error in HTTP request
+    """
+    changelog_changes = None
+    if changelog_file_path:
+        changelog_changes = {entry.version: clean_content('\n'.join('- ' + change for change in entry.changes))
+                             for entry in parse_changelog(changelog_file_path)}
+    updates = []
+    with _stage('get_releases'):
+        for tag in _paginate('{}/api/v4/projects/{}/repository/tags'.format(gitlab_endpoint, project_id),
+                             gitlab_token=gitlab_token):
+            if tag_patterns and not any(fnmatch.fnmatchcase(tag['name'], pattern) for pattern in tag_patterns):
+                continue
+            description = (tag.get('release') or {}).get('description') or ''
+            if changelog_changes is None:
+                version_changes = clean_content(description)
+            elif tag['name'] in changelog_changes:
+                version_changes = changelog_changes[tag['name']]
+            else:
+                version_changes = changelog_changes.get(tag['name'][1:] if tag['name'].startswith('v') else None)
+            if not version_changes:
+                continue
+            new_description = render_changelog_entry(tag['name'], version_changes, output_format='release')
+            if new_description != description:
+                updates.append((tag['name'], new_description, bool(tag.get('release'))))
+    _log(type='debug', message='{} release description(s) to update'.format(len(updates)))
+    if dry_run or not updates:
+        return [tag_name for tag_name, _, _ in updates]
+
+    throttle = _rate_limiter(rate_limit)
+
+    def update(tag_name, description, exists):
+        throttle()
+        if exists:
+            _request('{}/api/v4/projects/{}/releases/{}'.format(gitlab_endpoint, project_id, quote(tag_name, safe='')),
+                     gitlab_token=gitlab_token, method='PUT', data={'description': description})
+        else:
+            _request('{}/api/v4/projects/{}/releases'.format(gitlab_endpoint, project_id),
+                     gitlab_token=gitlab_token, method='POST',
+                     data={'tag_name': tag_name, 'name': tag_name, 'description': description})
+
+    errors = []
+    workers = max(1, min(max_workers, len(updates)))
+    with _stage('update_releases'), concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(update, *item): item[0] for item in updates}
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception():
+                _log(type='error',
+                     message='Release {} could not be updated: {}'.format(futures[future], future.exception()))
+                errors.append(future.exception())
+    if errors:
+        raise errors[0]
+    return [tag_name for tag_name, _, _ in updates]
+
+
+def enqueue_release_hooks(queue_path, hook_urls, payload):
+    """It writes an event for each hook url to the durable hook queue
+
+    :param str queue_path: The SQLite hook queue path
+    :param list hook_urls: The urls the payload must be posted to
+    :param dict payload: The event payload
+    :rtype: int
+    :return: The number of queued events
+    """
+    connection = _open_hook_queue(queue_path)
+    try:
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            connection.executemany('INSERT INTO events (url, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)',
+                                   [(url, json.dumps(payload), now, now) for url in hook_urls])
+    finally:
+        connection.close()
+    _log(type='debug', message='{} hook event(s) queued in {}'.format(len(hook_urls), queue_path))
+    return len(hook_urls)
+
+
+def deliver_release_hooks(queue_path, max_workers=4, max_attempts=8, timeout=10, wait=True):
+    """It posts the pending events of the hook queue to their urls
+
+    Due events are leased before being posted, so several delivery processes can share the same queue without
+    posting an event twice. A failed event is retried later with an exponential backoff, until max_attempts is reached.
+    With wait, the delivery goes on until no event is left to retry; otherwise only the events due now are posted.
+
+    :param str queue_path: The SQLite hook queue path
+    :param int max_workers: The maximum number of events posted at the same time
+    :param int max_attempts: The maximum number of attempts of each event
+    :param float timeout: The number of seconds each post may take
+    :param bool wait: Whether the events retried later must be waited for
+    :rtype: int
+    :return: The number of delivered events
+    """
+    delivered = 0
+    connection = _open_hook_queue(queue_path)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while True:
+                now = time.time()
+                with connection:
+                    connection.execute('BEGIN IMMEDIATE')
+                    events = connection.execute('SELECT id, url, payload, attempts FROM events '
+                                                'WHERE delivered_at IS NULL AND attempts < ? AND next_attempt_at <= ? '
+                                                'ORDER BY next_attempt_at LIMIT ?',
+                                                (max_attempts, now, max(1, max_workers))).fetchall()
+                    connection.executemany('UPDATE events SET next_attempt_at = ? WHERE id = ?',
+                                           [(now + timeout * 2, event[0]) for event in events])
+                if not events:
+                    next_attempt_at = connection.execute('SELECT MIN(next_attempt_at) FROM events '
+                                                         'WHERE delivered_at IS NULL AND attempts < ?',
+                                                         (max_attempts,)).fetchone()[0]
+                    if not wait or next_attempt_at is None:
+                        break
+                    time.sleep(max(0.0, min(next_attempt_at - now, HOOK_RETRY_MAX_DELAY)))
+                    continue
+                results = list(executor.map(lambda event: _post_hook(event[1], event[2], timeout), events))
+                with connection:
+                    connection.execute('BEGIN IMMEDIATE')
+                    for (event_id, url, _, attempts), error in zip(events, results):
+                        if error is None:
+                            delivered += 1
+                            connection.execute('UPDATE events SET attempts = ?, delivered_at = ?, last_error = NULL '
+                                               'WHERE id = ?', (attempts + 1, time.time(), event_id))
+                            continue
+                        _log(type='warning', message='Hook {} failed (attempt {}): {}'.format(url, attempts + 1, error))
+                        connection.execute('UPDATE events SET attempts = ?, next_attempt_at = ?, last_error = ? '
+                                           'WHERE id = ?', (attempts + 1,
+                                                            time.time() + min(2 ** attempts, HOOK_RETRY_MAX_DELAY),
+                                                            str(error), event_id))
+    finally:
+        connection.close()
+    _log(type='debug', message='{} hook event(s) delivered'.format(delivered))
+    return delivered
+
+
+def git_push(target_branch, *tag_names, workspace=None):
     """It pushes the commit to repository
 
+    When tags are given, they are pushed with the branch in a single atomic push: either every ref is updated or none.
+
     :param str target_branch: The target branch name
+    :param str tag_names: The local tags to push with the branch
+    :param str workspace: The workspace directory, if any
     :raise PushError: If any error happens during push
     """
-    _command(command='git push origin {}'.format(target_branch), exception=PushError)
+    if tag_names:
+        _command(command=['git', 'push', '--atomic', 'origin', target_branch] +
+                 ['refs/tags/{}'.format(tag_name) for tag_name in tag_names], exception=PushError, cwd=workspace)
+    else:
+        _command(command='git push origin {}'.format(target_branch), exception=PushError, cwd=workspace)
 
 
 def git_create_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branch, users,
-                             version_changes):
+                             version_changes, merge_request_index=None):
     """It creates a merge request depending on the target branch
 
+    If an open merge request already exists for the same source and target branches, its description is updated and
+    it is reused instead. The existing merge request is looked up in the given index or, when the creation is refused
+    because of it, in the (cached) listing of open merge requests.
+
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
@@ -305,75 +1601,1156 @@ def git_create_merge_request(gitlab_endpoint, gitlab_token, project_id, source_b
     :param str target_branch: The target branch name
     :param list users: Name of each user that must be included to verify merge request
     :param list version_changes: The version changes
+    :param dict merge_request_index: The open merge requests indexed by (source branch, target branch)
     :rtype: str
-    :return: The created merge request iid
+    :return: The created (or reused) merge request iid
     :raise HTTPError: If there is an error in HTTP request
     """
-    # TODO: If merge request cannot be created because there is one (status code = ???) the build fails
-    merge_request = _request('{}/api/v4/projects/{}/merge_requests'.format(gitlab_endpoint, project_id),
-                             gitlab_token=gitlab_token, method='POST',
-                             data={'source_branch': source_branch, 'target_branch': target_branch,
-                                   'title': 'Automatic merge branch \'{}\' into \'{}\''
-                                            .format(source_branch, target_branch),
-                                   'description': '- {}{}{}'
-                                                  .format('\n- '.join(version_changes),
-                                                          '\n\n- - - \n\n- [ ] @' if users else '',
-                                                          '\n- [ ] @'.join(users) if users else '')})
-    return merge_request['iid']
+    data = {'source_branch': source_branch, 'target_branch': target_branch,
+            'title': 'Automatic merge branch \'{}\' into \'{}\''.format(source_branch, target_branch),
+            'description': '{}{}{}'.format(render_changelog_entry('', version_changes, output_format='release'),
+                                           '\n\n- - - \n\n- [ ] @' if users else '',
+                                           '\n- [ ] @'.join(users) if users else '')}
+    existing_merge_request = (merge_request_index or {}).get((source_branch, target_branch))
+    if existing_merge_request is None:
+        try:
+            merge_request = _request('{}/api/v4/projects/{}/merge_requests'.format(gitlab_endpoint, project_id),
+                                     gitlab_token=gitlab_token, method='POST', data=data)
+            return merge_request['iid']
+        except HTTPError as error:
+            if error.code != 409:
+                raise error
+            existing_merge_request = get_open_merge_requests(gitlab_endpoint, gitlab_token, project_id,
+                                                             source_branch).get((source_branch, target_branch))
+            if existing_merge_request is None:
+                raise error
+    _log(type='warning', message='Merge request {} already exists. Reusing it.'.format(existing_merge_request['iid']))
+    _request('{}/api/v4/projects/{}/merge_requests/{}'.format(gitlab_endpoint, project_id,
+                                                              existing_merge_request['iid']),
+             gitlab_token=gitlab_token, method='PUT', data={'title': data['title'], 'description': data['description']})
+    return existing_merge_request['iid']
+
+
+def get_open_merge_requests(gitlab_endpoint, gitlab_token, project_id, source_branch=None):
+    """It retrieves the open merge requests indexed by source and target branches
+
+    The listing is requested once per run for each project and source branch, and then served from a cache.
+
+    :param str gitlab_endpoint: The gitlab api endpoint
+    :param str gitlab_token: The gitlab api token
+    :param str project_id: The project identifier
+    :param str source_branch: The source branch name, to list only its merge requests
+    :rtype: dict
+    :return: The open merge requests indexed by (source branch, target branch)
+    :raise HTTPError: If there is an error in HTTP request
+    """
+    key = (gitlab_endpoint, project_id, source_branch)
+    with _OPEN_MERGE_REQUESTS_LOCK:
+        if key not in _OPEN_MERGE_REQUESTS:
+            query = {'state': 'opened'}
+            if source_branch:
+                query['source_branch'] = source_branch
+            _OPEN_MERGE_REQUESTS[key] = {
+                (merge_request['source_branch'], merge_request['target_branch']): merge_request
+                for merge_request in _paginate('{}/api/v4/projects/{}/merge_requests?{}'
+                                               .format(gitlab_endpoint, project_id, urlencode(query)),
+                                               gitlab_token=gitlab_token)}
+        return _OPEN_MERGE_REQUESTS[key]
 
 
 def git_accept_merge_request(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branch,
-                             merge_request_iid):
+                             merge_request_iid, timeout=600, merge_when_pipeline_succeeds=True):
     """It accepts a merge request
 
+    The merge request is accepted with 'merge when pipeline succeeds', so a running pipeline does not fail the merge.
+    While GitLab refuses the merge because the merge request is still being checked, the merge request is polled
+    with conditional requests (ETag) and an increasing delay until it changes, and the merge is retried.
+
     :param str gitlab_endpoint: The gitlab api endpoint
     :param str gitlab_token: The gitlab api token
     :param str project_id: The project identifier
     :param str source_branch: The source branch name
     :param str target_branch: The target branch name
     :param str merge_request_iid: The merge request iid to approve
+    :param int timeout: The maximum number of seconds to wait for the merge request to become mergeable
+    :param bool merge_when_pipeline_succeeds: Whether the merge must wait for the pipeline to succeed
     :raise HTTPError: If there is an error in HTTP request
+    :raise MergeError: If the merge request cannot be merged
+    """
+    merge_request_url = '{}/api/v4/projects/{}/merge_requests/{}'.format(gitlab_endpoint, project_id,
+                                                                         merge_request_iid)
+    deadline = min(time.monotonic() + (timeout or 0), _DEADLINE['expires_at'] or float('inf'))
+    etag = None
+    while True:
+        try:
+            _request('{}/merge'.format(merge_request_url), gitlab_token=gitlab_token, method='PUT',
+                     data={'merge_commit_message': 'Automatic merge branch \'{}\' into \'{}\''
+                                                   .format(source_branch, target_branch),
+                           'merge_when_pipeline_succeeds': merge_when_pipeline_succeeds})
+            return
+        except HTTPError as error:
+            if error.code == 404:
+                _log(type='warning', message='Could not accept merge request because it could not be found. Skipping.')
+                return
+            if error.code not in MERGE_RETRY_CODES or time.monotonic() >= deadline:
+                _remaining()
+                raise error
+            _log(type='warning', message='Merge request cannot be accepted yet. [Code={}] Waiting for it to change.'
+                                         .format(error.code))
+        etag, merged = _wait_for_merge_request(merge_request_url, gitlab_token, etag, deadline)
+        if merged:
+            return
+
+
+class LocalGitRepository(object):
+    """Data source answering commit titles and annotated tag messages from a local clone
+
+    Objects are read through one long-lived 'git cat-file --batch' process and tag messages through a single
+    'git for-each-ref' call, so no network round trip is needed. Lookups return None when the data is not available
+    locally, so callers can fall back to the gitlab api.
     """
-    try:
-        _request('{}/api/v4/projects/{}/merge_requests/{}/merge'.format(gitlab_endpoint, project_id, merge_request_iid),
-                 gitlab_token=gitlab_token, method='PUT',
-                 data={'merge_commit_message': 'Automatic merge branch \'{}\' into \'{}\''
-                                               .format(source_branch, target_branch)})
-    except HTTPError as error:
-        if error.code == 404:
-            _log(type='warning', message='Could not accept merge request because it could not be found. Skipping.')
-        else:
-            raise error
 
+    def __init__(self, path='.', batch_size=256):
+        """
+        :param str path: The repository path
+        :param int batch_size: The maximum number of objects requested at once from 'git cat-file --batch'
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._process = None
+        self._tag_messages = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """It stops the 'git cat-file --batch' process"""
+        if self._process:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+    def merge_request_description(self, commit_sha):
+        """Merge request descriptions are not stored in the repository
+
+        :param str commit_sha: The merge commit SHA
+        :rtype: None
+        :return: None
+        """
+        return None
+
+    def open_merge_requests(self, source_branch):
+        """Merge requests are not stored in the repository
+
+        :param str source_branch: The source branch name
+        :rtype: None
+        :return: None
+        """
+        return None
+
+    def commit_title(self, commit_sha):
+        """
+        :param str commit_sha: The commit SHA
+        :rtype: str
+        :return: The commit title or None if the commit is not available locally
+        """
+        return self.commit_titles([commit_sha]).get(commit_sha)
+
+    def commit_titles(self, commit_shas):
+        """
+        :param list commit_shas: The commit SHAs
+        :rtype: dict
+        :return: The title of each commit available locally, indexed by the given SHA
+        """
+        titles = {}
+        for commit_sha, (object_type, content) in self.read_objects(commit_shas).items():
+            if object_type == 'commit':
+                message = content.split(b'\n\n', 1)[1] if b'\n\n' in content else b''
+                titles[commit_sha] = message.decode('utf-8', errors='replace').split('\n', 1)[0]
+        return titles
+
+    def tag_message(self, tag_name):
+        """
+        :param str tag_name: The tag name
+        :rtype: str
+        :return: The annotated tag message or None if the tag is not an annotated tag available locally
+        """
+        return self.tag_messages().get(tag_name)
+
+    def tag_messages(self):
+        """
+        :rtype: dict
+        :return: The message of every annotated tag, indexed by tag name
+        """
+        with self._lock:
+            if self._tag_messages is None:
+                output = b''.join(_command(['git', 'for-each-ref', '--format=%(refname:short)%00%(objecttype)'
+                                            '%00%(contents)%00%(contents:signature)%00%00', 'refs/tags'],
+                                           cwd=self.path))
+                self._tag_messages = {}
+                for record in output.decode('utf-8', errors='replace').split('\0\0\n'):
+                    fields = record.split('\0')
+                    if len(fields) == 4 and fields[1] == 'tag':
+                        message = fields[2][:len(fields[2]) - len(fields[3])] if fields[3] else fields[2]
+                        self._tag_messages[fields[0]] = message.strip()
+            return self._tag_messages
+
+    def read_objects(self, names):
+        """
+        :param list names: The object names (SHAs or revisions)
+        :rtype: dict
+        :return: The (type, content) of each object available locally, indexed by the given name
+        """
+        objects = {}
+        names = [name for name in names if name and '\n' not in name]
+        with self._lock:
+            for start in range(0, len(names), self.batch_size):
+                batch = names[start:start + self.batch_size]
+                process = self._batch_process()
+                timeout = _remaining(COMMAND_TIMEOUT)
+                with _kill_on_expiry(process, timeout) as expired:
+                    try:
+                        # requests are pipelined, the answers come back in the same order
+                        process.stdin.write(''.join('{}\n'.format(name) for name in batch).encode('utf-8'))
+                        process.stdin.flush()
+                        for name in batch:
+                            header = process.stdout.readline().split()
+                            if len(header) != 3:
+                                continue
+                            content = process.stdout.read(int(header[2]))
+                            process.stdout.read(1)
+                            objects[name] = (header[1].decode('utf-8'), content)
+                    except OSError:
+                        if not expired.is_set():
+                            raise
+                if expired.is_set():
+                    self.close()
+                    _remaining()
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+        return objects
+
+    def _batch_process(self):
+        if self._process is None:
+            self._process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.path, stdin=subprocess.PIPE,
+                                             stdout=subprocess.PIPE, start_new_session=True)
+        return self._process
+
+
+class GitlabGraphQL(object):
+    """Data source answering merge request descriptions, commit titles, tag release descriptions and open merge
+    requests from the gitlab GraphQL api
+
+    Only the needed fields of the given commits, tags and source branch are requested, in a single batched query sent
+    on the first lookup. Lookups return None when the data was not part of the query or the query failed, so callers
+    can fall back to the gitlab REST api.
+    """
 
-def _command(command, exception=Exception):
+    def __init__(self, gitlab_endpoint, gitlab_token, project_id, commit_shas=(), tag_names=(), source_branch=None,
+                 graphql_endpoint=None, limit=100):
+        """
+        :param str gitlab_endpoint: The gitlab api endpoint
+        :param str gitlab_token: The gitlab api token
+        :param str project_id: The project identifier (numeric id or url-encoded full path)
+        :param list commit_shas: The commit SHAs whose merge request description and title are fetched
+        :param list tag_names: The tag names whose release description is fetched
+        :param str source_branch: The source branch whose open merge requests are fetched
+        :param str graphql_endpoint: The GraphQL endpoint, defaults to the gitlab endpoint one
+        :param int limit: The maximum number of merged and open merge requests fetched
+        """
+        self.graphql_endpoint = graphql_endpoint or '{}/api/graphql'.format(gitlab_endpoint)
+        self.gitlab_token = gitlab_token
+        self.project_id = project_id
+        self.commit_shas = [commit_sha for commit_sha in commit_shas if commit_sha]
+        self.tag_names = [tag_name for tag_name in tag_names if tag_name]
+        self.source_branch = source_branch
+        self.limit = limit
+        self._project = None
+        self._fetched = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Nothing is kept open between lookups"""
+
+    def query(self):
+        """
+        :rtype: str
+        :return: The batched GraphQL query
+        """
+        fields = []
+        if self.commit_shas:
+            fields.append('mergedMergeRequests: mergeRequests(state: merged, sort: MERGED_AT_DESC, first: {}) '
+                          '{{ nodes {{ mergeCommitSha description }} }}'.format(self.limit))
+        for index, commit_sha in enumerate(self.commit_shas):
+            fields.append('commit{}: repository {{ tree(ref: {}) {{ lastCommit {{ sha title }} }} }}'
+                          .format(index, json.dumps(commit_sha)))
+        for index, tag_name in enumerate(self.tag_names):
+            fields.append('tag{}: release(tagName: {}) {{ description }}'.format(index, json.dumps(tag_name)))
+        if self.source_branch:
+            fields.append('openMergeRequests: mergeRequests(state: opened, sourceBranches: [{}], first: {}) '
+                          '{{ nodes {{ iid sourceBranch targetBranch }} }}'
+                          .format(json.dumps(self.source_branch), self.limit))
+        if str(self.project_id).isdigit():
+            project = 'projects(ids: [{}]) {{ nodes {{ ...release }} }}'.format(
+                json.dumps('gid://gitlab/Project/{}'.format(self.project_id)))
+        else:
+            project = 'project(fullPath: {}) {{ ...release }}'.format(json.dumps(unquote(self.project_id)))
+        return 'query {{ {} }} fragment release on Project {{ {} }}'.format(project, ' '.join(fields))
+
+    def project(self):
+        """
+        :rtype: dict
+        :return: The fetched project fields or None if the query failed
+        """
+        with self._lock:
+            if not self._fetched:
+                self._fetched = True
+                try:
+                    response = _request(self.graphql_endpoint, gitlab_token=self.gitlab_token, method='POST',
+                                        data={'query': self.query()}, write=False)
+                except HTTPError:
+                    return None
+                if response.get('errors'):
+                    _log(type='warning', message='GraphQL query failed: {}'.format(
+                        '; '.join(error.get('message', '') for error in response['errors'])))
+                data = response.get('data') or {}
+                if 'projects' in data:
+                    nodes = (data['projects'] or {}).get('nodes') or []
+                    self._project = nodes[0] if nodes else None
+                else:
+                    self._project = data.get('project')
+            return self._project
+
+    def merge_request_description(self, commit_sha):
+        """
+        :param str commit_sha: The merge commit SHA
+        :rtype: str
+        :return: The description of the merge request merged by the commit or None if it was not fetched, which is
+                 also the case when it is not among the most recently merged ones
+        """
+        project = self.project()
+        if commit_sha not in self.commit_shas or not project or not project.get('mergedMergeRequests'):
+            return None
+        for merge_request in project['mergedMergeRequests'].get('nodes') or []:
+            if merge_request.get('mergeCommitSha') == commit_sha:
+                return merge_request.get('description') or ''
+        return None
+
+    def commit_title(self, commit_sha):
+        """
+        :param str commit_sha: The commit SHA
+        :rtype: str
+        :return: The commit title or None if it was not fetched
+        """
+        project = self.project()
+        if commit_sha not in self.commit_shas or not project:
+            return None
+        repository = project.get('commit{}'.format(self.commit_shas.index(commit_sha))) or {}
+        last_commit = (repository.get('tree') or {}).get('lastCommit') or {}
+        return last_commit.get('title')
+
+    def tag_message(self, tag_name):
+        """
+        :param str tag_name: The tag name
+        :rtype: str
+        :return: The tag release description or None if it was not fetched
+        """
+        project = self.project()
+        if tag_name not in self.tag_names or not project:
+            return None
+        return (project.get('tag{}'.format(self.tag_names.index(tag_name))) or {}).get('description')
+
+    def open_merge_requests(self, source_branch):
+        """
+        :param str source_branch: The source branch name
+        :rtype: dict
+        :return: The open merge requests indexed by (source branch, target branch), or None if they were not fetched
+        """
+        project = self.project()
+        if source_branch != self.source_branch or not project or not project.get('openMergeRequests'):
+            return None
+        return {(merge_request['sourceBranch'], merge_request['targetBranch']):
+                {'iid': int(merge_request['iid']), 'source_branch': merge_request['sourceBranch'],
+                 'target_branch': merge_request['targetBranch']}
+                for merge_request in project['openMergeRequests'].get('nodes') or []}
+
+
+class GitlabCatalog(object):
+    """Data source answering merge request descriptions, commit titles and tag release descriptions from a local
+    SQLite catalog of the project
+
+    The catalog is brought up to date once, on the first lookup, by an incremental sync: merged merge requests are
+    listed from the last seen 'updated_at' (order_by=updated_at), commits from the last seen commit date, and tags
+    newest first until a page brings nothing new. A warm sync therefore costs one request per resource, whatever the
+    project size. Lookups return None when the data is not in the catalog, so callers can fall back to the gitlab api.
+
+    Tags are listed by commit date, so a release description edited later on an older tag (e.g. by republish) is not
+    seen by a warm sync. Once synced, tag release descriptions are therefore only answered for the tags listed by the
+    sync, and the gitlab api answers for the others.
+    """
+
+    def __init__(self, catalog_path, gitlab_endpoint, gitlab_token, project_id, sync=True, per_page=100):
+        """
+        :param str catalog_path: The SQLite catalog path, one per project
+        :param str gitlab_endpoint: The gitlab api endpoint
+        :param str gitlab_token: The gitlab api token
+        :param str project_id: The project identifier
+        :param bool sync: Whether the catalog must be synced before the first lookup
+        :param int per_page: The number of items requested per page
+        """
+        self.catalog_path = catalog_path
+        self.project_url = '{}/api/v4/projects/{}'.format(gitlab_endpoint, project_id)
+        self.gitlab_token = gitlab_token
+        self.per_page = per_page
+        self._synced = not sync
+        self._synced_tags = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """It closes the catalog"""
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+    def sync(self):
+        """It fetches what changed in the project since the last sync
+
+        :rtype: dict
+        :return: The number of new or updated items of each resource
+        :raise HTTPError: If there is an error in HTTP request
+        """
+        with self._lock:
+            self._synced = True
+            connection = self._connect()
+            counts = {'merge_requests': self._sync_merge_requests(connection),
+                      'commits': self._sync_commits(connection),
+                      'tags': self._sync_tags(connection)}
+        _log(type='debug', message='Catalog {} synced: {}'.format(self.catalog_path, counts))
+        return counts
+
+    def merge_request_description(self, commit_sha):
+        """
+        :param str commit_sha: The merge (or squash) commit SHA
+        :rtype: str
+        :return: The description of the merge request merged by the commit or None if it is not in the catalog
+        """
+        row = self._lookup('SELECT description FROM merge_requests WHERE merge_commit_sha = ? '
+                           'UNION ALL SELECT description FROM merge_requests WHERE squash_commit_sha = ? LIMIT 1',
+                           (commit_sha, commit_sha))
+        return (row[0] or '') if row else None
+
+    def commit_title(self, commit_sha):
+        """
+        :param str commit_sha: The commit SHA
+        :rtype: str
+        :return: The commit title or None if it is not in the catalog
+        """
+        row = self._lookup('SELECT title FROM commits WHERE sha = ?', (commit_sha,))
+        return row[0] if row else None
+
+    def tag_message(self, tag_name):
+        """
+        :param str tag_name: The tag name
+        :rtype: str
+        :return: The tag release description or None if it is not in the catalog or was not listed by the sync
+        """
+        row = self._lookup('SELECT release_description FROM tags WHERE name = ?', (tag_name,))
+        if self._synced_tags is not None and tag_name not in self._synced_tags:
+            return None
+        return row[0] if row else None
+
+    def open_merge_requests(self, source_branch):
+        """Open merge requests change too often to be cataloged
+
+        :param str source_branch: The source branch name
+        :rtype: None
+        :return: None
+        """
+        return None
+
+    def _connect(self):
+        if not self._connection:
+            self._connection = sqlite3.connect(self.catalog_path, check_same_thread=False)
+            self._connection.executescript(CATALOG_SCHEMA)
+        return self._connection
+
+    def _lookup(self, sql, parameters):
+        if not self._synced:
+            try:
+                self.sync()
+            except (HTTPError, OSError, EndpointUnavailable) as error:
+                _log(type='warning', message='Catalog sync failed ({}). Using the catalog as is'.format(error))
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchone()
+
+    def _cursor(self, connection, resource):
+        row = connection.execute('SELECT value FROM cursors WHERE resource = ?', (resource,)).fetchone()
+        return row[0] if row else None
+
+    def _sync_merge_requests(self, connection):
+        cursor = self._cursor(connection, 'merge_requests')
+        newest, page, count = cursor, 1, 0
+        while True:
+            query = {'state': 'merged', 'order_by': 'updated_at', 'sort': 'asc', 'per_page': self.per_page,
+                     'page': page}
+            if cursor:
+                query['updated_after'] = cursor
+            merge_requests = _request('{}/merge_requests?{}'.format(self.project_url, urlencode(query)),
+                                      gitlab_token=self.gitlab_token, method='GET')
+            with connection:
+                for merge_request in merge_requests:
+                    # the items updated at the cursor time are listed again by the next sync
+                    if connection.execute('SELECT 1 FROM merge_requests WHERE iid = ? AND updated_at = ?',
+                                          (merge_request['iid'], merge_request['updated_at'])).fetchone():
+                        continue
+                    connection.execute('INSERT OR REPLACE INTO merge_requests VALUES (?, ?, ?, ?, ?)',
+                                       (merge_request['iid'], merge_request.get('merge_commit_sha'),
+                                        merge_request.get('squash_commit_sha'), merge_request.get('description'),
+                                        merge_request['updated_at']))
+                    count += 1
+                if merge_requests:
+                    newest = max(newest or '', merge_requests[-1]['updated_at'])
+                    connection.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)', ('merge_requests', newest))
+            if len(merge_requests) < self.per_page:
+                return count
+            # the next page starts after the last seen item, unless a whole page shares the same timestamp
+            page, cursor = (page + 1, cursor) if newest == cursor else (1, newest)
+
+    def _sync_commits(self, connection):
+        cursor = self._cursor(connection, 'commits')
+        query = {'all': 'true'}
+        if cursor:
+            query['since'] = cursor
+        newest, count = cursor, 0
+        commits = _paginate('{}/repository/commits?{}'.format(self.project_url, urlencode(query)),
+                            gitlab_token=self.gitlab_token, per_page=self.per_page)
+        with connection:
+            for commit in commits:
+                newest = max(newest or '', commit['committed_date'])
+                if connection.execute('SELECT 1 FROM commits WHERE sha = ?', (commit['id'],)).fetchone():
+                    continue
+                connection.execute('INSERT INTO commits VALUES (?, ?, ?)',
+                                   (commit['id'], commit.get('title'), commit['committed_date']))
+                count += 1
+            if newest:
+                connection.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?)', ('commits', newest))
+        return count
+
+    def _sync_tags(self, connection):
+        count, names = 0, set()
+        tags = _paginate('{}/repository/tags?order_by=updated&sort=desc'.format(self.project_url),
+                         gitlab_token=self.gitlab_token, per_page=self.per_page)
+        with connection:
+            for page in iter(lambda: list(itertools.islice(tags, self.per_page)), []):
+                rows = [(tag['name'], (tag.get('commit') or {}).get('id'),
+                         (tag.get('release') or {}).get('description')) for tag in page]
+                known = sum(1 for row in rows
+                            if connection.execute('SELECT 1 FROM tags WHERE name = ? AND target IS ? AND '
+                                                  'release_description IS ?', row).fetchone())
+                connection.executemany('INSERT OR REPLACE INTO tags VALUES (?, ?, ?)', rows)
+                names.update(row[0] for row in rows)
+                count += len(rows) - known
+                if known == len(rows):
+                    break
+        self._synced_tags = names
+        return count
+
+
+def _wait_for_merge_request(merge_request_url, gitlab_token, etag, deadline):
+    delay = MERGE_POLL_INITIAL_DELAY
+    while True:
+        time.sleep(max(0, min(delay, deadline - time.monotonic())))
+        response_headers = {}
+        try:
+            merge_request = _request(merge_request_url, gitlab_token=gitlab_token, method='GET',
+                                     headers={'If-None-Match': etag} if etag else None,
+                                     response_headers=response_headers)
+        except HTTPError as error:
+            if error.code != 304:
+                raise error
+            merge_request = None
+        if merge_request is not None:
+            etag = response_headers.get('etag')
+            if merge_request.get('state') == 'merged':
+                return etag, True
+            if merge_request.get('state') == 'closed' or merge_request.get('has_conflicts'):
+                raise MergeError('Merge request {} cannot be merged. [State={}]'
+                                 .format(merge_request.get('iid'), merge_request.get('state')))
+            if merge_request.get('merge_status') not in ('checking', 'unchecked', 'cannot_be_merged_recheck'):
+                return etag, False
+        if time.monotonic() >= deadline:
+            return etag, False
+        # back off while nothing changes, the merge request checks can take several minutes
+        delay = MERGE_POLL_INITIAL_DELAY if merge_request is not None else min(delay * 2, MERGE_POLL_MAX_DELAY)
+
+
+def _command(command, exception=Exception, timeout=COMMAND_TIMEOUT, cwd=None):
+    return list(_stream_command(command, exception=exception, timeout=timeout, cwd=cwd))
+
+
+def _stream_command(command, exception=Exception, timeout=COMMAND_TIMEOUT, cwd=None):
+    if isinstance(command, str):
+        command = shlex.split(command)
+    timeout = _remaining(timeout)
     _log(type='debug', message='Running command {}'.format(command))
-    if type(command) == str:
-        process = subprocess.Popen(command.split(), stdout=subprocess.PIPE)
-    else:
-        process = subprocess.Popen(command, stdout=subprocess.PIPE)
-    return_code = process.wait()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd,
+                               start_new_session=True)
+    stderr = deque(maxlen=20)
+    drain = threading.Thread(target=_drain_stderr, args=(process.stderr, stderr, command), daemon=True)
+    drain.start()
+    with _kill_on_expiry(process, timeout) as timed_out:
+        try:
+            for line in process.stdout:
+                yield line
+            return_code = process.wait()
+        finally:
+            if process.poll() is None:
+                _kill_process_group(process)
+                process.wait()
+            drain.join()
+            process.stdout.close()
     if return_code != 0:
-        _log(type='error', message='Error occurred while executing command {}. [Code={}]'.format(command, return_code))
+        if timed_out.is_set():
+            _log(type='error', message='Command {} timed out after {:.1f} seconds'.format(command, timeout))
+            _remaining()
+        _log(type='error', message='Error occurred while executing command {}. [Code={}, Stderr={}]'
+                                   .format(command, return_code, b''.join(stderr).decode('utf-8', 'replace').strip()))
         raise exception(return_code)
-    return process.stdout.readlines()
 
 
-def _request(url, gitlab_token, method='GET', data=None):
-    request = Request(url, headers={'PRIVATE-TOKEN': gitlab_token, 'content-type': 'application/json'},
+def _command_succeeds(command, timeout=COMMAND_TIMEOUT, cwd=None):
+    timeout = _remaining(timeout)
+    try:
+        return subprocess.call(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               timeout=timeout) == 0
+    except subprocess.TimeoutExpired:
+        # the command was killed, report the run deadline if it is the cause
+        _remaining()
+        raise
+
+
+@contextlib.contextmanager
+def _kill_on_expiry(process, timeout):
+    expired = threading.Event()
+
+    def expire():
+        expired.set()
+        _kill_process_group(process)
+
+    timer = threading.Timer(timeout, expire) if timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+    try:
+        yield expired
+    finally:
+        if timer:
+            timer.cancel()
+
+
+def _drain_stderr(stream, lines, command):
+    for line in stream:
+        lines.append(line)
+        _log(type='debug', message='{}: {}'.format(command[0], line.decode('utf-8', 'replace').rstrip()))
+    stream.close()
+
+
+def _kill_process_group(process):
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _request(url, gitlab_token, method='GET', data=None, headers=None, response_headers=None, write=None):
+    primary_endpoint, read_endpoint = _TRANSPORT['primary_endpoint'], _TRANSPORT['read_endpoint']
+    # any method but GET writes, unless told otherwise (e.g. a GraphQL query is a read-only POST)
+    if write is None:
+        write = method != 'GET'
+    if write:
+        _TRANSPORT['written_at'] = time.monotonic()
+    elif method == 'GET' and read_endpoint and primary_endpoint and url.startswith(primary_endpoint + '/') and \
+            (_TRANSPORT['written_at'] is None or
+             time.monotonic() - _TRANSPORT['written_at'] >= _TRANSPORT['consistency_window']):
+        try:
+            return _send(read_endpoint + url[len(primary_endpoint):], gitlab_token, method, data, headers,
+                         response_headers, expected_codes=(304, 404))
+        except HTTPError as error:
+            if error.code != 404:
+                raise error
+            _log(type='debug', message='Resource not found on read endpoint. Falling back to primary endpoint')
+        except (OSError, EndpointUnavailable) as error:
+            _log(type='warning', message='Read endpoint unavailable ({}). Falling back to primary endpoint'
+                                         .format(error))
+    return _send(url, gitlab_token, method, data, headers, response_headers)
+
+
+def _send(url, gitlab_token, method='GET', data=None, headers=None, response_headers=None, expected_codes=(304,)):
+    endpoint = '/'.join(url.split('/', 3)[:3])
+    _check_circuit(endpoint)
+    try:
+        if method == 'GET' and _TRANSPORT['hedge_percentile']:
+            content = _hedged_attempt(url, gitlab_token, method, data, headers, response_headers, expected_codes)
+        else:
+            content = _attempt(url, gitlab_token, method, data, headers, response_headers, expected_codes)
+    except HTTPError as error:
+        _record_outcome(endpoint, failed=isinstance(error.code, int) and error.code >= 500)
+        raise error
+    except OSError:
+        _record_outcome(endpoint, failed=True)
+        raise
+    except BaseException:
+        # e.g. the run deadline
+        _record_outcome(endpoint, failed=None)
+        raise
+    _record_outcome(endpoint, failed=False)
+    return content
+
+
+def _hedged_attempt(url, gitlab_token, method, data, headers, response_headers, expected_codes):
+    outcomes = queue.Queue()
+
+    def attempt():
+        received_headers = {} if response_headers is not None else None
+        started = time.monotonic()
+        try:
+            content = _attempt(url, gitlab_token, method, data, headers, received_headers, expected_codes)
+            outcomes.put((None, content, received_headers, time.monotonic() - started))
+        except Exception as error:
+            outcomes.put((error, None, None, None))
+
+    threading.Thread(target=attempt, daemon=True).start()
+    delay = _hedge_delay()
+    try:
+        error, content, received_headers, latency = outcomes.get(timeout=delay)
+    except queue.Empty:
+        _log(type='debug', message='No response after {:.3f}s. Hedging request to {}'.format(delay, url))
+        threading.Thread(target=attempt, daemon=True).start()
+        error, content, received_headers, latency = outcomes.get()
+        if error is not None and not isinstance(error, HTTPError):
+            # a connection error or a timeout is not an answer, the other request may still get one
+            other = outcomes.get()
+            if other[0] is None:
+                error, content, received_headers, latency = other
+    if error is not None:
+        raise error
+    _LATENCIES.append(latency)
+    if response_headers is not None:
+        response_headers.update(received_headers)
+    return content
+
+
+def _hedge_delay():
+    latencies = sorted(_LATENCIES)
+    if len(latencies) < 20:
+        return _TRANSPORT['hedge_delay']
+    return latencies[min(len(latencies) - 1, int(len(latencies) * _TRANSPORT['hedge_percentile'] / 100))]
+
+
+def _check_circuit(endpoint):
+    with _CIRCUITS_LOCK:
+        circuit = _CIRCUITS.get(endpoint)
+        if circuit is None or circuit['opened_at'] is None:
+            return
+        if circuit['probing'] or time.monotonic() - circuit['opened_at'] < _TRANSPORT['recovery_time']:
+            raise EndpointUnavailable('Endpoint {} is down'.format(endpoint))
+        # let this request alone probe the endpoint, the others fail fast until its outcome is recorded
+        circuit['probing'] = True
+
+
+def _record_outcome(endpoint, failed):
+    with _CIRCUITS_LOCK:
+        circuit = _CIRCUITS.setdefault(endpoint, {'failures': 0, 'opened_at': None, 'probing': False})
+        if failed is None:
+            # the request ended without telling anything about the endpoint, another request will probe it
+            circuit['probing'] = False
+            return
+        if not failed:
+            circuit.update({'failures': 0, 'opened_at': None, 'probing': False})
+            return
+        circuit['failures'] += 1
+        if circuit['probing']:
+            circuit.update({'opened_at': time.monotonic(), 'probing': False})
+            _log(type='warning', message='Endpoint {} is still down. Failing fast for {}s'
+                                         .format(endpoint, _TRANSPORT['recovery_time']))
+        elif circuit['failures'] >= _TRANSPORT['failure_threshold'] and circuit['opened_at'] is None:
+            circuit['opened_at'] = time.monotonic()
+            _log(type='warning', message='Endpoint {} failed {} times in a row. Failing fast for {}s'
+                                         .format(endpoint, circuit['failures'], _TRANSPORT['recovery_time']))
+
+
+def _attempt(url, gitlab_token, method, data, headers, response_headers, expected_codes):
+    request_headers = {'PRIVATE-TOKEN': gitlab_token, 'content-type': 'application/json'}
+    request_headers.update(headers or {})
+    request = Request(url, headers=request_headers,
                       method=method, data=json.dumps(data).encode('utf-8') if data else None)
     context = ssl.create_default_context()
     context.check_hostname = False
     context.verify_mode = ssl.CERT_NONE
     _log(type='debug', message='Sending {} request to {}'.format(method, url))
     try:
-        response = urlopen(request, context=context).read().decode('utf-8')
+        response = urlopen(request, context=context, timeout=_remaining(_TRANSPORT['timeout']))
+        if response_headers is not None:
+            response_headers.update((key.lower(), value) for key, value in response.headers.items())
+        content = response.read().decode('utf-8')
         _log(type='debug', message='Response retrieved with success')
-        return json.loads(response)
+        return json.loads(content)
     except HTTPError as error:
+        if error.code in expected_codes:
+            _log(type='debug', message='Response retrieved with code {}'.format(error.code))
+            raise error
         _log(type='error', message='Error occurred while retrieving response. [Code={}, Message={}]'
                                    .format(error.code, error.msg))
         raise error
+    except OSError:
+        # the request may have been cut short by the run deadline
+        _remaining()
+        raise
+
+
+def _open_changelog(changelog_file_path, binary=False, chunk_size=io.DEFAULT_BUFFER_SIZE):
+    if changelog_file_path.endswith('.gz'):
+        file = io.BufferedReader(gzip.open(changelog_file_path, mode='rb'), buffer_size=chunk_size)
+        return file if binary else io.TextIOWrapper(file)
+    if binary:
+        return open(changelog_file_path, mode='rb', buffering=chunk_size)
+    return open(changelog_file_path, mode='r')
+
+
+@contextlib.contextmanager
+def _atomic_writer(file_path, compress=False):
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.NamedTemporaryFile(mode='wb', dir=directory, delete=False) as temporary_file:
+        try:
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temporary_file.name)
+            if compress:
+                with gzip.GzipFile(fileobj=temporary_file, mode='wb') as compressed_file:
+                    yield compressed_file
+            else:
+                yield temporary_file
+        except BaseException:
+            os.remove(temporary_file.name)
+            raise
+    os.replace(temporary_file.name, file_path)
+
+
+def _load_journal(journal_path, key):
+    if journal_path and os.path.exists(journal_path):
+        with open(journal_path, mode='r') as journal_file:
+            journal = json.load(journal_file)
+        if journal.get('key') == key:
+            _log(type='debug', message='Resuming {} from journal {}'.format(key, journal_path))
+            return journal
+    return {'key': key}
+
+
+def _save_journal(journal_path, journal):
+    if journal_path:
+        with _atomic_writer(journal_path) as journal_file:
+            journal_file.write(json.dumps(journal).encode('utf-8'))
+
+
+def _commit_exists(commit_sha, workspace=None):
+    if workspace and not os.path.isdir(workspace):
+        return False
+    return _command_succeeds(['git', 'cat-file', '-e', '{}^{{commit}}'.format(commit_sha)], cwd=workspace)
+
+
+def _head_changelog_commit(target_branch, file_paths, workspace=None):
+    # HEAD is the changelog commit when it has its message and already holds the changelog files as they are
+    head_sha, subject = [line.decode('utf-8').strip()
+                         for line in _command(['git', 'log', '-1', '--format=%H%n%s'], exception=CommitError,
+                                              cwd=workspace)][:2]
+    if subject != 'Update changelog ({})'.format(target_branch):
+        return None
+    file_paths = [os.path.relpath(file_path, workspace) if workspace else file_path for file_path in file_paths]
+    if not _command_succeeds(['git', 'diff', '--quiet', 'HEAD', '--'] + file_paths, cwd=workspace):
+        return None
+    return head_sha
+
+
+def _remote_tag_commit(tag_name, workspace=None):
+    ref = 'refs/tags/{}'.format(tag_name)
+    refs = {}
+    for line in _command(['git', 'ls-remote', '--tags', 'origin', ref, ref + '^{}'], exception=PushError,
+                         cwd=workspace):
+        sha, _, name = line.decode('utf-8').strip().partition('\t')
+        refs[name] = sha
+    # an annotated tag is listed with the commit it points to as '<ref>^{}'
+    return refs.get(ref + '^{}') or refs.get(ref)
+
+
+def _next_character(file):
+    character = file.read(1)
+    while character and character.isspace():
+        character = file.read(1)
+    return character
+
+
+def _copy_range(source, destination, start, end, chunk_size=io.DEFAULT_BUFFER_SIZE):
+    source.seek(start)
+    remaining = (end if end is not None else os.fstat(source.fileno()).st_size) - start
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        destination.write(chunk)
+        remaining -= len(chunk)
+
+
+def _version_major(version):
+    return int(version.split('.', 1)[0])
+
+
+def _open_changelog_store(store_path):
+    connection = sqlite3.connect(store_path)
+    connection.executescript(CHANGELOG_STORE_SCHEMA)
+    return connection
+
+
+def _insert_changelog_store_entry(connection, version, version_changes, date, moment, branch, commit_sha):
+    version_search = re.search(r'(\d+)\.(\d+)\.(\d+)(-rc\.(\d+))?', version, re.IGNORECASE)
+    if version_search is None:
+        raise InvalidVersion('Invalid version {}'.format(version))
+    major, minor, patch, _, rc = version_search.groups()
+    cursor = connection.execute('INSERT INTO versions (version, major, minor, patch, rc, date, released_at, branch, '
+                                'commit_sha) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                (version, int(major), int(minor), int(patch), int(rc) if rc else None, date,
+                                 moment.isoformat(), branch, commit_sha))
+    connection.executemany('INSERT INTO changes (version_id, position, description) VALUES (?, ?, ?)',
+                           [(cursor.lastrowid, position, change) for position, change in enumerate(version_changes)])
+
+
+def _open_search_index(index_path):
+    connection = sqlite3.connect(index_path)
+    connection.executescript(SEARCH_INDEX_SCHEMA)
+    return connection
+
+
+def _insert_search_entries(connection, version, version_changes, source):
+    version_search = re.search(r'(\d+)\.(\d+)\.(\d+)(-rc\.(\d+))?', version, re.IGNORECASE)
+    if version_search is None:
+        raise InvalidVersion('Invalid version {}'.format(version))
+    major, minor, patch, _, rc = version_search.groups()
+    for position, change in enumerate(version_changes):
+        cursor = connection.execute('INSERT OR IGNORE INTO entries (version, major, minor, patch, rc, position, '
+                                    'source, description) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (version, int(major), int(minor), int(patch), int(rc) if rc else None, position,
+                                     source, change))
+        if cursor.rowcount:
+            connection.executemany('INSERT OR IGNORE INTO postings (token, entry_id) VALUES (?, ?)',
+                                   [(token, cursor.lastrowid) for token in _search_tokens(change)])
+
+
+def _search_tokens(text):
+    tokens = set()
+    for token in SEARCH_TOKEN_PATTERN.findall(text.lower()):
+        tokens.add(token)
+        tokens.update(re.findall(r'\w+', token))
+    return tokens
+
+
+@contextlib.contextmanager
+def _stage(name):
+    if threading.current_thread() is not threading.main_thread():
+        with _profile_stage(name):
+            yield
+        return
+    started = time.monotonic()
+    _DEADLINE['stack'].append((name, started))
+    try:
+        with _profile_stage(name):
+            yield
+    finally:
+        _DEADLINE['stack'].pop()
+        _DEADLINE['stages'].append((name, time.monotonic() - started))
+
+
+def _remaining(timeout=None):
+    if _DEADLINE['expires_at'] is None:
+        return timeout
+    remaining = _DEADLINE['expires_at'] - time.monotonic()
+    if remaining <= 0:
+        now = time.monotonic()
+        running = ' > '.join('{} ({:.1f}s)'.format(name, now - started) for name, started in _DEADLINE['stack'])
+        completed = ', '.join('{} {:.1f}s'.format(name, elapsed) for name, elapsed in _DEADLINE['stages'])
+        message = 'Deadline of {}s exceeded during {}. Completed stages: {}'.format(
+            _DEADLINE['budget'], running or 'no stage', completed or 'none')
+        _log(type='error', message=message)
+        raise DeadlineExceeded(message)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+@contextlib.contextmanager
+def _profile_stage(name):
+    mode = _PROFILE['mode']
+    if not mode or threading.current_thread() is not threading.main_thread() \
+            or random.random() >= _PROFILE['sample_rate']:
+        yield
+        return
+    stack = _PROFILE['stack']
+    parent = stack[-1] if stack else None
+    profiler, snapshot, started_tracing = None, None, False
+    if mode in ('cpu', 'all'):
+        # a single profiler can be active per thread, the parent is paused and gets our stats when it ends
+        if parent and parent['profiler']:
+            parent['profiler'].disable()
+        profiler = cProfile.Profile()
+    if mode in ('mem', 'all'):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(10)
+        snapshot = tracemalloc.take_snapshot()
+    stage = {'profiler': profiler, 'children': []}
+    stack.append(stage)
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        stack.pop()
+        _PROFILE['count'] += 1
+        file_path = os.path.join(_PROFILE['directory'], '{:02d}-{}'.format(_PROFILE['count'], name))
+        os.makedirs(_PROFILE['directory'], exist_ok=True)
+        if profiler:
+            try:
+                stats = pstats.Stats(profiler)
+                for child in stage['children']:
+                    stats.add(child)
+                stats.dump_stats('{}.pstats'.format(file_path))
+            except TypeError:
+                _log(type='warning', message='No profile data collected for stage {}'.format(name))
+            if parent and parent['profiler']:
+                parent['children'].extend([profiler] + stage['children'])
+                parent['profiler'].enable()
+        if snapshot:
+            statistics = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')[:_PROFILE['top']]
+            with open('{}.mem.txt'.format(file_path), mode='w') as file:
+                file.write('Peak traced memory: {} bytes\n'.format(tracemalloc.get_traced_memory()[1]))
+                file.writelines('{}\n'.format(statistic) for statistic in statistics)
+            if started_tracing:
+                tracemalloc.stop()
+        _log(type='debug', message='Stage {} profiled into {}'.format(name, file_path))
+
+
+def _open_data_source(args):
+    if args.get('data_source') == 'local':
+        return LocalGitRepository(args.get('repository') or '.')
+    if args.get('data_source') == 'catalog':
+        return GitlabCatalog(args['catalog_path'], args['gitlab_endpoint'], args['gitlab_token'], args['project_id'])
+    if args.get('data_source') == 'graphql':
+        return GitlabGraphQL(args['gitlab_endpoint'], args['gitlab_token'], args['project_id'],
+                             commit_shas=[args.get('commit_sha')], tag_names=[args.get('tag_name')],
+                             source_branch=args.get('source_branch'), graphql_endpoint=args.get('graphql_endpoint'))
+    return _no_data_source()
+
+
+@contextlib.contextmanager
+def _no_data_source():
+    yield None
+
+
+def _resolve_target_branches(gitlab_endpoint, gitlab_token, project_id, source_branch, target_branches):
+    branches = []
+    for target_branch in target_branches:
+        if not any(character in target_branch for character in '*?['):
+            branches.append(target_branch)
+            continue
+        prefix = re.split(r'[*?\[]', target_branch, maxsplit=1)[0]
+        url = '{}/api/v4/projects/{}/repository/branches'.format(gitlab_endpoint, project_id)
+        if prefix:
+            url += '?' + urlencode({'search': '^' + prefix})
+        matched = [branch['name'] for branch in _paginate(url, gitlab_token=gitlab_token)
+                   if fnmatch.fnmatchcase(branch['name'], target_branch)]
+        if not matched:
+            _log(type='warning', message='No branch matches target branch {}'.format(target_branch))
+        branches += matched
+    return [branch for index, branch in enumerate(branches)
+            if branch != source_branch and branch not in branches[:index]]
+
+
+def _open_hook_queue(queue_path):
+    connection = sqlite3.connect(queue_path, timeout=30, isolation_level=None)
+    connection.executescript(HOOK_QUEUE_SCHEMA)
+    return connection
+
+
+def _post_hook(url, payload, timeout):
+    request = Request(url, headers={'content-type': 'application/json'}, method='POST', data=payload.encode('utf-8'))
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+    except (OSError, ValueError) as error:
+        return error
+    return None
+
+
+def _spawn_hook_delivery(queue_path):
+    # the delivery must outlive the release job process, so it runs in its own session
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), 'deliver_hooks', '--queue', queue_path],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+
+
+def _rate_limiter(rate):
+    lock = threading.Lock()
+    next_slot = [time.monotonic()]
+
+    def throttle():
+        if not rate:
+            return
+        with lock:
+            now = time.monotonic()
+            delay = next_slot[0] - now
+            next_slot[0] = max(now, next_slot[0]) + 1.0 / rate
+        if delay > 0:
+            time.sleep(delay)
+
+    return throttle
+
+
+def _paginate(url, gitlab_token, per_page=100):
+    page = 1
+    while True:
+        items = _request('{}{}{}'.format(url, '&' if '?' in url else '?',
+                                         urlencode({'per_page': per_page, 'page': page})),
+                         gitlab_token=gitlab_token, method='GET')
+        for item in items:
+            yield item
+        if len(items) < per_page:
+            return
+        page += 1
+
+
+def _output_argument(value):
+    output_format, separator, file_path = value.partition('=')
+    if not separator or output_format not in OUTPUT_FORMATS:
+        raise argparse.ArgumentTypeError('Output must be FORMAT=PATH with FORMAT in {}'
+                                         .format(', '.join(OUTPUT_FORMATS)))
+    return output_format, file_path
 
 
 def _log(type, message):
@@ -382,12 +2759,35 @@ def _log(type, message):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate changelog for a given commit')
+    parser.add_argument('--profile', dest='profile', choices=['cpu', 'mem', 'all'],
+                        help='Profile the command and each of its stages', required=False)
+    parser.add_argument('--profile-dir', dest='profile_dir', type=str,
+                        help='The directory the profiling reports are written to', default='profile')
+    parser.add_argument('--profile-sample-rate', dest='profile_sample_rate', type=float,
+                        help='The fraction of stages that are profiled', default=1.0)
+    parser.add_argument('--deadline', dest='deadline', type=float,
+                        help='The number of seconds the whole run may take', required=False)
+    parser.add_argument('--request-timeout', dest='request_timeout', type=float,
+                        help='The number of seconds each gitlab api request waits for a response', default=30)
+    parser.add_argument('--hedge-percentile', dest='hedge_percentile', type=float,
+                        help='Send a second GET request when no response arrived after this latency percentile '
+                             '(e.g. 95)', required=False)
+    parser.add_argument('--hedge-delay', dest='hedge_delay', type=float,
+                        help='The number of seconds before hedging until enough latencies are known', default=1.0)
+    parser.add_argument('--circuit-threshold', dest='circuit_threshold', type=int,
+                        help='The number of consecutive failures after which an endpoint is considered down',
+                        default=3)
+    parser.add_argument('--circuit-recovery', dest='circuit_recovery', type=float,
+                        help='The number of seconds requests to a down endpoint fail fast', default=30)
     subparsers = parser.add_subparsers(dest='command')
 
     publish_version_parser = subparsers.add_parser('publish_version', help='publish_version help')
 
     publish_version_parser.add_argument('-ge', '--gitlab_endpoint', dest='gitlab_endpoint', type=str,
                                         help='The gitlab api endpoint', required=True)
+    publish_version_parser.add_argument('-gr', '--gitlab_read_endpoint', dest='gitlab_read_endpoint', type=str,
+                                        help='The read-only gitlab api endpoint (e.g. a Geo secondary)',
+                                        required=False)
     publish_version_parser.add_argument('-gt', '--gitlab_token', dest='gitlab_token', type=str,
                                         help='The gitlab public access token', required=True)
     publish_version_parser.add_argument('-proj', '--project_id', dest='project_id', type=str,
@@ -398,23 +2798,209 @@ if __name__ == '__main__':
                                         help='The commit target branch', required=True)
     publish_version_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
                                         help='The changelog file path', default='CHANGELOG.md')
+    publish_version_parser.add_argument('-o', '--output', dest='outputs', type=_output_argument, action='append',
+                                        help='An additional changelog output as FORMAT=PATH (e.g. json=CHANGELOG.json)')
+    publish_version_parser.add_argument('-db', '--store', dest='store_path', type=str,
+                                        help='The SQLite changelog store path', required=False)
+    publish_version_parser.add_argument('--keep-versions', dest='keep_versions', type=int,
+                                        help='The number of versions to keep in the changelog file', required=False)
+    publish_version_parser.add_argument('--keep-major', dest='keep_major', action='store_true',
+                                        help='Keep every version of the current major in the changelog file')
+    publish_version_parser.add_argument('--archive-gzip', dest='archive_compress', action='store_true',
+                                        help='Gzip the changelog archive segments')
+
+    publish_version_parser.add_argument('--search-index', dest='index_path', type=str,
+                                        help='The changelog search index path to update', required=False)
+    publish_version_parser.add_argument('--atomic-push', dest='atomic_push', action='store_true',
+                                        help='Create the tag locally and push it with the branch atomically')
+    publish_version_parser.add_argument('--hook', dest='hook_urls', type=str, action='append',
+                                        help='A url the release event is posted to, off the release path',
+                                        required=False)
+    publish_version_parser.add_argument('--hook-queue', dest='hook_queue_path', type=str,
+                                        help='The SQLite hook queue path', default='.release-hooks.db')
+    publish_version_parser.add_argument('--fragments', dest='fragments_dir', type=str,
+                                        help='The changelog fragments directory (e.g. changelog.d)', required=False)
+    publish_version_parser.add_argument('--workspace', dest='workspace', type=str,
+                                        help='Commit the changelog in a sparse, blob-less clone managed in this '
+                                             'directory', required=False)
+    publish_version_parser.add_argument('--remote-url', dest='remote_url', type=str,
+                                        help='The repository url cloned in the workspace (default: origin)',
+                                        required=False)
+    publish_version_parser.add_argument('-j', '--journal', dest='journal_path', type=str,
+                                        help='The step journal path used to resume an interrupted publish',
+                                        required=False)
+    publish_version_parser.add_argument('-m', '--manifest', dest='manifest_file_path', type=str,
+                                        help='The monorepo component manifest path', required=False)
+    publish_version_parser.add_argument('-w', '--max-workers', dest='max_workers', type=int,
+                                        help='The maximum number of components handled at the same time', default=8)
+    publish_version_parser.add_argument('--data-source', dest='data_source',
+                                        choices=['api', 'local', 'graphql', 'catalog'],
+                                        help='Where merge request descriptions and commit titles are read from first',
+                                        default='api')
+    publish_version_parser.add_argument('--repository', dest='repository', type=str,
+                                        help='The local repository path used by the local data source', default='.')
+    publish_version_parser.add_argument('--graphql-endpoint', dest='graphql_endpoint', type=str,
+                                        help='The GraphQL endpoint used by the graphql data source', required=False)
+    publish_version_parser.add_argument('--catalog', dest='catalog_path', type=str,
+                                        help='The SQLite catalog used by the catalog data source',
+                                        default='gitlab-catalog.db')
 
     create_auto_mr_parser = subparsers.add_parser('create_mr', help='create_mr help')
 
     create_auto_mr_parser.add_argument('-ge', '--gitlab_endpoint', dest='gitlab_endpoint', type=str,
                                        help='The gitlab api endpoint', required=True)
+    create_auto_mr_parser.add_argument('-gr', '--gitlab_read_endpoint', dest='gitlab_read_endpoint', type=str,
+                                       help='The read-only gitlab api endpoint (e.g. a Geo secondary)',
+                                       required=False)
     create_auto_mr_parser.add_argument('-gt', '--gitlab_token', dest='gitlab_token', type=str,
                                        help='The gitlab public access token', required=True)
     create_auto_mr_parser.add_argument('-proj', '--project_id', dest='project_id', type=str,
                                        help='The gitlab project identifier', required=True)
     create_auto_mr_parser.add_argument('-s', '--source_branch', dest='source_branch', type=str,
                                        help='The merge request source branch', required=True)
-    create_auto_mr_parser.add_argument('-t', '--target_branch', dest='target_branch', type=str,
-                                       help='The merge request target branch', required=True)
+    create_auto_mr_parser.add_argument('-t', '--target_branch', dest='target_branch', type=str, nargs='+',
+                                       help='The merge request target branches or glob patterns (e.g. release/*)',
+                                       required=True)
     create_auto_mr_parser.add_argument('-u', '--users', dest='users', nargs='*',
                                        help='The name of each user that needs to verify the merge request',
                                        required=False)
     create_auto_mr_parser.add_argument('-tag', dest='tag_name', type=str,
                                        help='The tag name', required=True)
-
-    main(vars(parser.parse_args()))
+    create_auto_mr_parser.add_argument('-w', '--max-workers', dest='max_workers', type=int,
+                                       help='The maximum number of target branches handled at the same time',
+                                       default=4)
+    create_auto_mr_parser.add_argument('--merge-timeout', dest='merge_timeout', type=int,
+                                       help='The maximum number of seconds to wait for a merge request to become '
+                                            'mergeable', default=600)
+    create_auto_mr_parser.add_argument('--data-source', dest='data_source',
+                                       choices=['api', 'local', 'graphql', 'catalog'],
+                                       help='Where tag release descriptions and open merge requests are read from '
+                                            'first', default='api')
+    create_auto_mr_parser.add_argument('--repository', dest='repository', type=str,
+                                       help='The local repository path used by the local data source', default='.')
+    create_auto_mr_parser.add_argument('--graphql-endpoint', dest='graphql_endpoint', type=str,
+                                       help='The GraphQL endpoint used by the graphql data source', required=False)
+    create_auto_mr_parser.add_argument('--catalog', dest='catalog_path', type=str,
+                                       help='The SQLite catalog used by the catalog data source',
+                                       default='gitlab-catalog.db')
+
+    deliver_hooks_parser = subparsers.add_parser('deliver_hooks', help='deliver_hooks help')
+
+    deliver_hooks_parser.add_argument('-q', '--queue', dest='hook_queue_path', type=str,
+                                      help='The SQLite hook queue path', default='.release-hooks.db')
+    deliver_hooks_parser.add_argument('-w', '--max-workers', dest='max_workers', type=int,
+                                      help='The maximum number of events posted at the same time', default=4)
+    deliver_hooks_parser.add_argument('--max-attempts', dest='max_attempts', type=int,
+                                      help='The maximum number of attempts of each event', default=8)
+    deliver_hooks_parser.add_argument('--no-wait', dest='no_wait', action='store_true',
+                                      help='Only post the events due now, without waiting for retries')
+
+    republish_parser = subparsers.add_parser('republish', help='republish help')
+
+    republish_parser.add_argument('-ge', '--gitlab_endpoint', dest='gitlab_endpoint', type=str,
+                                  help='The gitlab api endpoint', required=True)
+    republish_parser.add_argument('-gr', '--gitlab_read_endpoint', dest='gitlab_read_endpoint', type=str,
+                                  help='The read-only gitlab api endpoint (e.g. a Geo secondary)', required=False)
+    republish_parser.add_argument('-gt', '--gitlab_token', dest='gitlab_token', type=str,
+                                  help='The gitlab public access token', required=True)
+    republish_parser.add_argument('-proj', '--project_id', dest='project_id', type=str,
+                                  help='The gitlab project identifier', required=True)
+    republish_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
+                                  help='The changelog file the descriptions are rendered from (default: the current '
+                                       'descriptions)', required=False)
+    republish_parser.add_argument('-tag', '--tags', dest='tag_patterns', nargs='+',
+                                  help='The tag names or glob patterns to republish (e.g. 1.*)', required=False)
+    republish_parser.add_argument('-w', '--max-workers', dest='max_workers', type=int,
+                                  help='The maximum number of releases updated at the same time', default=8)
+    republish_parser.add_argument('--rate-limit', dest='rate_limit', type=float,
+                                  help='The maximum number of update requests per second', default=10)
+    republish_parser.add_argument('--dry-run', dest='dry_run', action='store_true',
+                                  help='Only print the tags whose release description would change')
+
+    rotate_parser = subparsers.add_parser('rotate', help='rotate help')
+
+    rotate_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
+                               help='The changelog file path', default='CHANGELOG.md')
+    rotate_parser.add_argument('--keep-versions', dest='keep_versions', type=int,
+                               help='The number of versions to keep in the changelog file', required=False)
+    rotate_parser.add_argument('--keep-major', dest='keep_major', action='store_true',
+                               help='Keep every version of the current major in the changelog file')
+    rotate_parser.add_argument('--archive-dir', dest='archive_dir', type=str,
+                               help='The archive directory', required=False)
+    rotate_parser.add_argument('--archive-gzip', dest='archive_compress', action='store_true',
+                               help='Gzip the changelog archive segments')
+    rotate_parser.add_argument('--collapse-rc', dest='collapse_rc', action='store_true',
+                               help='Collapse the rc entries shipped by the newest final release into it')
+
+    export_parser = subparsers.add_parser('export', help='export help')
+
+    export_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
+                               help='The changelog file path', default='CHANGELOG.md')
+    export_parser.add_argument('--format', dest='output_format', type=str, choices=OUTPUT_FORMATS,
+                               help='The output format', default='json')
+    export_parser.add_argument('-n', '--limit', dest='limit', type=int,
+                               help='The maximum number of entries to export', required=False)
+
+    validate_parser = subparsers.add_parser('validate', help='validate help')
+
+    validate_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
+                                 help='The changelog file path', default='CHANGELOG.md')
+
+    query_parser = subparsers.add_parser('query', help='query help')
+
+    query_parser.add_argument('-db', '--store', dest='store_path', type=str,
+                              help='The SQLite changelog store path', required=True)
+    query_parser.add_argument('-v', '--version', dest='version', type=str,
+                              help='The version prefix (e.g. 3.x or 3.1)', required=False)
+    query_parser.add_argument('-b', '--branch', dest='branch', type=str,
+                              help='The branch name', required=False)
+    query_parser.add_argument('--since', dest='since', type=str,
+                              help='The earliest release date (ISO format)', required=False)
+    query_parser.add_argument('--until', dest='until', type=str,
+                              help='The latest release date (ISO format)', required=False)
+    query_parser.add_argument('--latest-rc', dest='latest_rc', action='store_true',
+                              help='Only the latest rc version of each branch')
+
+    index_parser = subparsers.add_parser('index', help='index help')
+
+    index_parser.add_argument('-i', '--index', dest='index_path', type=str,
+                              help='The changelog search index path', default='changelog-index.db')
+    index_parser.add_argument('-f', '--changelog_file', dest='changelog_file_path', type=str,
+                              help='The changelog file path', default='CHANGELOG.md')
+    index_parser.add_argument('-ge', '--gitlab_endpoint', dest='gitlab_endpoint', type=str,
+                              help='The gitlab api endpoint, to index tag release descriptions', required=False)
+    index_parser.add_argument('-gr', '--gitlab_read_endpoint', dest='gitlab_read_endpoint', type=str,
+                              help='The read-only gitlab api endpoint (e.g. a Geo secondary)',
+                              required=False)
+    index_parser.add_argument('-gt', '--gitlab_token', dest='gitlab_token', type=str,
+                              help='The gitlab public access token', required=False)
+    index_parser.add_argument('-proj', '--project_id', dest='project_id', type=str,
+                              help='The gitlab project identifier', required=False)
+
+    sync_parser = subparsers.add_parser('sync', help='sync help')
+
+    sync_parser.add_argument('-ge', '--gitlab_endpoint', dest='gitlab_endpoint', type=str,
+                             help='The gitlab api endpoint', required=True)
+    sync_parser.add_argument('-gr', '--gitlab_read_endpoint', dest='gitlab_read_endpoint', type=str,
+                             help='The read-only gitlab api endpoint (e.g. a Geo secondary)', required=False)
+    sync_parser.add_argument('-gt', '--gitlab_token', dest='gitlab_token', type=str,
+                             help='The gitlab public access token', required=True)
+    sync_parser.add_argument('-proj', '--project_id', dest='project_id', type=str,
+                             help='The gitlab project identifier', required=True)
+    sync_parser.add_argument('--catalog', dest='catalog_path', type=str,
+                             help='The SQLite catalog path', default='gitlab-catalog.db')
+
+    search_parser = subparsers.add_parser('search', help='search help')
+
+    search_parser.add_argument('query', nargs='+',
+                               help='The terms to search, a trailing * makes a term a prefix (e.g. PROJ-12*)')
+    search_parser.add_argument('-i', '--index', dest='index_path', type=str,
+                               help='The changelog search index path', default='changelog-index.db')
+    search_parser.add_argument('-l', '--limit', dest='limit', type=int,
+                               help='The maximum number of changes to return', default=20)
+
+    arguments = parser.parse_args()
+    if arguments.command == 'index' and arguments.project_id and \
+            not (arguments.gitlab_endpoint and arguments.gitlab_token):
+        index_parser.error('-ge/--gitlab_endpoint and -gt/--gitlab_token are required with -proj/--project_id')
+    main(vars(arguments))
@@ -0,0 +1,222 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""Microbenchmarks for the pure functions of ci_helper
+
+Every benchmark runs a function over deterministic synthetic inputs of growing size, and records its throughput
+(operations per second), its peak memory allocation (tracemalloc) and its scaling exponent (the slope of time per
+operation against input size on a log-log scale, where 1 is linear).
+"""
+
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from unittest import mock
+
+import ci_helper
+
+WORDS = ['fix', 'add', 'remove', 'update', 'refactor', 'changelog', 'version', 'merge', 'request', 'pipeline',
+         'branch', 'tag', 'release', 'api', 'endpoint', 'timeout', 'retry', 'cache', 'parser', 'template']
+
+SUPER_LINEAR_EXPONENT = 1.3
+
+
+def generate_merge_request_description(lines, seed=0):
+    """It generates a merge request description with changes, separators and a reviewer checklist
+
+    :param int lines: The number of lines
+    :param int seed: The random seed
+    :rtype: str
+    :return: The description
+    """
+    generator = random.Random(seed)
+    items = []
+    for index in range(lines):
+        kind = generator.random()
+        if kind < 0.1:
+            items.append('- [{}] @user.{}-{}'.format(generator.choice([' ', 'x', 'X']), index % 97, index % 13))
+        elif kind < 0.15:
+            items.append(generator.choice(['- - -', '* * *', '', '   ']))
+        else:
+            items.append('{} {}'.format(generator.choice(['-', '*', '- *', '']),
+                                        ' '.join(generator.choice(WORDS) for _ in range(generator.randint(2, 12)))))
+    return '\n'.join(items)
+
+
+def generate_changelog(file_path, entries, seed=0):
+    """It writes a changelog with the given number of entries, in the generate_changelog format
+
+    :param str file_path: The changelog file path
+    :param int entries: The number of entries
+    :param int seed: The random seed
+    """
+    generator = random.Random(seed)
+    with open(file_path, mode='w') as file:
+        for index in range(entries, 0, -1):
+            changes = ['{} #{}'.format(' '.join(generator.choice(WORDS) for _ in range(generator.randint(2, 8))),
+                                       generator.randint(1, 99999)) for _ in range(generator.randint(1, 4))]
+            version = '{}.{}.{}{}'.format(index // 10000, index // 100 % 100, index % 100,
+                                          '-rc.{}'.format(index % 7) if index % 3 else '')
+            file.write(ci_helper.render_changelog_entry(version, changes, 'Wed, Feb 15 2017 13:05:12  '))
+
+
+def generate_rc_version(digits):
+    """It generates an rc version whose rc number has the given number of digits
+
+    :param int digits: The number of digits of the rc number
+    :rtype: str
+    :return: The version
+    """
+    return '1.2.3-rc.{}'.format('9' * digits)
+
+
+def measure(function, minimum_time=0.2, maximum_runs=10000):
+    """It measures the throughput and the peak memory allocation of a function
+
+    :param callable function: The function, called without arguments
+    :param float minimum_time: The minimum total time spent running the function
+    :param int maximum_runs: The maximum number of runs
+    :rtype: dict
+    :return: The operations per second and the peak allocated bytes
+    """
+    tracemalloc.start()
+    try:
+        function()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    runs, elapsed = 0, 0.0
+    while elapsed < minimum_time and runs < maximum_runs:
+        start = time.perf_counter()
+        function()
+        elapsed += time.perf_counter() - start
+        runs += 1
+    return {'ops_per_sec': runs / elapsed if elapsed else float('inf'), 'peak_bytes': peak_bytes}
+
+
+def scaling_exponent(sizes, ops_per_sec):
+    """It fits time per operation against size on a log-log scale
+
+    :param list sizes: The input sizes
+    :param list ops_per_sec: The operations per second of each size
+    :rtype: float
+    :return: The slope (0 is constant, 1 is linear, 2 is quadratic)
+    """
+    points = [(math.log(size), math.log(1.0 / ops)) for size, ops in zip(sizes, ops_per_sec) if size > 0 and ops > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance if variance else 0.0
+
+
+def bench_clean_content(size, directory):
+    description = generate_merge_request_description(size)
+    return lambda: ci_helper.clean_content(description)
+
+
+def bench_generate_version(size, directory):
+    version = generate_rc_version(size)
+    return lambda: ci_helper.generate_version(version, 'rc')
+
+
+def bench_get_current_version(size, directory):
+    file_path = os.path.join(directory, 'get_current_version-{}.md'.format(size))
+    generate_changelog(file_path, size)
+    return lambda: ci_helper.get_current_version(file_path)
+
+
+def bench_parse_changelog(size, directory):
+    file_path = os.path.join(directory, 'parse_changelog-{}.md'.format(size))
+    generate_changelog(file_path, size)
+    return lambda: sum(1 for _ in ci_helper.parse_changelog(file_path))
+
+
+def bench_generate_changelog(size, directory):
+    file_path = os.path.join(directory, 'generate_changelog-{}.md'.format(size))
+    generate_changelog(file_path, size)
+    with open(file_path, mode='r') as file:
+        content = file.read()
+
+    def run():
+        with mock.patch('ci_helper._log'):
+            ci_helper.generate_changelog('9.9.9', ['change'], file_path)
+        # restore the original changelog so every run sees the same size
+        with open(file_path, mode='w') as file:
+            file.write(content)
+    return run
+
+
+def bench_search_changelog(size, directory):
+    file_path = os.path.join(directory, 'search_changelog-{}.md'.format(size))
+    index_path = os.path.join(directory, 'search_changelog-{}.db'.format(size))
+    generate_changelog(file_path, size)
+    with mock.patch('ci_helper._log'):
+        ci_helper.build_search_index(index_path, file_path)
+    return lambda: ci_helper.search_changelog(index_path, 'fix #42*')
+
+
+BENCHMARKS = [
+    # name, setup, sizes, quick sizes
+    ('clean_content', bench_clean_content, [10, 1000, 100000], [10, 1000, 10000]),
+    ('generate_version', bench_generate_version, [1, 100, 4000], [1, 100, 1000]),
+    ('get_current_version', bench_get_current_version, [10, 10000, 1000000], [10, 1000, 10000]),
+    ('parse_changelog', bench_parse_changelog, [10, 10000, 1000000], [10, 1000, 10000]),
+    ('generate_changelog', bench_generate_changelog, [10, 10000, 1000000], [10, 1000, 10000]),
+    ('search_changelog', bench_search_changelog, [10, 1000, 100000], [10, 1000, 10000]),
+]
+
+
+def run(quick=False, names=None, minimum_time=0.2):
+    """It runs the benchmarks
+
+    :param bool quick: Whether the smaller quick sizes must be used
+    :param list names: The names of the benchmarks to run. Defaults to all
+    :param float minimum_time: The minimum time spent measuring each size
+    :rtype: dict
+    :return: For each benchmark, its measurements by size and its scaling exponent
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, mock.patch('ci_helper.datetime') as mock_datetime:
+        mock_datetime.now = mock.Mock(return_value=datetime(2017, 2, 15, 13, 5, 12))
+        mock_datetime.strftime = datetime.strftime
+        for name, setup, sizes, quick_sizes in BENCHMARKS:
+            if names and name not in names:
+                continue
+            sizes = quick_sizes if quick else sizes
+            measurements = {str(size): measure(setup(size, directory), minimum_time=minimum_time) for size in sizes}
+            results[name] = {'sizes': measurements,
+                             'exponent': scaling_exponent(sizes, [measurements[str(size)]['ops_per_sec']
+                                                                  for size in sizes])}
+    return results
+
+
+def compare(results, baseline, tolerance=0.5):
+    """It flags super-linear benchmarks and regressions against a baseline
+
+    :param dict results: The benchmark results
+    :param dict baseline: The baseline results
+    :param float tolerance: The accepted relative slowdown (or allocation growth) against the baseline
+    :rtype: list
+    :return: A list of problem descriptions
+    """
+    problems = []
+    for name, result in sorted(results.items()):
+        if result['exponent'] > SUPER_LINEAR_EXPONENT:
+            problems.append('{} scales super-linearly (exponent {:.2f})'.format(name, result['exponent']))
+        for size, measurement in sorted(result['sizes'].items(), key=lambda item: int(item[0])):
+            reference = baseline.get(name, {}).get('sizes', {}).get(size)
+            if not reference:
+                continue
+            if measurement['ops_per_sec'] < reference['ops_per_sec'] * (1 - tolerance):
+                problems.append('{}[{}] is slower: {:.1f} ops/s against {:.1f} ops/s'
+                                .format(name, size, measurement['ops_per_sec'], reference['ops_per_sec']))
+            if measurement['peak_bytes'] > reference['peak_bytes'] * (1 + tolerance) + 4096:
+                problems.append('{}[{}] allocates more: {} bytes against {} bytes'
+                                .format(name, size, measurement['peak_bytes'], reference['peak_bytes']))
+    return problems
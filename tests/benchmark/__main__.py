@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import sys
+
+from tests.benchmark import compare, run
+
+BASELINE_FILE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def main(args):
+    """Main function"""
+    results = run(quick=args['quick'], names=args['names'], minimum_time=args['minimum_time'])
+    for name, result in sorted(results.items()):
+        print('{} (exponent {:.2f})'.format(name, result['exponent']))
+        for size, measurement in sorted(result['sizes'].items(), key=lambda item: int(item[0])):
+            print('  {:>10} {:>14.1f} ops/s {:>14} bytes peak'
+                  .format(size, measurement['ops_per_sec'], measurement['peak_bytes']))
+    if args['update_baseline']:
+        with open(args['baseline'], mode='w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write('\n')
+        return 0
+    baseline = {}
+    if os.path.exists(args['baseline']):
+        with open(args['baseline'], mode='r') as file:
+            baseline = json.load(file)
+    problems = compare(results, baseline, tolerance=args['tolerance'])
+    for problem in problems:
+        print('[error] {}'.format(problem))
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the ci_helper microbenchmarks')
+    parser.add_argument('--quick', dest='quick', action='store_true', help='Use smaller input sizes')
+    parser.add_argument('-b', '--benchmark', dest='names', action='append', help='The benchmark to run')
+    parser.add_argument('--minimum-time', dest='minimum_time', type=float, default=0.2,
+                        help='The minimum time spent measuring each size, in seconds')
+    parser.add_argument('--baseline', dest='baseline', type=str, default=BASELINE_FILE_PATH,
+                        help='The baseline file path')
+    parser.add_argument('--tolerance', dest='tolerance', type=float, default=0.5,
+                        help='The accepted relative slowdown against the baseline')
+    parser.add_argument('--update-baseline', dest='update_baseline', action='store_true',
+                        help='Write the results as the new baseline')
+    sys.exit(main(vars(parser.parse_args())))
@@ -0,0 +1,596 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""A local stand-in for the gitlab api endpoints used by ci_helper
+
+The server keeps seeded projects (merge requests, commits, tags, releases and branches) in memory and answers the
+REST endpoints and the GraphQL queries of ci_helper over real HTTP, with gitlab pagination, ETags and conditional
+requests (304), configurable latency and error injection (e.g. 429, 500, slow responses), and a log of every request.
+It only needs the standard library, so integration, performance and load tests can run offline:
+
+    with FakeGitlab() as gitlab:
+        gitlab.seed('1', merge_requests=500, tags=200)
+        gitlab.inject('GET', r'/repository/tags', status=500, times=1)
+        ci_helper.search_changelog(...)  # against gitlab.url
+
+It can also be started on its own, e.g. as the backend of a load test:
+
+    python -m tests.fake_gitlab --port 8080 --merge-requests 100000 --tags 5000
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import socketserver
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+FakeRequest = namedtuple('FakeRequest', ['method', 'path', 'query', 'headers', 'body', 'status', 'duration'])
+
+EPOCH = datetime(2017, 1, 1)
+
+WORDS = ['fix', 'add', 'remove', 'update', 'refactor', 'changelog', 'version', 'merge', 'request', 'pipeline',
+         'branch', 'tag', 'release', 'api', 'endpoint', 'timeout', 'retry', 'cache', 'parser', 'template']
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class FakeGitlab(object):
+    """In-memory gitlab projects served over HTTP"""
+
+    def __init__(self, host='127.0.0.1', port=0, token=None, latency=0.0, max_per_page=100):
+        """
+        :param str host: The address the server listens on
+        :param int port: The port the server listens on, a free one when 0
+        :param str token: The expected PRIVATE-TOKEN header, any token is accepted when None
+        :param float latency: The number of seconds added to every response
+        :param int max_per_page: The maximum page size, as configured on gitlab
+        """
+        self.host = host
+        self.port = port
+        self.token = token
+        self.latency = latency
+        self.max_per_page = max_per_page
+        self.projects = {}
+        self.requests = []
+        self._rules = []
+        self._clock = 0
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        """
+        :rtype: str
+        :return: The gitlab endpoint to give to ci_helper
+        """
+        return 'http://{}:{}'.format(self.host, self._server.server_address[1] if self._server else self.port)
+
+    def start(self):
+        """It starts serving in a background thread"""
+        handler = type('FakeGitlabHandler', (FakeGitlabHandler,), {'gitlab': self})
+        self._server = _Server((self.host, self.port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """It stops serving"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def add_project(self, project_id, path=None):
+        """It adds an empty project
+
+        :param str project_id: The numeric project identifier
+        :param str path: The project full path (e.g. group/name)
+        :rtype: dict
+        :return: The project
+        """
+        with self._lock:
+            project = {'id': int(project_id), 'path': path or 'group/project-{}'.format(project_id),
+                       'merge_requests': {}, 'commits': {}, 'tags': {}, 'branches': ['master', 'develop'],
+                       'diffs': {}}
+            self.projects[str(project_id)] = project
+            return project
+
+    def seed(self, project_id, merge_requests=0, tags=0, commits=0, branches=(), changes=3, description_size=0,
+             path=None):
+        """It adds a project with deterministic merged merge requests, commits, tags and releases
+
+        Each merged merge request gets a merge commit, and tag 'i.0.0' releases merge request i.
+
+        :param str project_id: The numeric project identifier
+        :param int merge_requests: The number of merged merge requests
+        :param int tags: The number of tags, with a release each
+        :param int commits: The number of commits besides the merge commits
+        :param list branches: More branch names
+        :param int changes: The number of changes listed by each merge request description
+        :param int description_size: The minimum size of each merge request description, to test large bodies
+        :param str path: The project full path (e.g. group/name)
+        :rtype: dict
+        :return: The project
+        """
+        with self._lock:
+            project = self.projects.get(str(project_id)) or self.add_project(project_id, path)
+            project['branches'].extend(branch for branch in branches if branch not in project['branches'])
+            for index in range(commits):
+                self.add_commit(project_id, title='{} {}'.format(WORDS[index % len(WORDS)], index))
+            for index in range(1, merge_requests + 1):
+                lines = ['- {} {} {}'.format(WORDS[(index + line) % len(WORDS)], WORDS[line % len(WORDS)], index)
+                         for line in range(changes)]
+                description = '\n'.join(lines)
+                if len(description) < description_size:
+                    description += '\n' + '\n'.join('- {} {}'.format(WORDS[line % len(WORDS)], line)
+                                                    for line in range((description_size - len(description)) // 8))
+                self.add_merge_request(project_id, 'feature-{}'.format(index), 'master', description=description,
+                                       state='merged')
+            for index in range(1, tags + 1):
+                merge_request = project['merge_requests'].get(index)
+                self.add_tag(project_id, '{}.0.0'.format(index),
+                             target=merge_request['merge_commit_sha'] if merge_request else None,
+                             release_description=merge_request['description'] if merge_request else '- release')
+            return project
+
+    def add_commit(self, project_id, title, message=None, paths=('README.md',)):
+        """
+        :param str project_id: The project identifier
+        :param str title: The commit title
+        :param str message: The commit message, the title by default
+        :param list paths: The paths changed by the commit
+        :rtype: dict
+        :return: The commit
+        """
+        with self._lock:
+            project = self._project(project_id)
+            moment = self._tick()
+            sha = hashlib.sha1('{}:{}:{}'.format(project['id'], title, moment).encode('utf-8')).hexdigest()
+            commit = {'id': sha, 'short_id': sha[:8], 'title': title, 'message': message or title,
+                      'committed_date': moment, 'created_at': moment}
+            project['commits'][sha] = commit
+            project['diffs'][sha] = [{'old_path': path, 'new_path': path, 'diff': ''} for path in paths]
+            return commit
+
+    def add_merge_request(self, project_id, source_branch, target_branch, description='', state='opened',
+                          title=None, merge_status='can_be_merged', checks=0):
+        """
+        :param str project_id: The project identifier
+        :param str source_branch: The source branch name
+        :param str target_branch: The target branch name
+        :param str description: The description
+        :param str state: 'opened' or 'merged'. A merged merge request gets a merge commit
+        :param str title: The title
+        :param str merge_status: The merge status
+        :param int checks: The number of reads the merge request stays in 'checking' status before being mergeable
+        :rtype: dict
+        :return: The merge request
+        """
+        with self._lock:
+            project = self._project(project_id)
+            iid = len(project['merge_requests']) + 1
+            title = title or 'Merge branch \'{}\' into \'{}\''.format(source_branch, target_branch)
+            merge_request = {'id': project['id'] * 1000000 + iid, 'iid': iid, 'project_id': project['id'],
+                             'title': title, 'description': description, 'state': state,
+                             'source_branch': source_branch, 'target_branch': target_branch,
+                             'merge_status': 'checking' if checks else merge_status, 'has_conflicts': False,
+                             'merge_commit_sha': None, 'squash_commit_sha': None, 'created_at': self._tick(),
+                             'updated_at': None, 'checks': checks}
+            if state == 'merged':
+                merge_request['merge_commit_sha'] = self.add_commit(project_id, title, paths=())['id']
+            merge_request['updated_at'] = self._tick()
+            project['merge_requests'][iid] = merge_request
+            return merge_request
+
+    def add_tag(self, project_id, name, target=None, message='', release_description=None):
+        """
+        :param str project_id: The project identifier
+        :param str name: The tag name
+        :param str target: The tagged commit SHA, a new commit by default
+        :param str message: The annotated tag message
+        :param str release_description: The release description, no release when None
+        :rtype: dict
+        :return: The tag
+        """
+        with self._lock:
+            project = self._project(project_id)
+            commit = project['commits'].get(target) or self.add_commit(project_id, 'Release {}'.format(name))
+            tag = {'name': name, 'target': commit['id'], 'message': message, 'commit': dict(commit),
+                   'release': None, 'created_at': self._tick()}
+            if release_description is not None:
+                tag['release'] = {'tag_name': name, 'description': release_description}
+            project['tags'][name] = tag
+            return tag
+
+    def inject(self, method=None, pattern='', status=None, times=None, delay=0.0, headers=None, body=None):
+        """It makes the matching requests fail or slow down
+
+        Rules are checked in order, and the first matching rule with times left applies.
+
+        :param str method: The request method, any when None
+        :param str pattern: A regular expression searched in the request path (after /api/v4)
+        :param int status: The response status, the request is served normally when None
+        :param int times: The number of requests the rule applies to, all when None
+        :param float delay: The number of seconds added to the response
+        :param dict headers: The response headers (e.g. {'Retry-After': '1'})
+        :param body: The response body, a gitlab error message by default
+        :rtype: dict
+        :return: The rule
+        """
+        rule = {'method': method, 'pattern': re.compile(pattern), 'status': status, 'times': times, 'delay': delay,
+                'headers': headers or {}, 'body': body}
+        with self._lock:
+            self._rules.append(rule)
+        return rule
+
+    def reset(self):
+        """It removes the injected rules and clears the request log"""
+        with self._lock:
+            self._rules = []
+            self.requests = []
+
+    def count(self, method=None, pattern=''):
+        """
+        :param str method: The request method, any when None
+        :param str pattern: A regular expression searched in the request path
+        :rtype: int
+        :return: The number of logged requests matching
+        """
+        expression = re.compile(pattern)
+        return sum(1 for request in list(self.requests)
+                   if (method is None or request.method == method) and expression.search(request.path))
+
+    def handle(self, method, path, query, headers, body):
+        """It answers a request
+
+        :param str method: The request method
+        :param str path: The raw request path
+        :param dict query: The query parameters
+        :param dict headers: The request headers, with lower case names
+        :param bytes body: The request body
+        :rtype: tuple
+        :return: The status, the response headers and the response body (JSON serializable)
+        """
+        rule = self._match_rule(method, path)
+        delay = self.latency + (rule['delay'] if rule else 0.0)
+        if delay:
+            time.sleep(delay)
+        if rule and rule['status']:
+            return rule['status'], rule['headers'], rule['body'] if rule['body'] is not None else \
+                {'message': '{} Injected error'.format(rule['status'])}
+        if self.token is not None and headers.get('private-token') != self.token and \
+                headers.get('authorization') != 'Bearer {}'.format(self.token):
+            return 401, {}, {'message': '401 Unauthorized'}
+        data = json.loads(body.decode('utf-8')) if body else {}
+        if path == '/api/graphql':
+            return 200, {}, self._graphql(data.get('query', ''))
+        for route_method, expression, handler in ROUTES:
+            match = expression.match(path[len('/api/v4'):]) if path.startswith('/api/v4/') else None
+            if match and route_method == method:
+                with self._lock:
+                    project_id = unquote(match.group(1))
+                    project = self.projects.get(project_id) or self._project_by_path(project_id)
+                    if project is None:
+                        return 404, {}, {'message': '404 Project Not Found'}
+                    arguments = [unquote(group) for group in match.groups()[1:]]
+                    return getattr(self, handler)(project, query, data, headers, *arguments)
+        return 404, {}, {'error': '404 Not Found'}
+
+    def _list_merge_requests(self, project, query, data, headers):
+        merge_requests = [merge_request for merge_request in project['merge_requests'].values()
+                          if query.get('state', 'all') in ('all', merge_request['state']) and
+                          query.get('source_branch', merge_request['source_branch']) == merge_request['source_branch']
+                          and query.get('target_branch', merge_request['target_branch']) ==
+                          merge_request['target_branch'] and
+                          merge_request['updated_at'] >= query.get('updated_after', '') and
+                          merge_request['updated_at'] <= query.get('updated_before', '9999')]
+        order_by = 'updated_at' if query.get('order_by') == 'updated_at' else 'created_at'
+        merge_requests.sort(key=lambda merge_request: (merge_request[order_by], merge_request['iid']),
+                            reverse=query.get('sort', 'desc') == 'desc')
+        return self._page(query, [self._merge_request(merge_request) for merge_request in merge_requests])
+
+    def _get_merge_request(self, project, query, data, headers, iid):
+        merge_request = project['merge_requests'].get(int(iid))
+        if merge_request is None:
+            return 404, {}, {'message': '404 Not found'}
+        if merge_request['merge_status'] == 'checking':
+            merge_request['checks'] -= 1
+            if merge_request['checks'] <= 0:
+                merge_request['merge_status'] = 'can_be_merged'
+                merge_request['updated_at'] = self._tick()
+        content = self._merge_request(merge_request)
+        etag = 'W/"{}"'.format(hashlib.md5(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest())
+        if headers.get('if-none-match') == etag:
+            return 304, {'ETag': etag}, None
+        return 200, {'ETag': etag}, content
+
+    def _create_merge_request(self, project, query, data, headers):
+        for merge_request in project['merge_requests'].values():
+            if merge_request['state'] == 'opened' and merge_request['source_branch'] == data.get('source_branch') \
+                    and merge_request['target_branch'] == data.get('target_branch'):
+                return 409, {}, {'message': ['Another open merge request already exists for this source branch: !{}'
+                                             .format(merge_request['iid'])]}
+        if data.get('target_branch') not in project['branches']:
+            return 404, {}, {'message': '404 Branch Not Found'}
+        merge_request = self.add_merge_request(project['id'], data['source_branch'], data['target_branch'],
+                                               description=data.get('description', ''), title=data.get('title'))
+        return 201, {}, self._merge_request(merge_request)
+
+    def _update_merge_request(self, project, query, data, headers, iid):
+        merge_request = project['merge_requests'].get(int(iid))
+        if merge_request is None:
+            return 404, {}, {'message': '404 Not found'}
+        merge_request.update((key, data[key]) for key in ('title', 'description', 'target_branch') if key in data)
+        merge_request['updated_at'] = self._tick()
+        return 200, {}, self._merge_request(merge_request)
+
+    def _accept_merge_request(self, project, query, data, headers, iid):
+        merge_request = project['merge_requests'].get(int(iid))
+        if merge_request is None:
+            return 404, {}, {'message': '404 Not found'}
+        if merge_request['state'] != 'opened':
+            return 405, {}, {'message': '405 Method Not Allowed'}
+        if merge_request['merge_status'] != 'can_be_merged':
+            return 406, {}, {'message': 'Branch cannot be merged'}
+        merge_request['state'] = 'merged'
+        merge_request['merge_commit_sha'] = self.add_commit(project['id'], data.get('merge_commit_message') or
+                                                            merge_request['title'], paths=())['id']
+        merge_request['updated_at'] = self._tick()
+        return 200, {}, self._merge_request(merge_request)
+
+    def _list_commits(self, project, query, data, headers):
+        commits = [commit for commit in project['commits'].values()
+                   if commit['committed_date'] >= query.get('since', '') and
+                   commit['committed_date'] <= query.get('until', '9999')]
+        commits.sort(key=lambda commit: commit['committed_date'], reverse=True)
+        return self._page(query, commits)
+
+    def _get_commit(self, project, query, data, headers, sha):
+        commit = self._commit(project, sha)
+        if commit is None:
+            return 404, {}, {'message': '404 Commit Not Found'}
+        return 200, {}, commit
+
+    def _get_commit_diff(self, project, query, data, headers, sha):
+        commit = self._commit(project, sha)
+        if commit is None:
+            return 404, {}, {'message': '404 Commit Not Found'}
+        return self._page(query, project['diffs'].get(commit['id'], []))
+
+    def _list_tags(self, project, query, data, headers):
+        tags = sorted(project['tags'].values(),
+                      key=lambda tag: tag['name'] if query.get('order_by') == 'name'
+                      else (tag['commit']['committed_date'], tag['created_at']),
+                      reverse=query.get('sort', 'desc') == 'desc')
+        return self._page(query, [self._tag(tag) for tag in tags])
+
+    def _get_tag(self, project, query, data, headers, name):
+        tag = project['tags'].get(name)
+        if tag is None:
+            return 404, {}, {'message': '404 Tag Not Found'}
+        return 200, {}, self._tag(tag)
+
+    def _create_tag(self, project, query, data, headers):
+        if data.get('tag_name') in project['tags']:
+            return 400, {}, {'message': 'Tag {} already exists'.format(data.get('tag_name'))}
+        commit = self._commit(project, data.get('ref', ''))
+        if commit is None:
+            return 400, {}, {'message': 'Target {} is invalid'.format(data.get('ref'))}
+        tag = self.add_tag(project['id'], data['tag_name'], target=commit['id'], message=data.get('message', ''),
+                           release_description=data.get('release_description'))
+        return 201, {}, self._tag(tag)
+
+    def _create_release(self, project, query, data, headers):
+        tag = project['tags'].get(data.get('tag_name'))
+        if tag is None:
+            return 422, {}, {'message': 'Tag does not exist'}
+        if tag['release'] is not None:
+            return 409, {}, {'message': 'Release already exists'}
+        tag['release'] = {'tag_name': tag['name'], 'description': data.get('description', '')}
+        return 201, {}, dict(tag['release'], name=data.get('name', tag['name']))
+
+    def _update_release(self, project, query, data, headers, name):
+        tag = project['tags'].get(name)
+        if tag is None or tag['release'] is None:
+            return 404, {}, {'message': '404 Not Found'}
+        tag['release']['description'] = data.get('description', tag['release']['description'])
+        return 200, {}, dict(tag['release'])
+
+    def _list_branches(self, project, query, data, headers):
+        search = query.get('search', '')
+        branches = [branch for branch in sorted(project['branches'])
+                    if (branch.startswith(search[1:]) if search.startswith('^') else search in branch)]
+        return self._page(query, [{'name': branch} for branch in branches])
+
+    def _graphql(self, query):
+        match = re.search(r'projects\(ids: \["gid://gitlab/Project/(\d+)"\]\)', query)
+        project = self.projects.get(match.group(1)) if match else None
+        if not match:
+            match = re.search(r'project\(fullPath: "([^"]*)"\)', query)
+            project = self._project_by_path(match.group(1)) if match else None
+        if match is None:
+            return {'errors': [{'message': 'Unsupported query'}]}
+        fields = {}
+        if project is not None:
+            with self._lock:
+                for alias, state, source_branch, first in re.findall(
+                        r'(\w+): mergeRequests\(state: (\w+)(?:, sort: \w+)?(?:, sourceBranches: \["([^"]*)"\])?'
+                        r', first: (\d+)\)', query):
+                    merge_requests = sorted((merge_request for merge_request in project['merge_requests'].values()
+                                             if merge_request['state'] == state and
+                                             source_branch in ('', merge_request['source_branch'])),
+                                            key=lambda merge_request: merge_request['updated_at'], reverse=True)
+                    fields[alias] = {'nodes': [{'iid': str(merge_request['iid']),
+                                                'mergeCommitSha': merge_request['merge_commit_sha'],
+                                                'description': merge_request['description'],
+                                                'sourceBranch': merge_request['source_branch'],
+                                                'targetBranch': merge_request['target_branch']}
+                                               for merge_request in merge_requests[:int(first)]]}
+                for alias, reference in re.findall(r'(\w+): repository \{ tree\(ref: "([^"]*)"\)', query):
+                    commit = self._commit(project, reference)
+                    fields[alias] = {'tree': {'lastCommit': {'sha': commit['id'], 'title': commit['title']}}
+                                     if commit else None}
+                for alias, name in re.findall(r'(\w+): release\(tagName: "([^"]*)"\)', query):
+                    tag = project['tags'].get(name)
+                    fields[alias] = {'description': tag['release']['description']} \
+                        if tag and tag['release'] else None
+        if 'projects(ids:' in query:
+            return {'data': {'projects': {'nodes': [fields] if project is not None else []}}}
+        return {'data': {'project': fields if project is not None else None}}
+
+    def _page(self, query, items):
+        per_page = min(max(int(query.get('per_page', 20)), 1), self.max_per_page)
+        page = max(int(query.get('page', 1)), 1)
+        total_pages = max((len(items) + per_page - 1) // per_page, 1)
+        headers = {'X-Page': str(page), 'X-Per-Page': str(per_page), 'X-Total': str(len(items)),
+                   'X-Total-Pages': str(total_pages), 'X-Next-Page': str(page + 1) if page < total_pages else ''}
+        return 200, headers, items[(page - 1) * per_page:page * per_page]
+
+    def _match_rule(self, method, path):
+        with self._lock:
+            for rule in self._rules:
+                if (rule['method'] is None or rule['method'] == method) and rule['pattern'].search(path) and \
+                        (rule['times'] is None or rule['times'] > 0):
+                    if rule['times'] is not None:
+                        rule['times'] -= 1
+                    return rule
+        return None
+
+    def _project(self, project_id):
+        project = self.projects.get(str(project_id))
+        if project is None:
+            raise KeyError('Unknown project {}'.format(project_id))
+        return project
+
+    def _project_by_path(self, path):
+        return next((project for project in self.projects.values() if project['path'] == path), None)
+
+    def _commit(self, project, reference):
+        if reference in project['commits']:
+            return project['commits'][reference]
+        if reference in project['tags']:
+            return project['commits'].get(project['tags'][reference]['target'])
+        return next((commit for sha, commit in project['commits'].items()
+                     if len(reference) >= 7 and sha.startswith(reference)), None)
+
+    def _merge_request(self, merge_request):
+        return {key: value for key, value in merge_request.items() if key != 'checks'}
+
+    def _tag(self, tag):
+        return {key: value for key, value in tag.items() if key != 'created_at'}
+
+    def _tick(self):
+        self._clock += 1
+        return (EPOCH + timedelta(seconds=self._clock)).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+class FakeGitlabHandler(BaseHTTPRequestHandler):
+    """HTTP handler of a FakeGitlab server"""
+
+    gitlab = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_POST(self):
+        self._serve('POST')
+
+    def do_PUT(self):
+        self._serve('PUT')
+
+    def do_DELETE(self):
+        self._serve('DELETE')
+
+    def log_message(self, format, *args):
+        """Requests are logged in FakeGitlab.requests"""
+
+    def _serve(self, method):
+        start = time.perf_counter()
+        parts = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        headers = {key.lower(): value for key, value in self.headers.items()}
+        body = self.rfile.read(int(self.headers.get('content-length') or 0))
+        status, response_headers, content = self.gitlab.handle(method, parts.path, query, headers, body)
+        payload = json.dumps(content).encode('utf-8') if content is not None and status != 304 else b''
+        # logged before answering, so the client sees its request in the log as soon as it has the response
+        self.gitlab.requests.append(FakeRequest(method, parts.path, query, headers, body, status,
+                                                time.perf_counter() - start))
+        self.send_response(status)
+        for key, value in response_headers.items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+ROUTES = [(method, re.compile(pattern), handler) for method, pattern, handler in [
+    ('GET', r'^/projects/([^/]+)/merge_requests$', '_list_merge_requests'),
+    ('POST', r'^/projects/([^/]+)/merge_requests$', '_create_merge_request'),
+    ('GET', r'^/projects/([^/]+)/merge_requests/(\d+)$', '_get_merge_request'),
+    ('PUT', r'^/projects/([^/]+)/merge_requests/(\d+)$', '_update_merge_request'),
+    ('PUT', r'^/projects/([^/]+)/merge_requests/(\d+)/merge$', '_accept_merge_request'),
+    ('GET', r'^/projects/([^/]+)/repository/commits$', '_list_commits'),
+    ('GET', r'^/projects/([^/]+)/repository/commits/([^/]+)$', '_get_commit'),
+    ('GET', r'^/projects/([^/]+)/repository/commits/([^/]+)/diff$', '_get_commit_diff'),
+    ('GET', r'^/projects/([^/]+)/repository/tags$', '_list_tags'),
+    ('POST', r'^/projects/([^/]+)/repository/tags$', '_create_tag'),
+    ('GET', r'^/projects/([^/]+)/repository/tags/([^/]+)$', '_get_tag'),
+    ('POST', r'^/projects/([^/]+)/releases$', '_create_release'),
+    ('PUT', r'^/projects/([^/]+)/releases/([^/]+)$', '_update_release'),
+    ('GET', r'^/projects/([^/]+)/repository/branches$', '_list_branches'),
+]]
+
+
+def main(args):
+    """Main function"""
+    gitlab = FakeGitlab(host=args['host'], port=args['port'], token=args['token'], latency=args['latency'])
+    gitlab.seed(args['project_id'], merge_requests=args['merge_requests'], tags=args['tags'], commits=args['commits'],
+                description_size=args['description_size'])
+    gitlab.start()
+    print('Serving project {} on {}'.format(args['project_id'], gitlab.url), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gitlab.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a fake gitlab api')
+    parser.add_argument('--host', dest='host', type=str, default='127.0.0.1', help='The address to listen on')
+    parser.add_argument('--port', dest='port', type=int, default=8080, help='The port to listen on')
+    parser.add_argument('--token', dest='token', type=str, help='The expected private token', required=False)
+    parser.add_argument('--latency', dest='latency', type=float, default=0.0,
+                        help='The number of seconds added to every response')
+    parser.add_argument('-proj', '--project_id', dest='project_id', type=str, default='1',
+                        help='The seeded project identifier')
+    parser.add_argument('--merge-requests', dest='merge_requests', type=int, default=100,
+                        help='The number of merged merge requests')
+    parser.add_argument('--tags', dest='tags', type=int, default=50, help='The number of tags')
+    parser.add_argument('--commits', dest='commits', type=int, default=0,
+                        help='The number of commits besides the merge commits')
+    parser.add_argument('--description-size', dest='description_size', type=int, default=0,
+                        help='The minimum size of each merge request description')
+    main(vars(parser.parse_args()))
@@ -0,0 +1,31 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from tests.fake_gitlab import FakeGitlab
+from tests.unit import BaseTest
+
+
+class IntegrationTest(BaseTest):
+    """Base class of the tests sending real HTTP requests to a FakeGitlab server
+
+    The server is started once per test class. Its projects are seeded again, and its rules and request log cleared,
+    before every test.
+    """
+
+    token = 'gitlab_token'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gitlab = FakeGitlab(token=cls.token).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.gitlab.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.gitlab.projects = {}
+        self.gitlab.reset()
+        self.project = self.gitlab.seed('1', merge_requests=30, tags=10, branches=['release/1.x', 'release/2.x'])
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ci_helper import (GitlabCatalog, GitlabGraphQL, create_auto_merge_request, get_changed_paths,
+                       get_merge_request_changes, get_open_merge_requests, get_version_changes,
+                       git_accept_merge_request, git_create_release, git_create_tag, git_get_tag_release_description,
+                       republish_releases)
+import ci_helper
+from tests.integration import IntegrationTest
+
+
+class TestGitlabApi(IntegrationTest):
+    """This class tests the ci_helper gitlab api calls against a FakeGitlab server"""
+
+    def setUp(self):
+        super().setUp()
+        ci_helper._OPEN_MERGE_REQUESTS.clear()
+
+    def latest_merge_request(self):
+        return self.project['merge_requests'][max(self.project['merge_requests'])]
+
+    def test_merge_request_changes_must_be_read_from_description(self):
+        merge_request = self.latest_merge_request()
+        actual = get_merge_request_changes(self.gitlab.url, 'gitlab_token', '1', merge_request['merge_commit_sha'])
+        self.assertEqual(actual, ['branch fix 30', 'tag add 30', 'release remove 30'])
+
+    def test_commit_without_merge_request_must_use_commit_title(self):
+        commit = self.gitlab.add_commit('1', 'Hotfix the login')
+        actual = get_version_changes(self.gitlab.url, 'gitlab_token', '1', commit['id'])
+        self.assertEqual(actual, ['Hotfix the login'])
+
+    def test_project_path_must_be_accepted(self):
+        merge_request = self.latest_merge_request()
+        actual = get_merge_request_changes(self.gitlab.url, 'gitlab_token', 'group%2Fproject-1',
+                                           merge_request['merge_commit_sha'])
+        self.assertEqual(actual, ['branch fix 30', 'tag add 30', 'release remove 30'])
+
+    def test_changed_paths_must_be_read_from_commit_diff(self):
+        commit = self.gitlab.add_commit('1', 'Change services', paths=['services/api/a.py', 'services/web/b.py'])
+        actual = get_changed_paths(self.gitlab.url, 'gitlab_token', '1', commit['id'])
+        self.assertEqual(actual, {'services/api/a.py', 'services/web/b.py'})
+
+    def test_created_tag_must_be_read_back(self):
+        commit = self.gitlab.add_commit('1', 'Release commit')
+        git_create_tag(self.gitlab.url, 'gitlab_token', '1', commit['id'], ['change 1', 'change 2'], '11.0.0')
+        actual = git_get_tag_release_description(self.gitlab.url, 'gitlab_token', '1', '11.0.0')
+        self.assertEqual(actual, ['change 1', 'change 2'])
+
+    def test_release_must_be_created_on_existing_tag(self):
+        self.gitlab.add_tag('1', '11.0.0')
+        git_create_release(self.gitlab.url, 'gitlab_token', '1', ['change 1'], '11.0.0')
+        self.assertEqual(self.project['tags']['11.0.0']['release']['description'], '- change 1')
+
+    def test_open_merge_requests_must_be_read_page_by_page(self):
+        for index in range(250):
+            self.gitlab.add_merge_request('1', 'develop', 'target-{}'.format(index))
+        actual = get_open_merge_requests(self.gitlab.url, 'gitlab_token', '1', 'develop')
+        self.assertEqual(len(actual), 250)
+        self.assertEqual(self.gitlab.count('GET', '/merge_requests$'), 3)
+
+    def test_republish_must_update_only_changed_releases(self):
+        self.gitlab.add_tag('1', '11.0.0', release_description='* Old wording')
+        actual = republish_releases(self.gitlab.url, 'gitlab_token', '1', rate_limit=None)
+        self.assertEqual(actual, ['11.0.0'])
+        self.assertEqual(self.gitlab.count('PUT', '/releases/'), 1)
+        self.assertEqual(self.project['tags']['11.0.0']['release']['description'], '- Old wording')
+
+    def test_catalog_warm_sync_must_send_one_request_per_resource(self):
+        with tempfile.TemporaryDirectory() as directory:
+            catalog_path = os.path.join(directory, 'catalog.db')
+            with GitlabCatalog(catalog_path, self.gitlab.url, 'gitlab_token', '1', per_page=10) as catalog:
+                catalog.sync()
+            self.gitlab.reset()
+            with GitlabCatalog(catalog_path, self.gitlab.url, 'gitlab_token', '1', per_page=10) as catalog:
+                self.assertEqual(catalog.sync(), {'merge_requests': 0, 'commits': 0, 'tags': 0})
+                self.assertEqual(catalog.tag_message('10.0.0'), self.project['merge_requests'][10]['description'])
+        self.assertEqual(len(self.gitlab.requests), 3)
+
+    def test_graphql_must_answer_lookups_in_one_request(self):
+        merge_request = self.latest_merge_request()
+        with GitlabGraphQL(self.gitlab.url, 'gitlab_token', '1', commit_shas=[merge_request['merge_commit_sha']],
+                           tag_names=['3.0.0']) as data_source:
+            self.assertEqual(data_source.merge_request_description(merge_request['merge_commit_sha']),
+                             merge_request['description'])
+            self.assertEqual(data_source.commit_title(merge_request['merge_commit_sha']), merge_request['title'])
+            self.assertEqual(data_source.tag_message('3.0.0'), self.project['merge_requests'][3]['description'])
+        self.assertEqual(len(self.gitlab.requests), 1)
+
+    @mock.patch('ci_helper.MERGE_POLL_INITIAL_DELAY', 0.01)
+    def test_merge_must_wait_for_checks_with_conditional_requests(self):
+        merge_request = self.gitlab.add_merge_request('1', 'develop', 'master', checks=3)
+        git_accept_merge_request(self.gitlab.url, 'gitlab_token', '1', 'develop', 'master', merge_request['iid'])
+        self.assertEqual(merge_request['state'], 'merged')
+        self.assertEqual([request.status for request in self.gitlab.requests],
+                         [406, 200, 304, 200, 200])
+
+    @mock.patch('ci_helper.MERGE_POLL_INITIAL_DELAY', 0.01)
+    def test_auto_merge_requests_must_reuse_open_ones(self):
+        self.gitlab.add_merge_request('1', 'master', 'release/1.x')
+        actual = create_auto_merge_request(self.gitlab.url, 'gitlab_token', '1', 'master', ['release/*'], None,
+                                           '3.0.0')
+        self.assertEqual(sorted(actual), ['release/1.x', 'release/2.x'])
+        self.assertEqual(self.gitlab.count('POST', '/merge_requests$'), 1)
+        self.assertTrue(all(self.project['merge_requests'][iid]['state'] == 'merged' for iid in actual.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
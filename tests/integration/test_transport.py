@@ -0,0 +1,94 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import socket
+import time
+import unittest
+from urllib.error import HTTPError
+
+from ci_helper import (configure_transport, get_commit_changes, get_merge_request_changes,
+                       git_get_tag_release_description, EndpointUnavailable)
+from tests.fake_gitlab import FakeGitlab
+from tests.integration import IntegrationTest
+
+
+class TestTransport(IntegrationTest):
+    """This class tests the ci_helper HTTP layer against a FakeGitlab server"""
+
+    def tearDown(self):
+        configure_transport()
+        super().tearDown()
+
+    def commit_sha(self):
+        return self.project['merge_requests'][1]['merge_commit_sha']
+
+    def test_wrong_token_must_raise_unauthorized(self):
+        with self.assertRaises(HTTPError) as context:
+            get_commit_changes(self.gitlab.url, 'wrong_token', '1', self.commit_sha())
+        self.assertEqual(context.exception.code, 401)
+
+    def test_rate_limited_request_must_raise_too_many_requests(self):
+        self.gitlab.inject('GET', '/repository/commits/', status=429, times=1, headers={'Retry-After': '1'})
+        with self.assertRaises(HTTPError) as context:
+            get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        self.assertEqual(context.exception.code, 429)
+        self.assertEqual(context.exception.headers['Retry-After'], '1')
+
+    def test_client_errors_must_not_open_circuit(self):
+        configure_transport(failure_threshold=2)
+        self.gitlab.inject('GET', '/repository/commits/', status=429, times=3)
+        for _ in range(3):
+            with self.assertRaises(HTTPError):
+                get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        self.assertEqual(get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha()),
+                         ['Merge branch \'feature-1\' into \'master\''])
+
+    def test_server_errors_must_open_circuit(self):
+        configure_transport(failure_threshold=2, recovery_time=60)
+        self.gitlab.inject('GET', '/repository/commits/', status=500)
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        with self.assertRaises(EndpointUnavailable):
+            get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        self.assertEqual(len(self.gitlab.requests), 2)
+
+    def test_slow_response_must_time_out(self):
+        configure_transport(timeout=0.2)
+        self.gitlab.inject('GET', '/repository/commits/', delay=1, times=1)
+        with self.assertRaises(OSError) as context:
+            get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        self.assertIsInstance(getattr(context.exception, 'reason', context.exception), socket.timeout)
+
+    def test_hedged_request_must_return_first_response(self):
+        configure_transport(hedge_percentile=95, hedge_delay=0.1)
+        self.gitlab.inject('GET', '/repository/commits/', delay=1, times=1)
+        start = time.monotonic()
+        actual = get_commit_changes(self.gitlab.url, 'gitlab_token', '1', self.commit_sha())
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(actual, ['Merge branch \'feature-1\' into \'master\''])
+        # let the slow request end, so it does not outlive the test
+        while len(self.gitlab.requests) < 2:
+            time.sleep(0.05)
+        time.sleep(0.1)
+
+    def test_large_description_must_be_read(self):
+        self.gitlab.seed('2', merge_requests=1, description_size=2 ** 20)
+        merge_request = self.gitlab.projects['2']['merge_requests'][1]
+        actual = get_merge_request_changes(self.gitlab.url, 'gitlab_token', '2', merge_request['merge_commit_sha'])
+        self.assertGreater(len(actual), 100000)
+        self.assertEqual(actual[-1], merge_request['description'].rsplit('- ', 1)[1])
+
+    def test_reads_must_go_to_replica_and_fall_back_on_not_found(self):
+        with FakeGitlab(token='gitlab_token') as replica:
+            replica.seed('1', tags=1)
+            configure_transport(primary_endpoint=self.gitlab.url, read_endpoint=replica.url)
+            git_get_tag_release_description(self.gitlab.url, 'gitlab_token', '1', '1.0.0')
+            git_get_tag_release_description(self.gitlab.url, 'gitlab_token', '1', '2.0.0')
+            self.assertEqual([request.status for request in replica.requests], [200, 404])
+        self.assertEqual([request.path for request in self.gitlab.requests],
+                         ['/api/v4/projects/1/repository/tags/2.0.0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,15 @@ import unittest
 from datetime import datetime
 from unittest import mock
 
+import ci_helper
+
 
 class BaseTest(unittest.TestCase):
 
     def setUp(self):
         self.mock_log = mock.patch('ci_helper._log')
         self.mock_log.start()
+        ci_helper.configure_transport()
 
     def tearDown(self):
         self.mock_log.stop()
@@ -22,7 +25,11 @@ class BaseTest(unittest.TestCase):
     def mock_process(self, wait_return_value, stdout_return_value=[b'']):
         mock_process = mock.Mock()
         mock_process.wait.return_value = wait_return_value
-        mock_process.stdout.readlines.return_value = stdout_return_value
+        mock_process.poll.return_value = wait_return_value
+        mock_process.stdout = mock.MagicMock()
+        mock_process.stdout.__iter__.side_effect = lambda: iter(stdout_return_value)
+        mock_process.stderr = mock.MagicMock()
+        mock_process.stderr.__iter__.side_effect = lambda: iter([])
         return mock_process
 
     def mock_read(self, return_value):
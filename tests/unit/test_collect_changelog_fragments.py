@@ -0,0 +1,53 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from ci_helper import collect_changelog_fragments
+from tests.unit import BaseTest
+
+
+class TestCollectChangelogFragments(BaseTest):
+    """This class tests the collect_changelog_fragments method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, mode='w') as fragment_file:
+            fragment_file.write(content)
+        return path
+
+    def test_must_return_changes_in_file_name_order(self):
+        second = self.write('12.md', '- Second change\n')
+        first = self.write('11.md', '- First change\n* Other change\n')
+        self.assertEqual(collect_changelog_fragments(self.directory.name),
+                         (['First change', 'Other change', 'Second change'], [first, second]))
+
+    def test_must_clean_fragment_content(self):
+        path = self.write('1.md', '- [x] @reviewer\n\n- - Fixed login\n')
+        self.assertEqual(collect_changelog_fragments(self.directory.name), (['Fixed login'], [path]))
+
+    def test_duplicated_changes_must_be_kept_once(self):
+        first = self.write('1.md', '- Fixed login\n')
+        second = self.write('2.md', '- Fixed login\n')
+        self.assertEqual(collect_changelog_fragments(self.directory.name), (['Fixed login'], [first, second]))
+
+    def test_hidden_files_must_be_ignored(self):
+        self.write('.gitkeep', '')
+        self.assertEqual(collect_changelog_fragments(self.directory.name), ([], []))
+
+    def test_missing_directory_must_return_no_changes(self):
+        self.assertEqual(collect_changelog_fragments(os.path.join(self.directory.name, 'missing')), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
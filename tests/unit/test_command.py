@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import concurrent.futures
+import shlex
+import sys
+import tempfile
+import time
+import unittest
+
+from ci_helper import _command, _stream_command, CommitError
+from tests.unit import BaseTest
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+class TestCommand(BaseTest):
+    """This class tests the _command and _stream_command methods"""
+
+    def test_must_return_stdout_lines(self):
+        self.assertEqual(_command(python('print("a"); print("b")')), [b'a\n', b'b\n'])
+
+    def test_string_command_must_keep_quoted_arguments(self):
+        command = '{} -c "import sys; print(sys.argv[1])" "two words"'.format(shlex.quote(sys.executable))
+        self.assertEqual(_command(command), [b'two words\n'])
+
+    def test_output_larger_than_pipe_buffer_must_not_block(self):
+        actual = _command(python('import sys; [sys.stdout.write("x" * 99 + "\\n") for _ in range(20000)]; '
+                                 'sys.stderr.write("y" * 1000000)'), timeout=30)
+        self.assertEqual(len(actual), 20000)
+
+    def test_return_code_not_zero_must_raise_exception(self):
+        with self.assertRaises(CommitError) as context:
+            _command(python('import sys; sys.exit(3)'), exception=CommitError)
+        self.assertEqual(context.exception.args, (3,))
+
+    def test_timeout_must_kill_process_group(self):
+        start = time.monotonic()
+        with self.assertRaises(CommitError):
+            _command(python('import subprocess, sys; '
+                            'subprocess.call([sys.executable, "-c", "import time; time.sleep(30)"])'),
+                     exception=CommitError, timeout=0.5)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_stream_must_yield_lines_before_process_ends(self):
+        stream = _stream_command(python('import time; print("first", flush=True); time.sleep(30)'), timeout=60)
+        start = time.monotonic()
+        self.assertEqual(next(stream), b'first\n')
+        stream.close()
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_must_run_in_given_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            actual = _command(python('import os; print(os.getcwd())'), cwd=directory)
+        self.assertTrue(actual[0].decode('utf-8').strip().endswith(directory.split('/')[-1]))
+
+    def test_commands_must_run_concurrently(self):
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            actual = list(executor.map(lambda index: _command(python('import time; time.sleep(1); print({})'
+                                                                     .format(index))), range(4)))
+        self.assertEqual(actual, [[b'0\n'], [b'1\n'], [b'2\n'], [b'3\n']])
+        self.assertLess(time.monotonic() - start, 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
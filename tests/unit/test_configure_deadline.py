@@ -0,0 +1,100 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import sys
+import time
+import unittest
+from unittest import mock
+from urllib.error import URLError
+
+import ci_helper
+from ci_helper import configure_deadline, get_commit_changes, DeadlineExceeded, LocalGitRepository, PushError
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestConfigureDeadline(BaseTest):
+    """This class tests the configure_deadline method"""
+
+    def tearDown(self):
+        configure_deadline()
+        super().tearDown()
+
+    def get(self):
+        return get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha')
+
+    def test_no_deadline_must_keep_timeouts(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        self.get()
+        self.assertEqual(mock_urlopen.call_args[1]['timeout'], 30)
+
+    def test_request_timeout_must_be_bounded_by_remaining_time(self, mock_urlopen):
+        configure_deadline(10)
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        self.get()
+        self.assertTrue(9 < mock_urlopen.call_args[1]['timeout'] <= 10)
+
+    def test_exhausted_deadline_must_not_send_request(self, mock_urlopen):
+        configure_deadline(0.01)
+        time.sleep(0.02)
+        with self.assertRaises(DeadlineExceeded):
+            self.get()
+        mock_urlopen.assert_not_called()
+
+    def test_request_cut_by_deadline_must_raise_deadline_exceeded(self, mock_urlopen):
+        def urlopen(request, context, timeout):
+            time.sleep(timeout)
+            raise URLError('timed out')
+        mock_urlopen.side_effect = urlopen
+        configure_deadline(0.1)
+        with self.assertRaises(DeadlineExceeded):
+            self.get()
+
+    def test_report_must_name_running_and_completed_stages(self, mock_urlopen):
+        configure_deadline(0.05)
+        with ci_helper._stage('publish_version'):
+            with ci_helper._stage('generate_version'):
+                pass
+            time.sleep(0.06)
+            with ci_helper._stage('get_version_changes'):
+                with self.assertRaises(DeadlineExceeded) as context:
+                    self.get()
+        self.assertRegex(str(context.exception), r'during publish_version \(\d+\.\ds\)')
+        self.assertRegex(str(context.exception), r'> get_version_changes \(\d+\.\ds\)\.')
+        self.assertRegex(str(context.exception), r'Completed stages: generate_version \d+\.\ds')
+
+    def test_command_must_be_killed_when_deadline_is_exhausted(self, mock_urlopen):
+        configure_deadline(0.5)
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            ci_helper._command([sys.executable, '-c', 'import time; time.sleep(30)'], exception=PushError)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_command_timeout_before_deadline_must_raise_command_exception(self, mock_urlopen):
+        configure_deadline(60)
+        with self.assertRaises(PushError):
+            ci_helper._command([sys.executable, '-c', 'import time; time.sleep(30)'], exception=PushError,
+                               timeout=0.2)
+
+    def test_probe_command_must_be_killed_when_deadline_is_exhausted(self, mock_urlopen):
+        configure_deadline(0.5)
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            ci_helper._command_succeeds([sys.executable, '-c', 'import time; time.sleep(30)'])
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_batch_read_must_be_killed_when_deadline_is_exhausted(self, mock_urlopen):
+        repository = LocalGitRepository()
+        repository._process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'],
+                                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, start_new_session=True)
+        configure_deadline(0.5)
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            repository.read_objects(['sha'])
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertIsNone(repository._process)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import pstats
+import tempfile
+import unittest
+
+import ci_helper
+from ci_helper import configure_profiling
+from tests.unit import BaseTest
+
+
+class TestConfigureProfiling(BaseTest):
+    """This class tests the configure_profiling method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        configure_profiling()
+        ci_helper._PROFILE['count'] = 0
+        self.directory.cleanup()
+        super().tearDown()
+
+    def run_stages(self):
+        with ci_helper._stage('outer'):
+            sorted(range(1000))
+            with ci_helper._stage('inner'):
+                ci_helper.clean_content('- change')
+
+    def test_disabled_profiling_must_not_write_reports(self):
+        configure_profiling(directory=self.directory.name)
+        self.run_stages()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_cpu_profiling_must_write_stats_of_each_stage(self):
+        configure_profiling(mode='cpu', directory=self.directory.name)
+        self.run_stages()
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['01-inner.pstats', '02-outer.pstats'])
+        inner_functions = [function[2] for function in
+                           pstats.Stats(os.path.join(self.directory.name, '01-inner.pstats')).stats]
+        outer_functions = [function[2] for function in
+                           pstats.Stats(os.path.join(self.directory.name, '02-outer.pstats')).stats]
+        self.assertIn('clean_content', inner_functions)
+        self.assertIn('clean_content', outer_functions)
+
+    def test_memory_profiling_must_write_allocation_report(self):
+        configure_profiling(mode='mem', directory=self.directory.name, top=5)
+        self.run_stages()
+        with open(os.path.join(self.directory.name, '02-outer.mem.txt'), mode='r') as file:
+            lines = file.read().splitlines()
+        self.assertTrue(lines[0].startswith('Peak traced memory:'))
+        self.assertLessEqual(len(lines), 6)
+
+    def test_zero_sample_rate_must_not_write_reports(self):
+        configure_profiling(mode='all', directory=self.directory.name, sample_rate=0)
+        self.run_stages()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
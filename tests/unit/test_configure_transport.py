@@ -0,0 +1,230 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+from unittest import mock
+from urllib.error import HTTPError, URLError
+
+import ci_helper
+from ci_helper import configure_transport, get_commit_changes, git_create_tag, EndpointUnavailable, GitlabGraphQL
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestConfigureTransport(BaseTest):
+    """This class tests the configure_transport method"""
+
+    def setUp(self):
+        super().setUp()
+        configure_transport(primary_endpoint='https://primary', read_endpoint='https://replica/')
+
+    def tearDown(self):
+        configure_transport()
+        super().tearDown()
+
+    def urls(self, mock_urlopen):
+        return [call[0][0].full_url for call in mock_urlopen.call_args_list]
+
+    def test_get_must_be_sent_to_read_endpoint(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        self.assertEqual(get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha'), ['title'])
+        self.assertEqual(self.urls(mock_urlopen), ['https://replica/api/v4/projects/project_id/repository/commits/sha'])
+
+    def test_not_found_on_read_endpoint_must_fall_back_to_primary(self, mock_urlopen):
+        mock_urlopen.side_effect = [HTTPError('url', 404, 'msg', 'hdrs', None), self.mock_read(b'{"title": "title"}')]
+        self.assertEqual(get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha'), ['title'])
+        self.assertEqual(self.urls(mock_urlopen), ['https://replica/api/v4/projects/project_id/repository/commits/sha',
+                                                   'https://primary/api/v4/projects/project_id/repository/commits/sha'])
+
+    def test_other_errors_on_read_endpoint_must_raise_http_error(self, mock_urlopen):
+        mock_urlopen.side_effect = HTTPError('url', 500, 'msg', 'hdrs', None)
+        with self.assertRaises(HTTPError):
+            get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        mock_urlopen.assert_called_once()
+
+    def test_write_must_be_sent_to_primary(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{}')
+        git_create_tag('https://primary', 'gitlab_token', 'project_id', 'sha', ['change'], '1.0.0')
+        self.assertEqual(self.urls(mock_urlopen), ['https://primary/api/v4/projects/project_id/repository/tags'])
+
+    @mock.patch('ci_helper.time.monotonic')
+    def test_read_after_write_must_be_sent_to_primary_during_consistency_window(self, mock_monotonic,
+                                                                                mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        mock_monotonic.side_effect = [100, 110, 200]
+        git_create_tag('https://primary', 'gitlab_token', 'project_id', 'sha', ['change'], '1.0.0')
+        get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        self.assertEqual(self.urls(mock_urlopen)[1:],
+                         ['https://primary/api/v4/projects/project_id/repository/commits/sha',
+                          'https://replica/api/v4/projects/project_id/repository/commits/sha'])
+
+    def test_graphql_query_must_not_count_as_write(self, mock_urlopen):
+        mock_urlopen.side_effect = [self.mock_read(b'{"data": {"projects": {"nodes": []}}}'),
+                                    self.mock_read(b'{"title": "title"}')]
+        GitlabGraphQL('https://primary', 'gitlab_token', '42', tag_names=['1.0.0']).tag_message('1.0.0')
+        get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        self.assertEqual(self.urls(mock_urlopen),
+                         ['https://primary/api/graphql',
+                          'https://replica/api/v4/projects/project_id/repository/commits/sha'])
+
+    def test_without_read_endpoint_must_send_to_primary(self, mock_urlopen):
+        configure_transport(primary_endpoint='https://primary')
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        self.assertEqual(self.urls(mock_urlopen), ['https://primary/api/v4/projects/project_id/repository/commits/sha'])
+
+    def test_unreachable_read_endpoint_must_fall_back_to_primary(self, mock_urlopen):
+        mock_urlopen.side_effect = [URLError('refused'), self.mock_read(b'{"title": "title"}')]
+        self.assertEqual(get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha'), ['title'])
+        self.assertEqual(self.urls(mock_urlopen)[1],
+                         'https://primary/api/v4/projects/project_id/repository/commits/sha')
+
+    def test_request_must_be_sent_with_timeout(self, mock_urlopen):
+        configure_transport(timeout=5)
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        get_commit_changes('https://primary', 'gitlab_token', 'project_id', 'sha')
+        self.assertEqual(mock_urlopen.call_args[1]['timeout'], 5)
+
+
+@mock.patch('ci_helper.urlopen')
+class TestHedging(BaseTest):
+    """This class tests the hedging of GET requests configured by the configure_transport method"""
+
+    def setUp(self):
+        super().setUp()
+        configure_transport(hedge_percentile=95, hedge_delay=0.05)
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.threads = set(threading.enumerate())
+
+    def tearDown(self):
+        # the losing requests must not reach the urlopen mock of the next test
+        for thread in set(threading.enumerate()) - self.threads:
+            thread.join(timeout=2)
+        configure_transport()
+        super().tearDown()
+
+    def respond(self, *responses):
+        def urlopen(request, **kwargs):
+            with self.lock:
+                delay, response = responses[self.calls]
+                self.calls += 1
+            time.sleep(delay)
+            if isinstance(response, Exception):
+                raise response
+            return self.mock_read(response)
+        return urlopen
+
+    def test_fast_response_must_not_be_hedged(self, mock_urlopen):
+        mock_urlopen.side_effect = self.respond((0, b'{"title": "first"}'))
+        self.assertEqual(get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha'), ['first'])
+        self.assertEqual(self.calls, 1)
+
+    def test_slow_response_must_be_hedged_and_first_response_must_win(self, mock_urlopen):
+        mock_urlopen.side_effect = self.respond((1, b'{"title": "slow"}'), (0, b'{"title": "hedged"}'))
+        self.assertEqual(get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha'), ['hedged'])
+        self.assertEqual(self.calls, 2)
+
+    def test_connection_error_must_wait_for_other_request(self, mock_urlopen):
+        mock_urlopen.side_effect = self.respond((0.1, URLError('reset')), (0.2, b'{"title": "hedged"}'))
+        self.assertEqual(get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha'), ['hedged'])
+
+    def test_http_error_must_win(self, mock_urlopen):
+        mock_urlopen.side_effect = self.respond((0.1, HTTPError('url', 404, 'msg', 'hdrs', None)),
+                                                (0.5, b'{"title": "hedged"}'))
+        with self.assertRaises(HTTPError):
+            get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha')
+
+    def test_write_must_not_be_hedged(self, mock_urlopen):
+        mock_urlopen.side_effect = self.respond((0.2, b'{}'), (0, b'{}'))
+        git_create_tag('https://gitlab.com', 'gitlab_token', 'project_id', 'sha', ['change'], '1.0.0')
+        self.assertEqual(self.calls, 1)
+
+    def test_delay_must_follow_latency_percentile(self, mock_urlopen):
+        ci_helper._LATENCIES.extend(index / 100 for index in range(100))
+        self.assertEqual(ci_helper._hedge_delay(), 0.95)
+
+
+@mock.patch('ci_helper.urlopen')
+class TestCircuitBreaker(BaseTest):
+    """This class tests the circuit breaker configured by the configure_transport method"""
+
+    def setUp(self):
+        super().setUp()
+        configure_transport(failure_threshold=2, recovery_time=30)
+
+    def tearDown(self):
+        configure_transport()
+        super().tearDown()
+
+    def get(self):
+        return get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'sha')
+
+    def test_consecutive_failures_must_fail_fast(self, mock_urlopen):
+        mock_urlopen.side_effect = URLError('refused')
+        for _ in range(2):
+            with self.assertRaises(URLError):
+                self.get()
+        with self.assertRaises(EndpointUnavailable):
+            self.get()
+        self.assertEqual(mock_urlopen.call_count, 2)
+
+    def test_server_errors_must_count_as_failures(self, mock_urlopen):
+        mock_urlopen.side_effect = HTTPError('url', 503, 'msg', 'hdrs', None)
+        for _ in range(2):
+            with self.assertRaises(HTTPError):
+                self.get()
+        with self.assertRaises(EndpointUnavailable):
+            self.get()
+
+    def test_client_errors_and_successes_must_reset_failures(self, mock_urlopen):
+        mock_urlopen.side_effect = [URLError('refused'), HTTPError('url', 404, 'msg', 'hdrs', None),
+                                    URLError('refused'), self.mock_read(b'{"title": "title"}')]
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                self.get()
+        self.assertEqual(self.get(), ['title'])
+
+    @mock.patch('ci_helper.time.monotonic')
+    def test_recovered_endpoint_must_be_probed(self, mock_monotonic, mock_urlopen):
+        mock_monotonic.side_effect = [0, 10, 40, 41]
+        mock_urlopen.side_effect = [URLError('refused'), URLError('refused'), self.mock_read(b'{"title": "title"}')]
+        for _ in range(2):
+            with self.assertRaises(URLError):
+                self.get()
+        with self.assertRaises(EndpointUnavailable):
+            self.get()
+        self.assertEqual(self.get(), ['title'])
+
+    @mock.patch('ci_helper.time.monotonic')
+    def test_only_one_request_must_probe_recovered_endpoint(self, mock_monotonic, mock_urlopen):
+        mock_monotonic.return_value = 0
+        mock_urlopen.side_effect = URLError('refused')
+        for _ in range(2):
+            with self.assertRaises(URLError):
+                self.get()
+        mock_monotonic.return_value = 40
+        probing, released = threading.Event(), threading.Event()
+
+        def probe(request, context, timeout):
+            probing.set()
+            released.wait(2)
+            raise URLError('refused')
+        mock_urlopen.side_effect = probe
+        thread = threading.Thread(target=lambda: self.assertRaises(URLError, self.get))
+        thread.start()
+        probing.wait(2)
+        with self.assertRaises(EndpointUnavailable):
+            self.get()
+        released.set()
+        thread.join()
+        with self.assertRaises(EndpointUnavailable):
+            self.get()
+        self.assertEqual(mock_urlopen.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,7 +20,7 @@ class TestCreateAutoMergeRequest(BaseTest):
         create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
                                   ['user1'], 'tag_name')
         mock_git_get_tag_release_description.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
-                                                                     'tag_name')
+                                                                     'tag_name', data_source=None)
 
     def test_git_get_tag_release_description_succeeds_must_call_git_create_merge_request_once(self,
                                                                                               mock_git_get_tag_release_description,  # NOQA
@@ -31,7 +31,7 @@ class TestCreateAutoMergeRequest(BaseTest):
                                   ['user1'], 'tag_name')
         mock_git_create_merge_request.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
                                                               'source_branch', 'target_branch', ['user1'],
-                                                              ['version_changes'])
+                                                              ['version_changes'], merge_request_index=None)
 
     def test_git_get_tag_release_description_fails_must_raise_http_error(self,
                                                                          mock_git_get_tag_release_description,
@@ -64,7 +64,8 @@ class TestCreateAutoMergeRequest(BaseTest):
         create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
                                   ['user1'], 'tag_name')
         mock_git_accept_merge_request.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
-                                                              'source_branch', 'target_branch', 'merge_request_iid')
+                                                              'source_branch', 'target_branch', 'merge_request_iid',
+                                                              timeout=600)
 
     def test_git_create_merge_request_fails_must_raise_http_error(self,
                                                                   mock_git_get_tag_release_description,
@@ -101,6 +102,79 @@ class TestCreateAutoMergeRequest(BaseTest):
             create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
                                       ['user1'], 'tag_name')
 
+    @mock.patch('ci_helper.get_open_merge_requests', return_value={})
+    def test_multiple_target_branches_must_fetch_tag_once(self, mock_get_open_merge_requests,
+                                                          mock_git_get_tag_release_description,
+                                                          mock_git_create_merge_request,
+                                                          mock_git_accept_merge_request):
+        mock_git_get_tag_release_description.return_value = ['version_changes']
+        mock_git_create_merge_request.side_effect = lambda *args, **kwargs: 'iid-' + args[4]
+        actual = create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                           ['develop', 'release/1.0'], ['user1'], 'tag_name')
+        self.assertEqual(actual, {'develop': 'iid-develop', 'release/1.0': 'iid-release/1.0'})
+        mock_git_get_tag_release_description.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                                     'tag_name', data_source=None)
+        mock_git_accept_merge_request.assert_any_call('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                                      'release/1.0', 'iid-release/1.0', timeout=600)
+        self.assertEqual(mock_git_accept_merge_request.call_count, 2)
+        mock_get_open_merge_requests.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'master')
+        mock_git_create_merge_request.assert_any_call('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                                      'develop', ['user1'], ['version_changes'], merge_request_index={})
+
+    @mock.patch('ci_helper.get_open_merge_requests')
+    def test_data_source_open_merge_requests_must_be_used(self, mock_get_open_merge_requests,
+                                                          mock_git_get_tag_release_description,
+                                                          mock_git_create_merge_request,
+                                                          mock_git_accept_merge_request):
+        data_source = mock.Mock()
+        data_source.open_merge_requests.return_value = {('master', 'develop'): {'iid': 7}}
+        create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                  ['develop', 'release/1.0'], ['user1'], 'tag_name', data_source=data_source)
+        data_source.open_merge_requests.assert_called_once_with('master')
+        mock_get_open_merge_requests.assert_not_called()
+        mock_git_create_merge_request.assert_any_call('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                                      'develop', ['user1'], mock.ANY,
+                                                      merge_request_index={('master', 'develop'): {'iid': 7}})
+
+    @mock.patch('ci_helper.get_open_merge_requests', return_value={})
+    @mock.patch('ci_helper._request')
+    def test_glob_target_branch_must_match_listed_branches(self, mock_request, mock_get_open_merge_requests,
+                                                           mock_git_get_tag_release_description,
+                                                           mock_git_create_merge_request,
+                                                           mock_git_accept_merge_request):
+        mock_request.return_value = [{'name': 'release/1.0'}, {'name': 'release/2.0'}, {'name': 'releases'}]
+        actual = create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                           ['develop', 'release/*'], ['user1'], 'tag_name')
+        self.assertEqual(sorted(actual), ['develop', 'release/1.0', 'release/2.0'])
+        mock_request.assert_called_once_with('gitlab_endpoint/api/v4/projects/project_id/repository/branches'
+                                             '?search=%5Erelease%2F&per_page=100&page=1',
+                                             gitlab_token='gitlab_token', method='GET')
+
+    @mock.patch('ci_helper._log')
+    @mock.patch('ci_helper._request', return_value=[{'name': 'releases'}])
+    def test_glob_target_branch_without_match_must_warn(self, mock_request, mock_log,
+                                                        mock_git_get_tag_release_description,
+                                                        mock_git_create_merge_request,
+                                                        mock_git_accept_merge_request):
+        actual = create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'master', 'release/*',
+                                           ['user1'], 'tag_name')
+        self.assertEqual(actual, {})
+        mock_log.assert_any_call(type='warning', message='No branch matches target branch release/*')
+        mock_git_create_merge_request.assert_not_called()
+
+    @mock.patch('ci_helper.get_open_merge_requests', return_value={})
+    def test_one_target_branch_fails_must_still_merge_others(self, mock_get_open_merge_requests,
+                                                             mock_git_get_tag_release_description,
+                                                             mock_git_create_merge_request,
+                                                             mock_git_accept_merge_request):
+        mock_git_get_tag_release_description.return_value = ['version_changes']
+        mock_git_create_merge_request.side_effect = [HTTPError('url', 'cde', 'msg', 'hdrs', 'fp'), 'iid']
+        with self.assertRaises(HTTPError):
+            create_auto_merge_request('gitlab_endpoint', 'gitlab_token', 'project_id', 'master',
+                                      ['develop', 'release/1.0'], ['user1'], 'tag_name', max_workers=1)
+        mock_git_accept_merge_request.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                              'master', 'release/1.0', 'iid', timeout=600)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from urllib.error import URLError
+
+from ci_helper import deliver_release_hooks, enqueue_release_hooks
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestDeliverReleaseHooks(BaseTest):
+    """This class tests the enqueue_release_hooks and deliver_release_hooks methods"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue_path = os.path.join(self.directory.name, 'hooks.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def events(self):
+        connection = sqlite3.connect(self.queue_path)
+        try:
+            return connection.execute('SELECT url, attempts, delivered_at IS NOT NULL, last_error FROM events '
+                                      'ORDER BY id').fetchall()
+        finally:
+            connection.close()
+
+    def test_enqueue_must_write_one_event_per_url(self, mock_urlopen):
+        actual = enqueue_release_hooks(self.queue_path, ['https://chat', 'https://tracker'], {'tag_name': '1.2.3'})
+        self.assertEqual(actual, 2)
+        self.assertEqual(self.events(), [('https://chat', 0, 0, None), ('https://tracker', 0, 0, None)])
+        mock_urlopen.assert_not_called()
+
+    def test_must_post_payload_to_each_url(self, mock_urlopen):
+        enqueue_release_hooks(self.queue_path, ['https://chat', 'https://tracker'], {'tag_name': '1.2.3'})
+        actual = deliver_release_hooks(self.queue_path)
+        self.assertEqual(actual, 2)
+        requests = sorted((call[0][0] for call in mock_urlopen.call_args_list), key=lambda request: request.full_url)
+        self.assertEqual([request.full_url for request in requests], ['https://chat', 'https://tracker'])
+        self.assertEqual(json.loads(requests[0].data.decode('utf-8')), {'tag_name': '1.2.3'})
+        self.assertNotIn('Private-token', requests[0].headers)
+
+    def test_delivered_events_must_not_be_posted_again(self, mock_urlopen):
+        enqueue_release_hooks(self.queue_path, ['https://chat'], {'tag_name': '1.2.3'})
+        deliver_release_hooks(self.queue_path)
+        self.assertEqual(deliver_release_hooks(self.queue_path), 0)
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.assertEqual(self.events(), [('https://chat', 1, 1, None)])
+
+    def test_failed_event_must_be_retried_later(self, mock_urlopen):
+        mock_urlopen.side_effect = URLError('timed out')
+        enqueue_release_hooks(self.queue_path, ['https://chat'], {'tag_name': '1.2.3'})
+        actual = deliver_release_hooks(self.queue_path, wait=False)
+        self.assertEqual(actual, 0)
+        self.assertEqual(self.events(), [('https://chat', 1, 0, '<urlopen error timed out>')])
+        self.assertEqual(deliver_release_hooks(self.queue_path, wait=False), 0)
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+    @mock.patch('ci_helper.time.sleep')
+    @mock.patch('ci_helper.time.time')
+    def test_wait_must_retry_until_delivered(self, mock_time, mock_sleep, mock_urlopen):
+        clock = [100.0]
+        mock_time.side_effect = lambda: clock[0]
+        mock_sleep.side_effect = lambda delay: clock.__setitem__(0, clock[0] + delay)
+        mock_urlopen.side_effect = [URLError('timed out'), mock.MagicMock()]
+        enqueue_release_hooks(self.queue_path, ['https://chat'], {'tag_name': '1.2.3'})
+        actual = deliver_release_hooks(self.queue_path)
+        self.assertEqual(actual, 1)
+        mock_sleep.assert_called_once_with(1.0)
+        self.assertEqual(self.events(), [('https://chat', 2, 1, None)])
+
+    @mock.patch('ci_helper.time.sleep')
+    def test_exhausted_event_must_not_be_retried(self, mock_sleep, mock_urlopen):
+        mock_urlopen.side_effect = URLError('timed out')
+        enqueue_release_hooks(self.queue_path, ['https://chat'], {'tag_name': '1.2.3'})
+        deliver_release_hooks(self.queue_path, max_attempts=1)
+        mock_sleep.assert_not_called()
+        self.assertEqual(self.events(), [('https://chat', 1, 0, '<urlopen error timed out>')])
+
+
+if __name__ == '__main__':
+    unittest.main()
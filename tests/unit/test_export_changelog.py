@@ -0,0 +1,45 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import unittest
+from unittest import mock
+
+from ci_helper import export_changelog, ChangelogEntry
+from tests.unit import BaseTest
+
+
+class TestExportChangelog(BaseTest):
+    """This class tests the export_changelog method"""
+
+    @mock.patch('ci_helper.parse_changelog')
+    def test_json_must_write_array(self, mock_parse_changelog):
+        mock_parse_changelog.return_value = iter([ChangelogEntry('1.0.1', ['b'], 'date2', 0, 10),
+                                                  ChangelogEntry('1.0.0', ['a'], 'date1', 10, 10)])
+        output = io.StringIO()
+        export_changelog('file', 'json', output=output)
+        self.assertEqual(json.loads(output.getvalue()), [{'version': '1.0.1', 'date': 'date2', 'changes': ['b']},
+                                                         {'version': '1.0.0', 'date': 'date1', 'changes': ['a']}])
+
+    @mock.patch('ci_helper.parse_changelog', return_value=iter([]))
+    def test_empty_changelog_must_write_empty_array(self, mock_parse_changelog):
+        output = io.StringIO()
+        export_changelog('file', 'json', output=output)
+        self.assertEqual(json.loads(output.getvalue()), [])
+
+    @mock.patch('ci_helper.parse_changelog', return_value=iter([]))
+    def test_limit_must_be_given_to_parser(self, mock_parse_changelog):
+        export_changelog('file', 'markdown', limit=3, output=io.StringIO())
+        mock_parse_changelog.assert_called_once_with('file', limit=3)
+
+    @mock.patch('ci_helper.parse_changelog')
+    def test_markdown_must_write_entries(self, mock_parse_changelog):
+        mock_parse_changelog.return_value = iter([ChangelogEntry('1.0.0', ['a'], 'date', 0, 10)])
+        output = io.StringIO()
+        export_changelog('file', 'markdown', output=output)
+        self.assertEqual(output.getvalue(), '1.0.0\n\n  - a\n\ndate\n\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import sqlite3
 import unittest
 from unittest import mock
 
@@ -55,6 +56,45 @@ class TestGenerateChangelog(BaseTest):
         handle.write.assert_called_once_with(
             'version\n\n  - version_changes\n\nWed, Feb 15 2017 13:05:12  \n\nold_content')
 
+    @mock.patch('ci_helper.splice_changelog_entry')
+    @mock.patch('ci_helper.datetime')
+    def test_output_file_paths_must_splice_entry_in_each_format(self, mock_datetime, mock_splice_changelog_entry):
+        self.mock_utcnow(mock_datetime)
+        mock_file_open = mock.mock_open(read_data='')
+        with mock.patch('ci_helper.open', mock_file_open, create=True):
+            generate_changelog('version', ['version_changes'], 'file', {'html': 'file.html', 'json': 'file.json'})
+        mock_splice_changelog_entry.assert_any_call(mock.ANY, 'file.html', 'html')
+        mock_splice_changelog_entry.assert_any_call(
+            '{"version": "version", "date": "Wed, Feb 15 2017 13:05:12  ", "changes": ["version_changes"]}',
+            'file.json', 'json')
+
+    @mock.patch('ci_helper.datetime')
+    def test_store_path_must_insert_entry_in_store(self, mock_datetime):
+        self.mock_utcnow(mock_datetime)
+        mock_file_open = mock.mock_open(read_data='')
+        with mock.patch('ci_helper.open', mock_file_open, create=True):
+            generate_changelog('1.2.3', ['change1', 'change2'], 'file', store_path=':memory:')
+        mock_file_open().write.assert_called_once_with('1.2.3\n\n  - change1\n  - change2\n\n'
+                                                       'Wed, Feb 15 2017 13:05:12  \n\n')
+
+    @mock.patch('ci_helper.datetime')
+    def test_duplicated_store_entry_must_not_write_file(self, mock_datetime):
+        self.mock_utcnow(mock_datetime)
+        mock_file_open = mock.mock_open(read_data='')
+        with mock.patch('ci_helper._insert_changelog_store_entry', side_effect=sqlite3.IntegrityError):
+            with mock.patch('ci_helper.open', mock_file_open, create=True):
+                with self.assertRaises(sqlite3.IntegrityError):
+                    generate_changelog('1.2.3', ['change'], 'file', store_path=':memory:')
+        mock_file_open.assert_not_called()
+
+    @mock.patch('ci_helper.index_changelog_entry')
+    @mock.patch('ci_helper.datetime')
+    def test_index_path_must_index_entry(self, mock_datetime, mock_index_changelog_entry):
+        self.mock_utcnow(mock_datetime)
+        with mock.patch('ci_helper.open', mock.mock_open(read_data=''), create=True):
+            generate_changelog('1.2.3', ['change'], 'file', index_path='index.db')
+        mock_index_changelog_entry.assert_called_once_with('index.db', '1.2.3', ['change'], source='changelog')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,30 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from ci_helper import get_changed_paths
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestGetChangedPaths(BaseTest):
+    """This class tests the get_changed_paths method"""
+
+    def test_must_return_old_and_new_paths(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(
+            b'[{"old_path": "a.py", "new_path": "a.py"}, {"old_path": "old/b.py", "new_path": "new/b.py"}]')
+        self.assertEqual(get_changed_paths('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha'),
+                         {'a.py', 'old/b.py', 'new/b.py'})
+
+    def test_must_request_commit_diff(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'[]')
+        get_changed_paths('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
+        self.assertEqual(mock_urlopen.call_args[0][0].full_url,
+                         'https://gitlab.com/api/v4/projects/project_id/repository/commits/commit_sha/diff'
+                         '?per_page=100&page=1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -45,6 +45,22 @@ class TestGetCommitChanges(BaseTest):
         get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
         self.assertEqual(mock_urlopen.call_args[0][0].method, 'GET')
 
+    def test_data_source_answer_must_not_request_api(self, mock_urlopen, mock_clean_content):
+        data_source = mock.Mock()
+        data_source.commit_title.return_value = 'title'
+        get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha',
+                           data_source=data_source)
+        data_source.commit_title.assert_called_once_with('commit_sha')
+        self.assertFalse(mock_urlopen.called)
+
+    def test_data_source_without_answer_must_request_api(self, mock_urlopen, mock_clean_content):
+        data_source = mock.Mock()
+        data_source.commit_title.return_value = None
+        mock_urlopen.return_value = self.mock_read(b'{"title": "title"}')
+        get_commit_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha',
+                           data_source=data_source)
+        self.assertTrue(mock_urlopen.called)
+
 
 if __name__ == '__main__':
     unittest.main()
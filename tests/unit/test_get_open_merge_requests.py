@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+import ci_helper
+from ci_helper import get_open_merge_requests
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestGetOpenMergeRequests(BaseTest):
+    """This class tests the get_open_merge_requests method"""
+
+    def setUp(self):
+        super().setUp()
+        ci_helper._OPEN_MERGE_REQUESTS.clear()
+
+    def test_must_index_by_source_and_target_branches(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(
+            b'[{"iid": 1, "source_branch": "master", "target_branch": "develop"},'
+            b' {"iid": 2, "source_branch": "master", "target_branch": "release/1.0"}]')
+        actual = get_open_merge_requests('https://gitlab.com', 'gitlab_token', 'project_id', 'master')
+        self.assertEqual(sorted(actual), [('master', 'develop'), ('master', 'release/1.0')])
+        self.assertEqual(actual[('master', 'release/1.0')]['iid'], 2)
+
+    def test_must_request_open_merge_requests_of_source_branch(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'[]')
+        get_open_merge_requests('https://gitlab.com', 'gitlab_token', 'project_id', 'master')
+        self.assertEqual(mock_urlopen.call_args[0][0].full_url,
+                         'https://gitlab.com/api/v4/projects/project_id/merge_requests'
+                         '?state=opened&source_branch=master&per_page=100&page=1')
+
+    def test_must_follow_pages(self, mock_urlopen):
+        page = ','.join('{{"iid": {0}, "source_branch": "s", "target_branch": "t{0}"}}'.format(iid)
+                        for iid in range(100))
+        mock_urlopen.side_effect = [self.mock_read('[{}]'.format(page).encode('utf-8')), self.mock_read(b'[]')]
+        actual = get_open_merge_requests('https://gitlab.com', 'gitlab_token', 'project_id')
+        self.assertEqual(len(actual), 100)
+        self.assertEqual(mock_urlopen.call_count, 2)
+
+    def test_second_lookup_must_be_cached(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'[]')
+        get_open_merge_requests('https://gitlab.com', 'gitlab_token', 'project_id', 'master')
+        get_open_merge_requests('https://gitlab.com', 'gitlab_token', 'project_id', 'master')
+        self.assertEqual(mock_urlopen.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
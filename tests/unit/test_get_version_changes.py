@@ -37,7 +37,7 @@ class TestGetVersionChanges(BaseTest):
     def test_has_merge_request_changes_must_call_get_merge_request_changes(self, mock_get_merge_request_changes):
         get_version_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
         mock_get_merge_request_changes.assert_called_once_with(
-            'https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
+            'https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha', data_source=None)
 
     @mock.patch('ci_helper.get_merge_request_changes', return_value=['changes'])
     def test_has_merge_request_changes_must_return_merge_request_changes(self, mock_get_merge_request_changes):
@@ -50,7 +50,7 @@ class TestGetVersionChanges(BaseTest):
                                                                               mock_get_commit_changes):
         get_version_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
         mock_get_commit_changes.assert_called_once_with(
-            'https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha')
+            'https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha', data_source=None)
 
     @mock.patch('ci_helper.get_merge_request_changes', return_value=[])
     @mock.patch('ci_helper.get_commit_changes', return_value=['changes'])
@@ -6,7 +6,7 @@ import unittest
 from unittest import mock
 from urllib.error import HTTPError
 
-from ci_helper import git_accept_merge_request
+from ci_helper import git_accept_merge_request, MergeError
 from tests.unit import BaseTest
 
 
@@ -52,6 +52,52 @@ class TestGitAcceptMergeRequest(BaseTest):
         self.assertEqual(json.loads(decoded_data).get('merge_commit_message'),
                          'Automatic merge branch \'source_branch\' into \'target_branch\'')
 
+    def test_request_must_contain_body_with_merge_when_pipeline_succeeds(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{}')
+        git_accept_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
+                                 'iid')
+        decoded_data = mock_urlopen.call_args[0][0].data.decode('utf-8')
+        self.assertTrue(json.loads(decoded_data).get('merge_when_pipeline_succeeds'))
+
+    @mock.patch('ci_helper.time.sleep')
+    def test_not_mergeable_yet_must_poll_and_retry(self, mock_sleep, mock_urlopen):
+        checking = self.mock_read(b'{"state": "opened", "merge_status": "checking"}')
+        checking.headers.items.return_value = [('ETag', 'W/"etag"')]
+        mock_urlopen.side_effect = [HTTPError('url', 405, 'msg', 'hdrs', None), checking,
+                                    HTTPError('url', 304, 'msg', 'hdrs', None),
+                                    self.mock_read(b'{"state": "opened", "merge_status": "can_be_merged"}'),
+                                    self.mock_read(b'{}')]
+        git_accept_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
+                                 'iid')
+        self.assertEqual(mock_urlopen.call_count, 5)
+        requests = [call[0][0] for call in mock_urlopen.call_args_list]
+        self.assertEqual([request.method for request in requests], ['PUT', 'GET', 'GET', 'GET', 'PUT'])
+        self.assertEqual(requests[1].full_url, 'https://gitlab.com/api/v4/projects/project_id/merge_requests/iid')
+        self.assertEqual(requests[2].headers['If-none-match'], 'W/"etag"')
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [2, 2, 4])
+
+    @mock.patch('ci_helper.time.sleep')
+    def test_merged_while_polling_must_stop(self, mock_sleep, mock_urlopen):
+        mock_urlopen.side_effect = [HTTPError('url', 406, 'msg', 'hdrs', None), self.mock_read(b'{"state": "merged"}')]
+        git_accept_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch', 'target_branch',
+                                 'iid')
+        self.assertEqual(mock_urlopen.call_count, 2)
+
+    @mock.patch('ci_helper.time.sleep')
+    def test_conflicts_must_raise_merge_error(self, mock_sleep, mock_urlopen):
+        mock_urlopen.side_effect = [HTTPError('url', 406, 'msg', 'hdrs', None),
+                                    self.mock_read(b'{"state": "opened", "has_conflicts": true}')]
+        with self.assertRaises(MergeError):
+            git_accept_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch',
+                                     'target_branch', 'iid')
+
+    def test_no_timeout_must_raise_http_error(self, mock_urlopen):
+        mock_urlopen.side_effect = HTTPError('url', 405, 'msg', 'hdrs', None)
+        with self.assertRaises(HTTPError):
+            git_accept_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch',
+                                     'target_branch', 'iid', timeout=0)
+        self.assertEqual(mock_urlopen.call_count, 1)
+
 
 if __name__ == '__main__':
     unittest.main()
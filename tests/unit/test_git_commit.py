@@ -8,6 +8,8 @@ from unittest import mock
 from ci_helper import git_commit, CommitError
 from tests.unit import BaseTest
 
+POPEN_ARGUMENTS = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=None, start_new_session=True)
+
 
 @mock.patch('ci_helper.subprocess.Popen')
 class TestGitCommit(BaseTest):
@@ -16,17 +18,22 @@ class TestGitCommit(BaseTest):
     def test_must_call_git_add_file(self, mock_popen):
         mock_popen.return_value = self.mock_process(0)
         git_commit('branch', 'file')
-        mock_popen.assert_any_call(['git', 'add', 'file'], stdout=subprocess.PIPE)
+        mock_popen.assert_any_call(['git', 'add', 'file'], **POPEN_ARGUMENTS)
+
+    def test_extra_file_paths_must_be_added_in_same_call(self, mock_popen):
+        mock_popen.return_value = self.mock_process(0)
+        git_commit('branch', 'file', 'file.json', 'file.html')
+        mock_popen.assert_any_call(['git', 'add', 'file', 'file.json', 'file.html'], **POPEN_ARGUMENTS)
 
     def test_must_call_git_commit(self, mock_popen):
         mock_popen.return_value = self.mock_process(0)
         git_commit('branch', 'file')
-        mock_popen.assert_any_call(['git', 'commit', '-m', 'Update changelog (branch)'], stdout=subprocess.PIPE)
+        mock_popen.assert_any_call(['git', 'commit', '-m', 'Update changelog (branch)'], **POPEN_ARGUMENTS)
 
     def test_must_call_git_log(self, mock_popen):
         mock_popen.return_value = self.mock_process(0, [b'commit_sha\n'])
         git_commit('branch', 'file')
-        mock_popen.assert_any_call(['git', 'log', '--format=%H', '-n', '1'], stdout=subprocess.PIPE)
+        mock_popen.assert_any_call(['git', 'log', '--format=%H', '-n', '1'], **POPEN_ARGUMENTS)
 
     def test_must_return_commit_sha(self, mock_popen):
         mock_popen.return_value = self.mock_process(0, [b'commit_sha\n'])
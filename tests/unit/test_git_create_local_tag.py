@@ -0,0 +1,30 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import subprocess
+import unittest
+from unittest import mock
+
+from ci_helper import git_create_local_tag, CommitError
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.subprocess.Popen')
+class TestGitCreateLocalTag(BaseTest):
+    """This class tests the git_create_local_tag method"""
+
+    def test_must_create_annotated_tag_with_release_description(self, mock_popen):
+        mock_popen.return_value = self.mock_process(0)
+        git_create_local_tag('commit_sha', ['chng1', 'chng2'], '1.2.3')
+        mock_popen.assert_called_once_with(['git', 'tag', '--force', '--annotate', '1.2.3', '--message',
+                                            '- chng1\n- chng2', 'commit_sha'], stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE, cwd=None, start_new_session=True)
+
+    def test_process_return_code_not_zero_must_raise_commit_error(self, mock_popen):
+        mock_popen.return_value = self.mock_process(128)
+        with self.assertRaises(CommitError):
+            git_create_local_tag('commit_sha', ['chng1'], '1.2.3')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import unittest
 from unittest import mock
 from urllib.error import HTTPError
 
+import ci_helper
 from ci_helper import git_create_merge_request
 from tests.unit import BaseTest
 
@@ -14,6 +15,10 @@ from tests.unit import BaseTest
 class TestGitCreateMergeRequest(BaseTest):
     """This class tests the git_create_merge_request method"""
 
+    def setUp(self):
+        super().setUp()
+        ci_helper._OPEN_MERGE_REQUESTS.clear()
+
     def test_error_on_request_must_raise_http_error(self, mock_urlopen):
         mock_urlopen.side_effect = HTTPError('url', 'cde', 'msg', 'hdrs', 'fp')
         with self.assertRaises(HTTPError):
@@ -109,6 +114,35 @@ class TestGitCreateMergeRequest(BaseTest):
         decoded_data = mock_urlopen.call_args[0][0].data.decode('utf-8')
         self.assertEqual(json.loads(decoded_data).get('description'), '- version_changes')
 
+    def test_existing_merge_request_in_index_must_be_updated(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"iid": "iid"}')
+        actual = git_create_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch',
+                                          'target_branch', [], ['version_changes'],
+                                          merge_request_index={('source_branch', 'target_branch'): {'iid': 7}})
+        self.assertEqual(actual, 7)
+        self.assertEqual(mock_urlopen.call_count, 1)
+        self.assertEqual(mock_urlopen.call_args[0][0].method, 'PUT')
+        self.assertEqual(mock_urlopen.call_args[0][0].full_url,
+                         'https://gitlab.com/api/v4/projects/project_id/merge_requests/7')
+        decoded_data = mock_urlopen.call_args[0][0].data.decode('utf-8')
+        self.assertEqual(json.loads(decoded_data).get('description'), '- version_changes')
+
+    def test_conflict_must_reuse_existing_merge_request(self, mock_urlopen):
+        mock_urlopen.side_effect = [
+            HTTPError('url', 409, 'msg', 'hdrs', None),
+            self.mock_read(b'[{"iid": 7, "source_branch": "source_branch", "target_branch": "target_branch"}]'),
+            self.mock_read(b'{"iid": 7}')]
+        actual = git_create_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch',
+                                          'target_branch', [], ['version_changes'])
+        self.assertEqual(actual, 7)
+        self.assertEqual([call[0][0].method for call in mock_urlopen.call_args_list], ['POST', 'GET', 'PUT'])
+
+    def test_conflict_without_existing_merge_request_must_raise_http_error(self, mock_urlopen):
+        mock_urlopen.side_effect = [HTTPError('url', 409, 'msg', 'hdrs', None), self.mock_read(b'[]')]
+        with self.assertRaises(HTTPError):
+            git_create_merge_request('https://gitlab.com', 'gitlab_token', 'project_id', 'source_branch',
+                                     'target_branch', [], ['version_changes'])
+
 
 if __name__ == '__main__':
     unittest.main()
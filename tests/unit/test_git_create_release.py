@@ -0,0 +1,40 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+from unittest import mock
+from urllib.error import HTTPError
+
+from ci_helper import git_create_release
+from tests.unit import BaseTest
+
+
+@mock.patch('ci_helper.urlopen')
+class TestGitCreateRelease(BaseTest):
+    """This class tests the git_create_release method"""
+
+    def test_must_request_releases_api(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{}')
+        git_create_release('https://gitlab.com', 'gitlab_token', 'project_id', ['chng1', 'chng2'], '1.2.3')
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.full_url, 'https://gitlab.com/api/v4/projects/project_id/releases')
+        self.assertEqual(request.get_method(), 'POST')
+        self.assertEqual(json.loads(request.data.decode('utf-8')),
+                         {'tag_name': '1.2.3', 'name': '1.2.3', 'description': '- chng1\n- chng2'})
+
+    def test_error_on_request_must_raise_http_error(self, mock_urlopen):
+        mock_urlopen.side_effect = HTTPError('url', 409, 'msg', 'hdrs', None)
+        with self.assertRaises(HTTPError):
+            git_create_release('https://gitlab.com', 'gitlab_token', 'project_id', ['chng1'], '1.2.3')
+
+    @mock.patch('ci_helper.index_changelog_entry')
+    def test_index_path_must_index_release_description(self, mock_index_changelog_entry, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{}')
+        git_create_release('https://gitlab.com', 'gitlab_token', 'project_id', ['chng1'], '1.2.3',
+                           index_path='index.db')
+        mock_index_changelog_entry.assert_called_once_with('index.db', '1.2.3', ['chng1'], source='tag')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -73,6 +73,19 @@ class TestGitCreateTag(BaseTest):
         decoded_data = mock_urlopen.call_args[0][0].data.decode('utf-8')
         self.assertEqual(json.loads(decoded_data).get('release_description'), '- chng1\n- chng2')
 
+    def test_request_must_contain_body_with_message(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"iid": "iid"}')
+        git_create_tag('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha', ['chng1', 'chng2'], 'tag_name')
+        decoded_data = mock_urlopen.call_args[0][0].data.decode('utf-8')
+        self.assertEqual(json.loads(decoded_data).get('message'), '- chng1\n- chng2')
+
+    @mock.patch('ci_helper.index_changelog_entry')
+    def test_index_path_must_index_release_description(self, mock_index_changelog_entry, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"iid": "iid"}')
+        git_create_tag('https://gitlab.com', 'gitlab_token', 'project_id', 'commit_sha', ['chng1'], '1.2.3',
+                       index_path='index.db')
+        mock_index_changelog_entry.assert_called_once_with('index.db', '1.2.3', ['chng1'], source='tag')
+
 
 if __name__ == '__main__':
     unittest.main()
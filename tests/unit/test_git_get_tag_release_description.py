@@ -49,6 +49,29 @@ class TestGitGetTagReleaseDescription(BaseTest):
         git_get_tag_release_description('https://gitlab.com', 'gitlab_token', 'project_id', 'tag_name')
         self.assertEqual(mock_urlopen.call_args[0][0].method, 'GET')
 
+    def test_data_source_answer_must_not_request_api(self, mock_urlopen):
+        data_source = mock.Mock()
+        data_source.tag_message.return_value = 'description'
+        git_get_tag_release_description('https://gitlab.com', 'gitlab_token', 'project_id', 'tag_name',
+                                        data_source=data_source)
+        data_source.tag_message.assert_called_once_with('tag_name')
+        self.assertFalse(mock_urlopen.called)
+
+    def test_data_source_empty_answer_must_not_request_api(self, mock_urlopen):
+        data_source = mock.Mock()
+        data_source.tag_message.return_value = ''
+        self.assertEqual(git_get_tag_release_description('https://gitlab.com', 'gitlab_token', 'project_id',
+                                                         'tag_name', data_source=data_source), [])
+        self.assertFalse(mock_urlopen.called)
+
+    def test_data_source_without_answer_must_request_api(self, mock_urlopen):
+        data_source = mock.Mock()
+        data_source.tag_message.return_value = None
+        mock_urlopen.return_value = self.mock_read(b'{"release": null}')
+        git_get_tag_release_description('https://gitlab.com', 'gitlab_token', 'project_id', 'tag_name',
+                                        data_source=data_source)
+        self.assertTrue(mock_urlopen.called)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,8 @@ from unittest import mock
 from ci_helper import git_push, PushError
 from tests.unit import BaseTest
 
+POPEN_ARGUMENTS = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=None, start_new_session=True)
+
 
 @mock.patch('ci_helper.subprocess.Popen')
 class TestGitPush(BaseTest):
@@ -16,7 +18,13 @@ class TestGitPush(BaseTest):
     def test_must_call_git_push(self, mock_popen):
         mock_popen.return_value = self.mock_process(0)
         git_push('target_branch')
-        mock_popen.assert_any_call(['git', 'push', 'origin', 'target_branch'], stdout=subprocess.PIPE)
+        mock_popen.assert_any_call(['git', 'push', 'origin', 'target_branch'], **POPEN_ARGUMENTS)
+
+    def test_tags_must_be_pushed_atomically_with_branch(self, mock_popen):
+        mock_popen.return_value = self.mock_process(0)
+        git_push('target_branch', '1.2.3')
+        mock_popen.assert_any_call(['git', 'push', '--atomic', 'origin', 'target_branch', 'refs/tags/1.2.3'],
+                                   **POPEN_ARGUMENTS)
 
     def test_process_return_code_not_zero_must_raise_push_error(self, mock_popen):
         mock_popen.return_value = self.mock_process(123)
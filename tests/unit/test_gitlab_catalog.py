@@ -0,0 +1,137 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from urllib.error import URLError
+from urllib.parse import parse_qs, urlsplit
+
+from ci_helper import GitlabCatalog, get_version_changes
+from tests.unit import BaseTest
+
+MERGE_REQUESTS = [{'iid': 1, 'merge_commit_sha': 'merge1', 'squash_commit_sha': None, 'description': '- Fix 1',
+                   'updated_at': '2017-02-01T10:00:00.000Z'},
+                  {'iid': 2, 'merge_commit_sha': None, 'squash_commit_sha': 'squash2', 'description': '- Fix 2',
+                   'updated_at': '2017-02-02T10:00:00.000Z'},
+                  {'iid': 3, 'merge_commit_sha': 'merge3', 'squash_commit_sha': None, 'description': '- Fix 3',
+                   'updated_at': '2017-02-03T10:00:00.000Z'}]
+
+COMMITS = [{'id': 'commit2', 'title': 'Second commit', 'committed_date': '2017-02-02T10:00:00.000+00:00'},
+           {'id': 'commit1', 'title': 'First commit', 'committed_date': '2017-02-01T10:00:00.000+00:00'}]
+
+TAGS = [{'name': '1.0.1', 'commit': {'id': 'commit2'}, 'release': {'description': '- Fix 2'}},
+        {'name': '1.0.0', 'commit': {'id': 'commit1'}, 'release': None}]
+
+
+class TestGitlabCatalog(BaseTest):
+    """This class tests the GitlabCatalog class"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.catalog_path = os.path.join(self.directory.name, 'catalog.db')
+        self.merge_requests, self.commits, self.tags = list(MERGE_REQUESTS), list(COMMITS), list(TAGS)
+        self.urls = []
+        patcher = mock.patch('ci_helper._request', side_effect=self.request)
+        self.mock_request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def request(self, url, gitlab_token, method='GET', data=None, headers=None, response_headers=None):
+        self.urls.append(url)
+        path, query = urlsplit(url).path, {key: value[0] for key, value in parse_qs(urlsplit(url).query).items()}
+        if path.endswith('/merge_requests'):
+            items = [item for item in self.merge_requests if item['updated_at'] >= query.get('updated_after', '')]
+        elif path.endswith('/repository/commits'):
+            items = [item for item in self.commits if item['committed_date'] >= query.get('since', '')]
+        else:
+            items = self.tags
+        per_page, page = int(query['per_page']), int(query['page'])
+        return items[(page - 1) * per_page:page * per_page]
+
+    def catalog(self, **kwargs):
+        catalog = GitlabCatalog(self.catalog_path, 'https://gitlab.com', 'gitlab_token', 'project_id', per_page=2,
+                                **kwargs)
+        self.addCleanup(catalog.close)
+        return catalog
+
+    def test_first_sync_must_fetch_everything(self):
+        actual = self.catalog().sync()
+        self.assertEqual(actual, {'merge_requests': 3, 'commits': 2, 'tags': 2})
+
+    def test_merge_requests_must_be_requested_by_updated_at(self):
+        self.catalog().sync()
+        query = parse_qs(urlsplit(self.urls[0]).query)
+        self.assertEqual(query['state'], ['merged'])
+        self.assertEqual(query['order_by'], ['updated_at'])
+        self.assertEqual(query['sort'], ['asc'])
+        self.assertEqual(parse_qs(urlsplit(self.urls[1]).query)['updated_after'], ['2017-02-02T10:00:00.000Z'])
+
+    def test_warm_sync_must_request_each_resource_once(self):
+        self.catalog().sync()
+        self.urls = []
+        actual = self.catalog().sync()
+        self.assertEqual(len(self.urls), 3)
+        self.assertEqual(actual, {'merge_requests': 0, 'commits': 0, 'tags': 0})
+        self.assertEqual(parse_qs(urlsplit(self.urls[0]).query)['updated_after'], ['2017-02-03T10:00:00.000Z'])
+        self.assertEqual(parse_qs(urlsplit(self.urls[1]).query)['since'], ['2017-02-02T10:00:00.000+00:00'])
+
+    def test_sync_must_update_changed_items(self):
+        self.catalog().sync()
+        self.merge_requests.append(dict(MERGE_REQUESTS[0], description='- Fix 1 again',
+                                        updated_at='2017-02-04T10:00:00.000Z'))
+        self.tags.insert(0, {'name': '1.0.2', 'commit': {'id': 'commit3'}, 'release': {'description': '- New'}})
+        catalog = self.catalog()
+        self.assertEqual(catalog.merge_request_description('merge1'), '- Fix 1 again')
+        self.assertEqual(catalog.tag_message('1.0.2'), '- New')
+
+    def test_tags_not_listed_by_sync_must_return_none(self):
+        self.tags[:0] = [{'name': '1.0.3', 'commit': {'id': 'commit4'}, 'release': {'description': '- New'}},
+                         {'name': '1.0.2', 'commit': {'id': 'commit3'}, 'release': None}]
+        self.catalog().sync()
+        self.tags[2] = dict(TAGS[0], release={'description': '- Fix 2 republished'})
+        catalog = self.catalog()
+        self.assertEqual(catalog.sync()['tags'], 0)
+        self.assertEqual(catalog.tag_message('1.0.3'), '- New')
+        self.assertIsNone(catalog.tag_message('1.0.1'))
+
+    def test_lookups_must_answer_from_catalog(self):
+        catalog = self.catalog()
+        self.assertEqual(catalog.merge_request_description('merge1'), '- Fix 1')
+        self.assertEqual(catalog.merge_request_description('squash2'), '- Fix 2')
+        self.assertEqual(catalog.commit_title('commit1'), 'First commit')
+        self.assertEqual(catalog.tag_message('1.0.1'), '- Fix 2')
+        self.assertIsNone(catalog.open_merge_requests('branch'))
+
+    def test_unknown_items_must_return_none(self):
+        catalog = self.catalog()
+        self.assertIsNone(catalog.merge_request_description('unknown'))
+        self.assertIsNone(catalog.commit_title('unknown'))
+        self.assertIsNone(catalog.tag_message('unknown'))
+
+    def test_lookups_must_sync_only_once(self):
+        catalog = self.catalog()
+        catalog.commit_title('commit1')
+        count = len(self.urls)
+        catalog.commit_title('commit2')
+        self.assertEqual(len(self.urls), count)
+
+    def test_failed_sync_must_use_catalog_as_is(self):
+        self.catalog().sync()
+        self.mock_request.side_effect = URLError('unreachable')
+        self.assertEqual(self.catalog().commit_title('commit2'), 'Second commit')
+
+    def test_catalog_must_be_used_as_data_source(self):
+        actual = get_version_changes('https://gitlab.com', 'gitlab_token', 'project_id', 'merge3',
+                                     data_source=self.catalog())
+        self.assertEqual(actual, ['Fix 3'])
+        self.assertFalse(any('/merge_requests?' in url and 'state' not in url for url in self.urls))
+
+
+if __name__ == '__main__':
+    unittest.main()
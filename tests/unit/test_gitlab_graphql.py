@@ -0,0 +1,100 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+from unittest import mock
+from urllib.error import HTTPError
+
+from ci_helper import GitlabGraphQL, get_version_changes
+from tests.unit import BaseTest
+
+RESPONSE = json.dumps({'data': {'projects': {'nodes': [{
+    'mergedMergeRequests': {'nodes': [{'mergeCommitSha': 'other', 'description': 'other'},
+                                      {'mergeCommitSha': 'merge_sha', 'description': '- change1\n- change2'}]},
+    'commit0': {'tree': {'lastCommit': {'sha': 'merge_sha', 'title': 'Merge branch'}}},
+    'commit1': {'tree': {'lastCommit': {'sha': 'commit_sha', 'title': 'Fix bug'}}},
+    'tag0': {'description': '- change3'},
+    'tag1': None,
+    'openMergeRequests': {'nodes': [{'iid': '7', 'sourceBranch': 'master', 'targetBranch': 'develop'}]}
+}]}}}).encode('utf-8')
+
+
+@mock.patch('ci_helper.urlopen')
+class TestGitlabGraphQL(BaseTest):
+    """This class tests the GitlabGraphQL class"""
+
+    def setUp(self):
+        super().setUp()
+        self.data_source = GitlabGraphQL('https://gitlab.com', 'gitlab_token', '42',
+                                         commit_shas=['merge_sha', 'commit_sha'], tag_names=['1.0.0', '1.0.1'],
+                                         source_branch='master')
+
+    def test_must_send_a_single_query(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(RESPONSE)
+        self.data_source.merge_request_description('merge_sha')
+        self.data_source.commit_title('commit_sha')
+        self.data_source.tag_message('1.0.0')
+        self.data_source.open_merge_requests('master')
+        mock_urlopen.assert_called_once()
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.full_url, 'https://gitlab.com/api/graphql')
+        self.assertEqual(request.get_method(), 'POST')
+        query = json.loads(request.data.decode('utf-8'))['query']
+        self.assertIn('projects(ids: ["gid://gitlab/Project/42"])', query)
+        self.assertIn('commit1: repository { tree(ref: "commit_sha")', query)
+        self.assertIn('tag0: release(tagName: "1.0.0") { description }', query)
+        self.assertIn('sourceBranches: ["master"]', query)
+
+    def test_full_path_project_must_be_queried_by_path(self, mock_urlopen):
+        data_source = GitlabGraphQL('https://gitlab.com', 'gitlab_token', 'group%2Fproject', tag_names=['1.0.0'],
+                                    graphql_endpoint='http://localhost:8080/graphql')
+        mock_urlopen.return_value = self.mock_read(b'{"data": {"project": {"tag0": {"description": "- change"}}}}')
+        self.assertEqual(data_source.tag_message('1.0.0'), '- change')
+        request = mock_urlopen.call_args[0][0]
+        self.assertEqual(request.full_url, 'http://localhost:8080/graphql')
+        self.assertIn('project(fullPath: "group/project")', json.loads(request.data.decode('utf-8'))['query'])
+
+    def test_must_answer_fetched_fields(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(RESPONSE)
+        self.assertEqual(self.data_source.merge_request_description('merge_sha'), '- change1\n- change2')
+        self.assertIsNone(self.data_source.merge_request_description('commit_sha'))
+        self.assertEqual(self.data_source.commit_title('commit_sha'), 'Fix bug')
+        self.assertEqual(self.data_source.tag_message('1.0.0'), '- change3')
+        self.assertIsNone(self.data_source.tag_message('1.0.1'))
+        self.assertEqual(self.data_source.open_merge_requests('master'),
+                         {('master', 'develop'): {'iid': 7, 'source_branch': 'master', 'target_branch': 'develop'}})
+
+    def test_unfetched_fields_must_return_none(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(RESPONSE)
+        self.assertIsNone(self.data_source.merge_request_description('unknown'))
+        self.assertIsNone(self.data_source.commit_title('unknown'))
+        self.assertIsNone(self.data_source.tag_message('unknown'))
+        self.assertIsNone(self.data_source.open_merge_requests('develop'))
+
+    def test_failed_query_must_return_none(self, mock_urlopen):
+        mock_urlopen.side_effect = HTTPError('url', 500, 'msg', 'hdrs', 'fp')
+        self.assertIsNone(self.data_source.commit_title('commit_sha'))
+        self.assertIsNone(self.data_source.tag_message('1.0.0'))
+        mock_urlopen.assert_called_once()
+
+    def test_query_errors_must_return_none(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(b'{"data": null, "errors": [{"message": "boom"}]}')
+        self.assertIsNone(self.data_source.commit_title('commit_sha'))
+
+    def test_get_version_changes_must_not_call_rest_api(self, mock_urlopen):
+        mock_urlopen.return_value = self.mock_read(RESPONSE)
+        self.assertEqual(get_version_changes('https://gitlab.com', 'gitlab_token', '42', 'merge_sha',
+                                             data_source=self.data_source), ['change1', 'change2'])
+        mock_urlopen.assert_called_once()
+
+    def test_merge_request_not_fetched_must_fall_back_to_rest_api(self, mock_urlopen):
+        mock_urlopen.side_effect = [self.mock_read(RESPONSE), self.mock_read(b'[]')]
+        self.assertEqual(get_version_changes('https://gitlab.com', 'gitlab_token', '42', 'commit_sha',
+                                             data_source=self.data_source), ['Fix bug'])
+        self.assertEqual(mock_urlopen.call_args[0][0].full_url,
+                         'https://gitlab.com/api/v4/projects/42/merge_requests')
+
+
+if __name__ == '__main__':
+    unittest.main()
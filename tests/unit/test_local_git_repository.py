@@ -0,0 +1,66 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+from ci_helper import LocalGitRepository
+from tests.unit import BaseTest
+
+
+class TestLocalGitRepository(BaseTest):
+    """This class tests the LocalGitRepository class"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'bot@example.com')
+        self.git('config', 'user.name', 'Bot')
+        self.commit_shas = []
+        for title in ['First change', 'Second change']:
+            self.git('commit', '-q', '--allow-empty', '-m', '{}\n\nSome body'.format(title))
+            self.commit_shas.append(self.git('rev-parse', 'HEAD').strip())
+        self.git('tag', '-a', '1.0.0', '-m', '- change1\n- change2', self.commit_shas[0])
+        self.git('tag', '1.0.1', self.commit_shas[1])
+        self.repository = LocalGitRepository(self.directory.name, batch_size=1)
+
+    def tearDown(self):
+        self.repository.close()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def git(self, *args):
+        return subprocess.check_output(('git',) + args, cwd=self.directory.name).decode('utf-8')
+
+    def test_commit_title_must_return_first_line_of_message(self):
+        self.assertEqual(self.repository.commit_title(self.commit_shas[1]), 'Second change')
+
+    def test_commit_titles_must_answer_in_bulk(self):
+        actual = self.repository.commit_titles(self.commit_shas + ['0' * 40])
+        self.assertEqual(actual, {self.commit_shas[0]: 'First change', self.commit_shas[1]: 'Second change'})
+
+    def test_missing_commit_must_return_none(self):
+        self.assertIsNone(self.repository.commit_title('0' * 40))
+
+    def test_annotated_tag_must_return_message(self):
+        self.assertEqual(self.repository.tag_message('1.0.0'), '- change1\n- change2')
+
+    def test_lightweight_tag_must_return_none(self):
+        self.assertIsNone(self.repository.tag_message('1.0.1'))
+
+    def test_merge_request_description_must_return_none(self):
+        self.assertIsNone(self.repository.merge_request_description(self.commit_shas[1]))
+
+    def test_context_manager_must_stop_process(self):
+        with LocalGitRepository(self.directory.name) as repository:
+            repository.commit_title(self.commit_shas[0])
+            process = repository._process
+        self.assertIsNotNone(process.returncode)
+        self.assertTrue(os.path.isdir(self.directory.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
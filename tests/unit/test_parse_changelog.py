@@ -0,0 +1,74 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from ci_helper import parse_changelog
+from tests.unit import BaseTest
+
+
+class TestParseChangelog(BaseTest):
+    """This class tests the parse_changelog method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'CHANGELOG.md')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def parse(self, content, **kwargs):
+        with open(self.file_path, mode='w') as file:
+            file.write(content)
+        return list(parse_changelog(self.file_path, **kwargs))
+
+    def test_empty_file_must_yield_nothing(self):
+        self.assertEqual(self.parse(''), [])
+
+    def test_generated_entries_must_be_parsed(self):
+        actual = self.parse('1.2.4\n\n  - change3\n\ndate2\n\n1.2.3\n\n  - change1\n  - change2\n\ndate1\n\n')
+        self.assertEqual([(entry.version, entry.changes, entry.date) for entry in actual],
+                         [('1.2.4', ['change3'], 'date2'), ('1.2.3', ['change1', 'change2'], 'date1')])
+
+    def test_offsets_must_delimit_raw_entries(self):
+        content = '1.2.4\n\n  - change3\n\ndate2\n\n1.2.3\n\n  - chânge1\n\ndate1\n\n'
+        actual = self.parse(content)
+        raw = content.encode('utf-8')
+        self.assertEqual(raw[actual[0].offset:actual[0].offset + actual[0].length],
+                         b'1.2.4\n\n  - change3\n\ndate2\n\n')
+        self.assertEqual(actual[1].offset + actual[1].length, len(raw))
+
+    def test_rc_version_must_be_parsed(self):
+        actual = self.parse('1.2.3-rc.12\n\n  - change\n\ndate\n\n')
+        self.assertEqual(actual[0].version, '1.2.3-rc.12')
+
+    def test_hand_edited_entries_must_be_tolerated(self):
+        actual = self.parse('# Changelog\n\n## v1.2.3\n\n* change1\n  continued\n- change2\n\ndate\n\nsome notes\n')
+        self.assertEqual([(entry.version, entry.changes, entry.date) for entry in actual],
+                         [('1.2.3', ['change1 continued', 'change2'], 'date')])
+
+    def test_item_mentioning_version_must_not_start_entry(self):
+        actual = self.parse('1.2.3\n\n  - 1.2.2 was broken\n\ndate\n\n')
+        self.assertEqual(len(actual), 1)
+        self.assertEqual(actual[0].changes, ['1.2.2 was broken'])
+
+    def test_indented_line_starting_with_version_must_continue_item(self):
+        actual = self.parse('1.2.4\n\n  - change\n  1.2.3 regression fixed\n\ndate\n\n')
+        self.assertEqual([(entry.version, entry.changes, entry.date) for entry in actual],
+                         [('1.2.4', ['change 1.2.3 regression fixed'], 'date')])
+
+    def test_limit_must_stop_after_entries(self):
+        actual = self.parse('1.0.2\n\n  - c\n\n1.0.1\n\n  - b\n\n1.0.0\n\n  - a\n\n', limit=2)
+        self.assertEqual([entry.version for entry in actual], ['1.0.2', '1.0.1'])
+
+    def test_small_chunks_must_yield_same_entries(self):
+        content = ''.join('1.0.{}\n\n  - change {}\n\ndate\n\n'.format(i, i) for i in range(50, 0, -1))
+        self.assertEqual(self.parse(content, chunk_size=16), self.parse(content))
+
+
+if __name__ == '__main__':
+    unittest.main()
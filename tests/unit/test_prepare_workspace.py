@@ -0,0 +1,105 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import tempfile
+import unittest
+
+import ci_helper
+from ci_helper import prepare_workspace, git_commit, git_create_local_tag, git_push, CommitError
+from tests.unit import BaseTest
+
+
+class TestPrepareWorkspace(BaseTest):
+    """This class tests the prepare_workspace method, with git_commit and git_push in the workspace"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'source')
+        self.remote = os.path.join(self.directory.name, 'remote.git')
+        self.workspace = os.path.join(self.directory.name, 'workspace')
+        os.makedirs(os.path.join(self.source, 'src'))
+        self.git(self.source, 'init', '-q', '-b', 'master')
+        with open(os.path.join(self.source, 'CHANGELOG.md'), mode='w') as changelog_file:
+            changelog_file.write('## 1.0.0\n- change\n')
+        with open(os.path.join(self.source, 'src', 'main.py'), mode='w') as source_file:
+            source_file.write('print(1)\n')
+        self.git(self.source, 'add', '.')
+        self.git(self.source, 'commit', '-q', '-m', 'Initial commit')
+        self.git(self.directory.name, 'clone', '-q', '--bare', self.source, self.remote)
+        self.git(self.remote, 'config', 'uploadpack.allowFilter', 'true')
+        self.remote_url = 'file://' + self.remote
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def git(self, directory, *args):
+        environment = dict(os.environ, GIT_AUTHOR_NAME='Bot', GIT_AUTHOR_EMAIL='bot@example.com',
+                           GIT_COMMITTER_NAME='Bot', GIT_COMMITTER_EMAIL='bot@example.com')
+        return subprocess.check_output(('git',) + args, cwd=directory, env=environment).decode('utf-8')
+
+    def test_must_check_out_only_given_paths(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        self.assertEqual(sorted(os.listdir(self.workspace)), ['.git', 'CHANGELOG.md'])
+
+    def test_must_not_download_other_blobs(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        missing = [line for line in self.git(self.workspace, 'rev-list', '--objects', '--missing=print', 'HEAD')
+                   .splitlines() if line.startswith('?')]
+        self.assertEqual(len(missing), 1)
+
+    def test_existing_workspace_must_fetch_target_branch(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        with open(os.path.join(self.source, 'CHANGELOG.md'), mode='w') as changelog_file:
+            changelog_file.write('## 1.0.1\n- other\n')
+        self.git(self.source, 'commit', '-q', '-a', '-m', 'Second commit')
+        self.git(self.source, 'push', '-q', self.remote, 'master')
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        with open(os.path.join(self.workspace, 'CHANGELOG.md')) as changelog_file:
+            self.assertEqual(changelog_file.read(), '## 1.0.1\n- other\n')
+
+    def test_commit_and_push_must_keep_other_files(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        self.git(self.workspace, 'config', 'user.email', 'bot@example.com')
+        self.git(self.workspace, 'config', 'user.name', 'Bot')
+        with open(os.path.join(self.workspace, 'CHANGELOG.md'), mode='w') as changelog_file:
+            changelog_file.write('## 1.0.1\n- other\n## 1.0.0\n- change\n')
+        commit_sha = git_commit('master', os.path.join(self.workspace, 'CHANGELOG.md'), workspace=self.workspace)
+        git_push('master', workspace=self.workspace)
+        self.assertEqual(self.git(self.remote, 'rev-parse', 'master').strip(), commit_sha)
+        self.assertEqual(self.git(self.remote, 'show', '--name-only', '--format=%s', commit_sha).split(),
+                         ['Update', 'changelog', '(master)', 'CHANGELOG.md'])
+        self.assertEqual(self.git(self.remote, 'show', '{}:src/main.py'.format(commit_sha)), 'print(1)\n')
+
+    def test_head_changelog_commit_must_be_found_once_committed(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        self.git(self.workspace, 'config', 'user.email', 'bot@example.com')
+        self.git(self.workspace, 'config', 'user.name', 'Bot')
+        changelog_file_path = os.path.join(self.workspace, 'CHANGELOG.md')
+        with open(changelog_file_path, mode='w') as changelog_file:
+            changelog_file.write('## 1.0.1\n- other\n## 1.0.0\n- change\n')
+        self.assertIsNone(ci_helper._head_changelog_commit('master', [changelog_file_path], workspace=self.workspace))
+        commit_sha = git_commit('master', changelog_file_path, workspace=self.workspace)
+        self.assertEqual(ci_helper._head_changelog_commit('master', [changelog_file_path], workspace=self.workspace),
+                         commit_sha)
+
+    def test_remote_tag_commit_must_return_pushed_tag_target(self):
+        prepare_workspace(self.workspace, self.remote_url, 'master', ['CHANGELOG.md'])
+        self.git(self.workspace, 'config', 'user.email', 'bot@example.com')
+        self.git(self.workspace, 'config', 'user.name', 'Bot')
+        commit_sha = self.git(self.workspace, 'rev-parse', 'HEAD').strip()
+        self.assertIsNone(ci_helper._remote_tag_commit('1.0.0', workspace=self.workspace))
+        git_create_local_tag(commit_sha, ['change'], '1.0.0', workspace=self.workspace)
+        git_push('master', '1.0.0', workspace=self.workspace)
+        self.assertEqual(ci_helper._remote_tag_commit('1.0.0', workspace=self.workspace), commit_sha)
+
+    def test_unknown_branch_must_raise_commit_error(self):
+        with self.assertRaises(CommitError):
+            prepare_workspace(self.workspace, self.remote_url, 'unknown', ['CHANGELOG.md'])
+
+
+if __name__ == '__main__':
+    unittest.main()
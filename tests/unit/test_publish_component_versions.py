@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from ci_helper import publish_component_versions, InvalidFormat
+from tests.unit import BaseTest
+
+MANIFEST = (b'{"components": ['
+            b'{"name": "api", "paths": ["services/api/*"], "changelog": "services/api/CHANGELOG.md"},'
+            b'{"name": "web", "paths": ["services/web/*"], "changelog": "services/web/CHANGELOG.md",'
+            b' "tag": "web/v{version}"},'
+            b'{"name": "docs", "paths": ["docs/*"], "changelog": "docs/CHANGELOG.md"}]}').decode('utf-8')
+
+
+@mock.patch('builtins.open', new_callable=mock.mock_open, read_data=MANIFEST)
+@mock.patch('ci_helper.git_create_tag')
+@mock.patch('ci_helper.git_push')
+@mock.patch('ci_helper.git_commit', return_value='hash')
+@mock.patch('ci_helper.generate_changelog')
+@mock.patch('ci_helper.get_version_changes', return_value=['change'])
+@mock.patch('ci_helper.get_current_version', side_effect=lambda path: '1.0.0' if 'api' in path else '2.0.0')
+@mock.patch('ci_helper.get_changed_paths', return_value={'services/api/main.py', 'services/web/app/index.js'})
+class TestPublishComponentVersions(BaseTest):
+    """This class tests the publish_component_versions method"""
+
+    def test_must_version_touched_components_only(self, mock_get_changed_paths, mock_get_current_version,
+                                                  mock_get_version_changes, mock_generate_changelog,
+                                                  mock_git_commit, mock_git_push, mock_git_create_tag, mock_file):
+        actual = publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha',
+                                            'master', 'components.json')
+        self.assertEqual(actual, {'api': '1.0.1', 'web': '2.0.1'})
+        mock_get_changed_paths.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                       'commit_sha')
+        mock_get_version_changes.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                         'commit_sha', data_source=None)
+        mock_generate_changelog.assert_has_calls([
+            mock.call(version='1.0.1', version_changes=['change'], changelog_file_path='services/api/CHANGELOG.md'),
+            mock.call(version='2.0.1', version_changes=['change'], changelog_file_path='services/web/CHANGELOG.md')
+        ], any_order=True)
+        self.assertEqual(mock_generate_changelog.call_count, 2)
+
+    def test_must_commit_and_push_every_changelog_once(self, mock_get_changed_paths, mock_get_current_version,
+                                                       mock_get_version_changes, mock_generate_changelog,
+                                                       mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                       mock_file):
+        publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master',
+                                   'components.json')
+        mock_git_commit.assert_called_once_with('master', 'services/api/CHANGELOG.md', 'services/web/CHANGELOG.md')
+        mock_git_push.assert_called_once_with('master')
+
+    def test_must_create_one_tag_per_component(self, mock_get_changed_paths, mock_get_current_version,
+                                               mock_get_version_changes, mock_generate_changelog,
+                                               mock_git_commit, mock_git_push, mock_git_create_tag, mock_file):
+        publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master',
+                                   'components.json')
+        mock_git_create_tag.assert_has_calls([
+            mock.call('gitlab_endpoint', 'gitlab_token', 'project_id', 'hash', ['change'], 'api-1.0.1'),
+            mock.call('gitlab_endpoint', 'gitlab_token', 'project_id', 'hash', ['change'], 'web/v2.0.1')
+        ], any_order=True)
+
+    def test_branch_develop_must_generate_rc_versions(self, mock_get_changed_paths, mock_get_current_version,
+                                                      mock_get_version_changes, mock_generate_changelog,
+                                                      mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                      mock_file):
+        actual = publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha',
+                                            'develop', 'components.json')
+        self.assertEqual(actual, {'api': '1.0.0-rc.1', 'web': '2.0.0-rc.1'})
+
+    def test_no_touched_component_must_skip(self, mock_get_changed_paths, mock_get_current_version,
+                                            mock_get_version_changes, mock_generate_changelog,
+                                            mock_git_commit, mock_git_push, mock_git_create_tag, mock_file):
+        mock_get_changed_paths.return_value = {'README.md'}
+        self.assertEqual(publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha',
+                                                    'master', 'components.json'), {})
+        mock_get_version_changes.assert_not_called()
+        mock_git_commit.assert_not_called()
+        mock_git_create_tag.assert_not_called()
+
+    def test_invalid_manifest_must_raise_exception(self, mock_get_changed_paths, mock_get_current_version,
+                                                   mock_get_version_changes, mock_generate_changelog,
+                                                   mock_git_commit, mock_git_push, mock_git_create_tag, mock_file):
+        mock_file.return_value.read.return_value = '{"components": [{"name": "api"}]}'
+        with self.assertRaises(InvalidFormat):
+            publish_component_versions('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master',
+                                       'components.json')
+        mock_get_changed_paths.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
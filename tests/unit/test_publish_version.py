@@ -1,6 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import json
+import os
+import tempfile
 import unittest
 from unittest import mock
 from urllib.error import HTTPError
@@ -43,7 +46,8 @@ class TestPublishVersion(BaseTest):
                                                 mock_get_version_changes, mock_generate_changelog,
                                                 mock_git_commit, mock_git_push, mock_git_create_tag):
         publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
-        mock_get_version_changes.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha')
+        mock_get_version_changes.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha',
+                                                         data_source=None)
 
     def test_get_version_succeeds_must_call_generate_changelog_once(self, mock_get_current_version,
                                                                     mock_generate_version, mock_get_version_changes,
@@ -52,7 +56,9 @@ class TestPublishVersion(BaseTest):
         publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
         mock_generate_changelog.assert_called_once_with(version='1.2.3-rc.1',
                                                         version_changes=['change'],
-                                                        changelog_file_path='file')
+                                                        changelog_file_path='file',
+                                                        output_file_paths=None, store_path=None,
+                                                        branch='branch', commit_sha='commit_sha', index_path=None)
 
     def test_get_version_fails_must_raise_http_error(self, mock_get_current_version,
                                                      mock_generate_version, mock_get_version_changes,
@@ -75,13 +81,13 @@ class TestPublishVersion(BaseTest):
                                        mock_get_version_changes, mock_generate_changelog,
                                        mock_git_commit, mock_git_push, mock_git_create_tag):
         publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
-        mock_git_commit.assert_called_once_with('branch', 'file')
+        mock_git_commit.assert_called_once_with('branch', 'file', workspace=None)
 
     def test_git_commit_succeeds_must_call_git_push_once(self, mock_get_current_version, mock_generate_version,
                                                          mock_get_version_changes, mock_generate_changelog,
                                                          mock_git_commit, mock_git_push, mock_git_create_tag):
         publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
-        mock_git_push.assert_called_once_with('branch')
+        mock_git_push.assert_called_once_with('branch', workspace=None)
 
     def test_git_commit_fails_must_raise_commit_error(self, mock_get_current_version, mock_generate_version,
                                                       mock_get_version_changes, mock_generate_changelog,
@@ -110,7 +116,7 @@ class TestPublishVersion(BaseTest):
                                                              mock_get_version_changes, mock_generate_changelog,
                                                              mock_git_commit, mock_git_push, mock_git_create_tag):
         publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
-        mock_git_push.assert_called_once_with('branch')
+        mock_git_push.assert_called_once_with('branch', workspace=None)
 
     def test_git_push_fails_must_raise_push_error(self, mock_get_current_version, mock_generate_version,
                                                   mock_get_version_changes, mock_generate_changelog,
@@ -126,6 +132,320 @@ class TestPublishVersion(BaseTest):
         with self.assertRaises(HTTPError):
             publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'branch', 'file')
 
+    @mock.patch('ci_helper.rotate_changelog', return_value=['archive/1.md'])
+    def test_keep_versions_must_rotate_and_commit_archive(self, mock_rotate_changelog, mock_get_current_version,
+                                                          mock_generate_version, mock_get_version_changes,
+                                                          mock_generate_changelog, mock_git_commit, mock_git_push,
+                                                          mock_git_create_tag):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        keep_versions=10)
+        mock_rotate_changelog.assert_called_once_with('file', keep_versions=10, keep_major=False, compress=False,
+                                                      collapse_rc=True)
+        mock_git_commit.assert_called_once_with('master', 'file', 'archive/1.md', workspace=None)
+
+    @mock.patch('ci_helper.rotate_changelog')
+    def test_develop_rotation_must_not_collapse_rc(self, mock_rotate_changelog, mock_get_current_version,
+                                                   mock_generate_version, mock_get_version_changes,
+                                                   mock_generate_changelog, mock_git_commit, mock_git_push,
+                                                   mock_git_create_tag):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'develop', 'file',
+                        keep_major=True)
+        mock_rotate_changelog.assert_called_once_with('file', keep_versions=None, keep_major=True, compress=False,
+                                                      collapse_rc=False)
+
+    def test_fragments_must_be_published_and_deleted(self, mock_get_current_version, mock_generate_version,
+                                                     mock_get_version_changes, mock_generate_changelog,
+                                                     mock_git_commit, mock_git_push, mock_git_create_tag):
+        mock_get_version_changes.return_value = ['Fixed login', 'change']
+        with tempfile.TemporaryDirectory() as directory:
+            fragment_path = os.path.join(directory, '1.md')
+            with open(fragment_path, mode='w') as fragment_file:
+                fragment_file.write('- Fixed login\n')
+            publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                            fragments_dir=directory)
+            self.assertFalse(os.path.exists(fragment_path))
+        self.assertEqual(mock_generate_changelog.call_args[1]['version_changes'], ['Fixed login', 'change'])
+        mock_git_commit.assert_called_once_with('master', 'file', fragment_path, workspace=None)
+
+    @mock.patch('ci_helper._spawn_hook_delivery')
+    @mock.patch('ci_helper.enqueue_release_hooks')
+    def test_hooks_must_be_queued_after_tag(self, mock_enqueue_release_hooks, mock_spawn_hook_delivery,
+                                            mock_get_current_version, mock_generate_version, mock_get_version_changes,
+                                            mock_generate_changelog, mock_git_commit, mock_git_push,
+                                            mock_git_create_tag):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        hook_urls=['https://chat'], hook_queue_path='hooks.db')
+        mock_enqueue_release_hooks.assert_called_once_with('hooks.db', ['https://chat'],
+                                                           {'event': 'release', 'project_id': 'project_id',
+                                                            'tag_name': '1.2.3-rc.1', 'branch': 'master',
+                                                            'commit_sha': 'hash', 'changes': ['change']})
+        mock_spawn_hook_delivery.assert_called_once_with('hooks.db')
+
+    @mock.patch('ci_helper._spawn_hook_delivery')
+    @mock.patch('ci_helper.enqueue_release_hooks')
+    def test_failed_tag_must_not_queue_hooks(self, mock_enqueue_release_hooks, mock_spawn_hook_delivery,
+                                             mock_get_current_version, mock_generate_version, mock_get_version_changes,
+                                             mock_generate_changelog, mock_git_commit, mock_git_push,
+                                             mock_git_create_tag):
+        mock_git_create_tag.side_effect = HTTPError('url', 500, 'msg', 'hdrs', None)
+        with self.assertRaises(HTTPError):
+            publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                            hook_urls=['https://chat'], hook_queue_path='hooks.db')
+        mock_enqueue_release_hooks.assert_not_called()
+        mock_spawn_hook_delivery.assert_not_called()
+
+    @mock.patch('ci_helper.prepare_workspace')
+    def test_workspace_must_commit_changelog_in_workspace(self, mock_prepare_workspace, mock_get_current_version,
+                                                          mock_generate_version, mock_get_version_changes,
+                                                          mock_generate_changelog, mock_git_commit, mock_git_push,
+                                                          mock_git_create_tag):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'CHANGELOG.md',
+                        output_file_paths={'json': 'CHANGELOG.json'}, workspace='ws', remote_url='url')
+        mock_prepare_workspace.assert_called_once_with('ws', 'url', 'master', ['CHANGELOG.md', 'CHANGELOG.json'])
+        mock_get_current_version.assert_called_once_with(os.path.join('ws', 'CHANGELOG.md'))
+        mock_git_commit.assert_called_once_with('master', os.path.join('ws', 'CHANGELOG.md'),
+                                                os.path.join('ws', 'CHANGELOG.json'), workspace='ws')
+        mock_git_push.assert_called_once_with('master', workspace='ws')
+
+    @mock.patch('ci_helper.git_create_release')
+    @mock.patch('ci_helper.git_create_local_tag')
+    def test_atomic_push_must_push_local_tag_with_branch(self, mock_git_create_local_tag, mock_git_create_release,
+                                                         mock_get_current_version, mock_generate_version,
+                                                         mock_get_version_changes, mock_generate_changelog,
+                                                         mock_git_commit, mock_git_push, mock_git_create_tag):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'develop', 'file',
+                        atomic_push=True)
+        mock_git_create_local_tag.assert_called_once_with('hash', ['change'], '1.2.3-rc.1', workspace=None)
+        mock_git_push.assert_called_once_with('develop', '1.2.3-rc.1', workspace=None)
+        mock_git_create_release.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', ['change'],
+                                                        '1.2.3-rc.1', index_path=None)
+        mock_git_create_tag.assert_not_called()
+
+    @mock.patch('ci_helper.git_create_release')
+    @mock.patch('ci_helper.git_create_local_tag')
+    def test_atomic_push_fails_must_not_create_release(self, mock_git_create_local_tag, mock_git_create_release,
+                                                       mock_get_current_version, mock_generate_version,
+                                                       mock_get_version_changes, mock_generate_changelog,
+                                                       mock_git_commit, mock_git_push, mock_git_create_tag):
+        mock_git_push.side_effect = PushError(1)
+        with self.assertRaises(PushError):
+            publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'develop', 'file',
+                            atomic_push=True)
+        mock_git_create_release.assert_not_called()
+
+
+@mock.patch('ci_helper._commit_exists', return_value=True)
+@mock.patch('ci_helper.git_create_tag')
+@mock.patch('ci_helper.git_push')
+@mock.patch('ci_helper.git_commit', return_value='hash')
+@mock.patch('ci_helper.generate_changelog')
+@mock.patch('ci_helper.get_version_changes', return_value=['change'])
+@mock.patch('ci_helper.generate_version', return_value='1.2.4')
+@mock.patch('ci_helper.get_current_version', return_value='1.2.3')
+class TestPublishVersionJournal(BaseTest):
+    """This class tests the publish_version method resuming from a step journal"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.directory.name, 'journal.json')
+        for name in ('_head_changelog_commit', '_remote_tag_commit'):
+            patcher = mock.patch('ci_helper.' + name, return_value=None)
+            setattr(self, 'mock' + name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def write_journal(self, **steps):
+        with open(self.journal_path, mode='w') as journal_file:
+            json.dump(dict(key='commit_sha@master', **steps), journal_file)
+
+    def test_must_record_every_step(self, mock_get_current_version, mock_generate_version, mock_get_version_changes,
+                                    mock_generate_changelog, mock_git_commit, mock_git_push, mock_git_create_tag,
+                                    mock_commit_exists):
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        with open(self.journal_path) as journal_file:
+            self.assertEqual(json.load(journal_file), {'key': 'commit_sha@master', 'version': '1.2.4',
+                                                       'changes': ['change'], 'changelog': ['file'],
+                                                       'commit': 'hash', 'pushed': True, 'tagged': True})
+
+    def test_interrupted_before_tag_must_only_create_tag(self, mock_get_current_version, mock_generate_version,
+                                                         mock_get_version_changes, mock_generate_changelog,
+                                                         mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                         mock_commit_exists):
+        self.write_journal(version='1.2.4', changes=['journaled'], changelog=['file'], commit='journaled_hash',
+                           pushed=True)
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_generate_version.assert_not_called()
+        mock_get_version_changes.assert_not_called()
+        mock_generate_changelog.assert_not_called()
+        mock_git_commit.assert_not_called()
+        mock_git_push.assert_not_called()
+        mock_git_create_tag.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                    'journaled_hash', ['journaled'], '1.2.4', index_path=None)
+
+    def test_interrupted_before_push_must_push_journaled_commit(self, mock_get_current_version,
+                                                                mock_generate_version, mock_get_version_changes,
+                                                                mock_generate_changelog, mock_git_commit,
+                                                                mock_git_push, mock_git_create_tag,
+                                                                mock_commit_exists):
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='journaled_hash')
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_commit_exists.assert_called_once_with('journaled_hash', workspace=None)
+        mock_git_commit.assert_not_called()
+        mock_git_push.assert_called_once_with('master', workspace=None)
+        mock_git_create_tag.assert_called_once()
+
+    def test_missing_journaled_commit_must_regenerate_it_with_same_version(self, mock_get_current_version,
+                                                                           mock_generate_version,
+                                                                           mock_get_version_changes,
+                                                                           mock_generate_changelog, mock_git_commit,
+                                                                           mock_git_push, mock_git_create_tag,
+                                                                           mock_commit_exists):
+        mock_commit_exists.return_value = False
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='orphan')
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_generate_version.assert_not_called()
+        mock_generate_changelog.assert_called_once()
+        mock_git_commit.assert_called_once_with('master', 'file', workspace=None)
+        mock_git_create_tag.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'hash',
+                                                    ['change'], '1.2.4', index_path=None)
+
+    def test_pushed_journal_must_trust_missing_commit(self, mock_get_current_version, mock_generate_version,
+                                                      mock_get_version_changes, mock_generate_changelog,
+                                                      mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                      mock_commit_exists):
+        mock_commit_exists.return_value = False
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='remote_hash',
+                           pushed=True)
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_commit_exists.assert_not_called()
+        mock_generate_changelog.assert_not_called()
+        mock_git_commit.assert_not_called()
+        mock_git_push.assert_not_called()
+        mock_git_create_tag.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                    'remote_hash', ['change'], '1.2.4', index_path=None)
+
+    def test_tagged_journal_must_trust_missing_commit(self, mock_get_current_version, mock_generate_version,
+                                                      mock_get_version_changes, mock_generate_changelog,
+                                                      mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                      mock_commit_exists):
+        mock_commit_exists.return_value = False
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='remote_hash',
+                           pushed=True, tagged=True)
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_generate_changelog.assert_not_called()
+        mock_git_commit.assert_not_called()
+        mock_git_push.assert_not_called()
+        mock_git_create_tag.assert_not_called()
+
+    def test_interrupted_after_changelog_must_not_prepend_entry_again(self, mock_get_current_version,
+                                                                      mock_generate_version,
+                                                                      mock_get_version_changes,
+                                                                      mock_generate_changelog, mock_git_commit,
+                                                                      mock_git_push, mock_git_create_tag,
+                                                                      mock_commit_exists):
+        mock_get_current_version.return_value = '1.2.4'
+        self.write_journal(version='1.2.4', changes=['change'])
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_generate_changelog.assert_not_called()
+        mock_git_commit.assert_called_once_with('master', 'file', workspace=None)
+        with open(self.journal_path) as journal_file:
+            self.assertEqual(json.load(journal_file)['changelog'], ['file'])
+
+    def test_interrupted_after_commit_must_journal_head_commit(self, mock_get_current_version,
+                                                               mock_generate_version, mock_get_version_changes,
+                                                               mock_generate_changelog, mock_git_commit,
+                                                               mock_git_push, mock_git_create_tag,
+                                                               mock_commit_exists):
+        self.mock_head_changelog_commit.return_value = 'head_hash'
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'])
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        self.mock_head_changelog_commit.assert_called_once_with('master', ['file'], workspace=None)
+        mock_git_commit.assert_not_called()
+        mock_git_push.assert_called_once_with('master', workspace=None)
+        mock_git_create_tag.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'head_hash',
+                                                    ['change'], '1.2.4', index_path=None)
+
+    @mock.patch('ci_helper.git_create_release')
+    @mock.patch('ci_helper.git_create_local_tag')
+    def test_interrupted_after_atomic_push_must_not_tag_again(self, mock_git_create_local_tag,
+                                                              mock_git_create_release, mock_get_current_version,
+                                                              mock_generate_version, mock_get_version_changes,
+                                                              mock_generate_changelog, mock_git_commit,
+                                                              mock_git_push, mock_git_create_tag,
+                                                              mock_commit_exists):
+        self.mock_remote_tag_commit.return_value = 'hash'
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='hash')
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path, atomic_push=True)
+        self.mock_remote_tag_commit.assert_called_once_with('1.2.4', workspace=None)
+        mock_git_create_local_tag.assert_not_called()
+        mock_git_push.assert_not_called()
+        mock_git_create_release.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id',
+                                                        ['change'], '1.2.4', index_path=None)
+        with open(self.journal_path) as journal_file:
+            self.assertTrue(json.load(journal_file)['pushed'])
+
+    @mock.patch('ci_helper.git_create_release')
+    @mock.patch('ci_helper.git_create_local_tag')
+    def test_interrupted_before_atomic_push_must_push(self, mock_git_create_local_tag, mock_git_create_release,
+                                                      mock_get_current_version, mock_generate_version,
+                                                      mock_get_version_changes, mock_generate_changelog,
+                                                      mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                      mock_commit_exists):
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='hash')
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path, atomic_push=True)
+        mock_git_create_local_tag.assert_called_once_with('hash', ['change'], '1.2.4', workspace=None)
+        mock_git_push.assert_called_once_with('master', '1.2.4', workspace=None)
+
+    def test_completed_journal_must_not_publish_again(self, mock_get_current_version, mock_generate_version,
+                                                      mock_get_version_changes, mock_generate_changelog,
+                                                      mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                      mock_commit_exists):
+        self.write_journal(version='1.2.4', changes=['change'], changelog=['file'], commit='hash', pushed=True,
+                           tagged=True)
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_generate_changelog.assert_not_called()
+        mock_git_push.assert_not_called()
+        mock_git_create_tag.assert_not_called()
+
+    def test_journal_of_another_commit_must_be_ignored(self, mock_get_current_version, mock_generate_version,
+                                                       mock_get_version_changes, mock_generate_changelog,
+                                                       mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                       mock_commit_exists):
+        with open(self.journal_path, mode='w') as journal_file:
+            json.dump({'key': 'other@master', 'version': '9.9.9', 'tagged': True}, journal_file)
+        publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                        journal_path=self.journal_path)
+        mock_git_create_tag.assert_called_once_with('gitlab_endpoint', 'gitlab_token', 'project_id', 'hash',
+                                                    ['change'], '1.2.4', index_path=None)
+
+    def test_failed_step_must_keep_previous_steps(self, mock_get_current_version, mock_generate_version,
+                                                  mock_get_version_changes, mock_generate_changelog,
+                                                  mock_git_commit, mock_git_push, mock_git_create_tag,
+                                                  mock_commit_exists):
+        mock_git_push.side_effect = PushError(1)
+        with self.assertRaises(PushError):
+            publish_version('gitlab_endpoint', 'gitlab_token', 'project_id', 'commit_sha', 'master', 'file',
+                            journal_path=self.journal_path)
+        with open(self.journal_path) as journal_file:
+            journal = json.load(journal_file)
+        self.assertEqual(journal['commit'], 'hash')
+        self.assertNotIn('pushed', journal)
+
 
 if __name__ == '__main__':
     unittest.main()
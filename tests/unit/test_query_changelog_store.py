@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from ci_helper import generate_changelog, query_changelog_store, InvalidVersion
+from tests.unit import BaseTest
+
+
+class TestQueryChangelogStore(BaseTest):
+    """This class tests the query_changelog_store method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.store_path = os.path.join(self.directory.name, 'changelog.db')
+        changelog_file_path = os.path.join(self.directory.name, 'CHANGELOG.md')
+        open(changelog_file_path, mode='w').close()
+        entries = [('2.9.0', 'master', ['old']), ('3.0.0-rc.1', 'develop', ['rc1']),
+                   ('3.0.0-rc.2', 'develop', ['rc2']), ('3.0.0', 'master', ['final1', 'final2']),
+                   ('3.1.0-rc.1', 'release/3.1', ['next'])]
+        with mock.patch('ci_helper.datetime') as mock_datetime:
+            mock_datetime.strftime = datetime.strftime
+            for day, (version, branch, changes) in enumerate(entries, start=1):
+                mock_datetime.now = mock.Mock(return_value=datetime(2017, 2, day))
+                generate_changelog(version, changes, changelog_file_path, store_path=self.store_path,
+                                   branch=branch, commit_sha='sha{}'.format(day))
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def versions(self, **kwargs):
+        return [entry['version'] for entry in query_changelog_store(self.store_path, **kwargs)]
+
+    def test_no_filter_must_return_all_entries_newest_first(self):
+        self.assertEqual(self.versions(), ['3.1.0-rc.1', '3.0.0', '3.0.0-rc.2', '3.0.0-rc.1', '2.9.0'])
+
+    def test_entry_must_contain_changes_in_order(self):
+        actual = query_changelog_store(self.store_path, version='3.0.0')
+        self.assertEqual(len(actual), 3)
+        self.assertEqual(actual[0]['changes'], ['final1', 'final2'])
+        self.assertEqual(actual[0]['commit_sha'], 'sha4')
+        self.assertEqual(actual[0]['released_at'], '2017-02-04T00:00:00')
+
+    def test_major_version_must_filter_versions(self):
+        self.assertEqual(self.versions(version='2.x'), ['2.9.0'])
+
+    def test_dates_must_filter_versions(self):
+        self.assertEqual(self.versions(since='2017-02-02', until='2017-02-03T23:59:59'), ['3.0.0-rc.2', '3.0.0-rc.1'])
+
+    def test_latest_rc_must_return_one_version_per_branch(self):
+        self.assertEqual(sorted(self.versions(latest_rc=True)), ['3.0.0-rc.2', '3.1.0-rc.1'])
+
+    def test_latest_rc_must_be_picked_among_filtered_versions(self):
+        self.assertEqual(self.versions(latest_rc=True, until='2017-02-02T23:59:59'), ['3.0.0-rc.1'])
+
+    def test_invalid_version_must_raise_invalid_version(self):
+        with self.assertRaises(InvalidVersion):
+            query_changelog_store(self.store_path, version='three')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import unittest
+
+from ci_helper import render_changelog_entry, InvalidFormat
+from tests.unit import BaseTest
+
+
+class TestRenderChangelogEntry(BaseTest):
+    """This class tests the render_changelog_entry method"""
+
+    def test_markdown_must_itemize_changes(self):
+        actual = render_changelog_entry('1.2.3', ['change1', 'change2'], 'date')
+        self.assertEqual(actual, '1.2.3\n\n  - change1\n  - change2\n\ndate\n\n')
+
+    def test_json_must_render_valid_object(self):
+        actual = render_changelog_entry('1.2.3', ['change "1"', 'change2'], 'date', 'json')
+        self.assertEqual(json.loads(actual), {'version': '1.2.3', 'date': 'date', 'changes': ['change "1"', 'change2']})
+
+    def test_html_must_escape_changes(self):
+        actual = render_changelog_entry('1.2.3', ['<b>change</b>'], 'date', 'html')
+        self.assertIn('<li>&lt;b&gt;change&lt;/b&gt;</li>', actual)
+        self.assertIn('<h2>1.2.3</h2>', actual)
+
+    def test_release_must_render_changes_only(self):
+        actual = render_changelog_entry('1.2.3', ['change1', 'change2'], 'date', 'release')
+        self.assertEqual(actual, '- change1\n- change2')
+
+    def test_unknown_format_must_raise_invalid_format(self):
+        with self.assertRaises(InvalidFormat):
+            render_changelog_entry('1.2.3', ['change'], 'date', 'rst')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from urllib.error import HTTPError
+
+from ci_helper import republish_releases
+from tests.unit import BaseTest
+
+TAGS = [{'name': '1.0.1', 'release': {'description': '- [x] @reviewer\n- Fixed login'}},
+        {'name': '1.0.0', 'release': {'description': '- Initial release'}},
+        {'name': '0.9.0', 'release': None}]
+
+
+@mock.patch('ci_helper._request')
+@mock.patch('ci_helper._paginate', return_value=TAGS)
+class TestRepublishReleases(BaseTest):
+    """This class tests the republish_releases method"""
+
+    def test_must_list_tags_with_pagination(self, mock_paginate, mock_request):
+        republish_releases('https://gitlab.com', 'gitlab_token', 'project_id')
+        mock_paginate.assert_called_once_with('https://gitlab.com/api/v4/projects/project_id/repository/tags',
+                                              gitlab_token='gitlab_token')
+
+    def test_must_update_only_changed_descriptions(self, mock_paginate, mock_request):
+        actual = republish_releases('https://gitlab.com', 'gitlab_token', 'project_id')
+        self.assertEqual(actual, ['1.0.1'])
+        mock_request.assert_called_once_with('https://gitlab.com/api/v4/projects/project_id/releases/1.0.1',
+                                             gitlab_token='gitlab_token', method='PUT',
+                                             data={'description': '- Fixed login'})
+
+    def test_tag_patterns_must_filter_tags(self, mock_paginate, mock_request):
+        actual = republish_releases('https://gitlab.com', 'gitlab_token', 'project_id', tag_patterns=['1.0.0'])
+        self.assertEqual(actual, [])
+        mock_request.assert_not_called()
+
+    def test_dry_run_must_not_update_releases(self, mock_paginate, mock_request):
+        actual = republish_releases('https://gitlab.com', 'gitlab_token', 'project_id', dry_run=True)
+        self.assertEqual(actual, ['1.0.1'])
+        mock_request.assert_not_called()
+
+    def test_changelog_must_be_rendered_and_missing_release_created(self, mock_paginate, mock_request):
+        with tempfile.TemporaryDirectory() as directory:
+            changelog_file_path = os.path.join(directory, 'CHANGELOG.md')
+            with open(changelog_file_path, mode='w') as changelog_file:
+                changelog_file.write('## 1.0.0 (date)\n- Initial release\n\n## 0.9.0 (date)\n- Beta\n')
+            actual = republish_releases('https://gitlab.com', 'gitlab_token', 'project_id',
+                                        changelog_file_path=changelog_file_path)
+        self.assertEqual(actual, ['0.9.0'])
+        mock_request.assert_called_once_with('https://gitlab.com/api/v4/projects/project_id/releases',
+                                             gitlab_token='gitlab_token', method='POST',
+                                             data={'tag_name': '0.9.0', 'name': '0.9.0', 'description': '- Beta'})
+
+    def test_changelog_changes_must_be_cleaned(self, mock_paginate, mock_request):
+        with tempfile.TemporaryDirectory() as directory:
+            changelog_file_path = os.path.join(directory, 'CHANGELOG.md')
+            with open(changelog_file_path, mode='w') as changelog_file:
+                changelog_file.write('## 1.0.1 (date)\n- [x] @reviewer\n- * Fixed login\n')
+            actual = republish_releases('https://gitlab.com', 'gitlab_token', 'project_id',
+                                        changelog_file_path=changelog_file_path)
+        self.assertEqual(actual, ['1.0.1'])
+        mock_request.assert_called_once_with('https://gitlab.com/api/v4/projects/project_id/releases/1.0.1',
+                                             gitlab_token='gitlab_token', method='PUT',
+                                             data={'description': '- Fixed login'})
+
+    def test_failed_update_must_raise_after_other_updates(self, mock_paginate, mock_request):
+        mock_paginate.return_value = [{'name': name, 'release': {'description': '* change'}}
+                                      for name in ('1.0.0', '1.0.1')]
+        mock_request.side_effect = [HTTPError('url', 500, 'msg', 'hdrs', None), {}]
+        with self.assertRaises(HTTPError):
+            republish_releases('https://gitlab.com', 'gitlab_token', 'project_id', max_workers=1)
+        self.assertEqual(mock_request.call_count, 2)
+
+    @mock.patch('ci_helper.time.sleep')
+    @mock.patch('ci_helper.time.monotonic', return_value=100.0)
+    def test_rate_limit_must_space_updates(self, mock_monotonic, mock_sleep, mock_paginate, mock_request):
+        mock_paginate.return_value = [{'name': name, 'release': {'description': '* change'}}
+                                      for name in ('1.0.0', '1.0.1', '1.0.2')]
+        republish_releases('https://gitlab.com', 'gitlab_token', 'project_id', max_workers=1, rate_limit=4)
+        self.assertEqual([call[0][0] for call in mock_sleep.call_args_list], [0.25, 0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from ci_helper import get_current_version, parse_changelog, rotate_changelog
+from tests.unit import BaseTest
+
+
+def entry(version, *changes):
+    return '{}\n\n{}\n\ndate {}\n\n'.format(version, '\n'.join('  - {}'.format(change) for change in changes), version)
+
+
+class TestRotateChangelog(BaseTest):
+    """This class tests the rotate_changelog method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'CHANGELOG.md')
+        self.archive_dir = os.path.join(self.directory.name, 'CHANGELOG-archive')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def write(self, content):
+        with open(self.file_path, mode='w') as file:
+            file.write(content)
+
+    def read(self, file_path=None):
+        with open(file_path or self.file_path, mode='r') as file:
+            return file.read()
+
+    def test_empty_changelog_must_not_write_anything(self):
+        self.write('')
+        self.assertEqual(rotate_changelog(self.file_path, keep_versions=1), [])
+        self.assertFalse(os.path.exists(self.archive_dir))
+
+    def test_short_changelog_must_not_write_anything(self):
+        self.write(entry('1.0.1', 'b') + entry('1.0.0', 'a'))
+        self.assertEqual(rotate_changelog(self.file_path, keep_versions=2), [])
+        self.assertFalse(os.path.exists(self.archive_dir))
+
+    def test_keep_versions_must_move_older_entries_by_major(self):
+        self.write('# Changelog\n\n' + entry('2.0.1', 'd') + entry('2.0.0', 'c') + entry('1.0.1', 'b') +
+                   entry('1.0.0', 'a'))
+        actual = rotate_changelog(self.file_path, keep_versions=1)
+        self.assertEqual(sorted(actual), [os.path.join(self.archive_dir, '1.md'),
+                                          os.path.join(self.archive_dir, '2.md')])
+        self.assertEqual(self.read(), '# Changelog\n\n' + entry('2.0.1', 'd'))
+        self.assertEqual(self.read(os.path.join(self.archive_dir, '2.md')), entry('2.0.0', 'c'))
+        self.assertEqual(self.read(os.path.join(self.archive_dir, '1.md')), entry('1.0.1', 'b') + entry('1.0.0', 'a'))
+
+    def test_interleaved_majors_must_keep_segments_newest_first(self):
+        self.write(entry('4.0.0', 'e') + entry('3.1.0', 'd') + entry('2.5.1', 'c') + entry('3.0.1', 'b') +
+                   entry('3.0.0', 'a'))
+        actual = rotate_changelog(self.file_path, keep_versions=1)
+        self.assertEqual(actual, [os.path.join(self.archive_dir, '3.md'), os.path.join(self.archive_dir, '2.md')])
+        self.assertEqual(self.read(os.path.join(self.archive_dir, '3.md')),
+                         entry('3.1.0', 'd') + entry('3.0.1', 'b') + entry('3.0.0', 'a'))
+        self.assertEqual(self.read(os.path.join(self.archive_dir, '2.md')), entry('2.5.1', 'c'))
+
+    def test_keep_major_must_keep_current_major(self):
+        self.write(entry('2.0.1', 'd') + entry('2.0.0', 'c') + entry('1.0.1', 'b'))
+        rotate_changelog(self.file_path, keep_major=True)
+        self.assertEqual(self.read(), entry('2.0.1', 'd') + entry('2.0.0', 'c'))
+
+    def test_archived_entries_must_be_prepended_to_segment(self):
+        os.makedirs(self.archive_dir)
+        with open(os.path.join(self.archive_dir, '1.md'), mode='w') as file:
+            file.write(entry('1.0.0', 'a'))
+        self.write(entry('1.0.2', 'c') + entry('1.0.1', 'b'))
+        rotate_changelog(self.file_path, keep_versions=1)
+        self.assertEqual(self.read(os.path.join(self.archive_dir, '1.md')), entry('1.0.1', 'b') + entry('1.0.0', 'a'))
+
+    def test_compressed_segment_must_stay_readable(self):
+        self.write(entry('1.0.2', 'c') + entry('1.0.1', 'b') + entry('1.0.0', 'a'))
+        actual = rotate_changelog(self.file_path, keep_versions=1, compress=True)
+        self.assertEqual(actual, [os.path.join(self.archive_dir, '1.md.gz')])
+        with gzip.open(actual[0], mode='rt') as file:
+            self.assertEqual(file.read(), entry('1.0.1', 'b') + entry('1.0.0', 'a'))
+        self.assertEqual(get_current_version(actual[0]), '1.0.1')
+        self.assertEqual([item.version for item in parse_changelog(actual[0])], ['1.0.1', '1.0.0'])
+
+    def test_collapse_rc_must_fold_rc_entries_into_final_release(self):
+        self.write(entry('0.0.2', 'final', 'b') + entry('0.0.1-rc.2', 'b', 'c') + entry('0.0.1-rc.1', 'a') +
+                   entry('0.0.1', 'old'))
+        rotate_changelog(self.file_path, keep_versions=5, collapse_rc=True)
+        self.assertEqual(self.read(), entry('0.0.2', 'final', 'b', 'c', 'a') + entry('0.0.1', 'old'))
+
+    def test_collapse_rc_must_ignore_rc_newest_entry(self):
+        content = entry('0.0.2-rc.1', 'b') + entry('0.0.1-rc.1', 'a')
+        self.write(content)
+        self.assertEqual(rotate_changelog(self.file_path, keep_versions=5, collapse_rc=True), [])
+        self.assertEqual(self.read(), content)
+
+
+if __name__ == '__main__':
+    unittest.main()
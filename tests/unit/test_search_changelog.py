@@ -0,0 +1,86 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ci_helper import build_search_index, index_changelog_entry, render_changelog_entry, search_changelog, \
+    InvalidVersion
+from tests.unit import BaseTest
+
+
+class TestSearchChangelog(BaseTest):
+    """This class tests the search_changelog, index_changelog_entry and build_search_index methods"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self.directory.name, 'index.db')
+        self.changelog_file_path = os.path.join(self.directory.name, 'CHANGELOG.md')
+        with open(self.changelog_file_path, mode='w') as file:
+            for version, changes in [('2.0.0', ['Fix login timeout (PROJ-123)', 'Add dark theme']),
+                                     ('2.0.0-rc.1', ['Fix login timeout (PROJ-123)']),
+                                     ('1.1.0', ['Retry pipeline on #456', 'Authentication cache']),
+                                     ('1.0.0', ['Initial release'])]:
+                file.write(render_changelog_entry(version, changes, 'Wed, Feb 15 2017 13:05:12'))
+        build_search_index(self.index_path, self.changelog_file_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def search(self, query, **kwargs):
+        return [(entry['version'], entry['change']) for entry in search_changelog(self.index_path, query, **kwargs)]
+
+    def test_ticket_identifier_must_return_oldest_version_first(self):
+        self.assertEqual(self.search('PROJ-123'), [('2.0.0-rc.1', 'Fix login timeout (PROJ-123)'),
+                                                   ('2.0.0', 'Fix login timeout (PROJ-123)')])
+
+    def test_ticket_number_must_match_issue_reference(self):
+        self.assertEqual(self.search('#456'), [('1.1.0', 'Retry pipeline on #456')])
+        self.assertEqual(self.search('456'), [('1.1.0', 'Retry pipeline on #456')])
+
+    def test_prefix_must_match_tokens_starting_with_it(self):
+        self.assertEqual(self.search('auth*'), [('1.1.0', 'Authentication cache')])
+        self.assertEqual(self.search('PROJ-12*'), [('2.0.0-rc.1', 'Fix login timeout (PROJ-123)'),
+                                                   ('2.0.0', 'Fix login timeout (PROJ-123)')])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search('login fix'), [('2.0.0-rc.1', 'Fix login timeout (PROJ-123)'),
+                                                    ('2.0.0', 'Fix login timeout (PROJ-123)')])
+        self.assertEqual(self.search('login cache'), [])
+
+    def test_limit_must_bound_results(self):
+        self.assertEqual(self.search('fix', limit=1), [('2.0.0-rc.1', 'Fix login timeout (PROJ-123)')])
+
+    def test_query_without_token_must_return_nothing(self):
+        self.assertEqual(self.search('*'), [])
+
+    def test_index_changelog_entry_must_be_searchable(self):
+        index_changelog_entry(self.index_path, '2.1.0', ['Fix dark theme contrast (PROJ-124)'], source='tag')
+        self.assertEqual(search_changelog(self.index_path, 'PROJ-124'),
+                         [{'version': '2.1.0', 'source': 'tag', 'change': 'Fix dark theme contrast (PROJ-124)'}])
+
+    def test_indexing_same_changes_twice_must_not_duplicate_results(self):
+        index_changelog_entry(self.index_path, '1.0.0', ['Initial release'], source='tag')
+        self.assertEqual(search_changelog(self.index_path, 'initial'),
+                         [{'version': '1.0.0', 'source': 'changelog', 'change': 'Initial release'}])
+
+    def test_invalid_version_must_raise_invalid_version(self):
+        with self.assertRaises(InvalidVersion):
+            index_changelog_entry(self.index_path, 'latest', ['change'])
+
+    @mock.patch('ci_helper._request')
+    def test_build_search_index_must_index_tag_release_descriptions(self, mock_request):
+        mock_request.return_value = [{'name': '2.1.0', 'release': {'description': '- Fix crash #789'}},
+                                     {'name': '2.0.1', 'release': None}]
+        count = build_search_index(self.index_path, gitlab_endpoint='https://gitlab.com',
+                                   gitlab_token='gitlab_token', project_id='project_id')
+        self.assertEqual(count, 1)
+        self.assertEqual(self.search('#789'), [('2.1.0', 'Fix crash #789')])
+
+
+if __name__ == '__main__':
+    unittest.main()
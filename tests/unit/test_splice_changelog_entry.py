@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import tempfile
+import unittest
+
+from ci_helper import render_changelog_entry, splice_changelog_entry, InvalidFormat
+from tests.unit import BaseTest
+
+
+class TestSpliceChangelogEntry(BaseTest):
+    """This class tests the splice_changelog_entry method"""
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'output')
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def read(self):
+        with open(self.file_path, mode='r') as file:
+            return file.read()
+
+    def test_missing_markdown_file_must_be_created(self):
+        splice_changelog_entry('entry\n\n', self.file_path)
+        self.assertEqual(self.read(), 'entry\n\n')
+
+    def test_markdown_must_prepend_entry(self):
+        with open(self.file_path, mode='w') as file:
+            file.write('old_content')
+        splice_changelog_entry('entry\n\n', self.file_path, 'markdown')
+        self.assertEqual(self.read(), 'entry\n\nold_content')
+
+    def test_missing_json_file_must_create_array(self):
+        splice_changelog_entry(render_changelog_entry('1.0.0', ['change'], 'date', 'json'), self.file_path, 'json')
+        self.assertEqual(json.loads(self.read()), [{'version': '1.0.0', 'date': 'date', 'changes': ['change']}])
+
+    def test_empty_json_array_must_receive_entry(self):
+        with open(self.file_path, mode='w') as file:
+            file.write('[\n]\n')
+        splice_changelog_entry(render_changelog_entry('1.0.0', ['change'], 'date', 'json'), self.file_path, 'json')
+        self.assertEqual(json.loads(self.read()), [{'version': '1.0.0', 'date': 'date', 'changes': ['change']}])
+
+    def test_json_must_insert_entry_first(self):
+        splice_changelog_entry(render_changelog_entry('1.0.0', ['change1'], 'date', 'json'), self.file_path, 'json')
+        splice_changelog_entry(render_changelog_entry('1.0.1', ['change2'], 'date', 'json'), self.file_path, 'json')
+        self.assertEqual([entry['version'] for entry in json.loads(self.read())], ['1.0.1', '1.0.0'])
+
+    def test_compact_json_array_must_receive_entry(self):
+        with open(self.file_path, mode='w') as file:
+            file.write('[{"version": "1.0.0", "date": "date", "changes": []}]')
+        splice_changelog_entry(render_changelog_entry('1.0.1', ['change'], 'date', 'json'), self.file_path, 'json')
+        self.assertEqual([entry['version'] for entry in json.loads(self.read())], ['1.0.1', '1.0.0'])
+
+    def test_json_file_without_array_must_raise_invalid_format(self):
+        with open(self.file_path, mode='w') as file:
+            file.write('{"version": "1.0.0"}')
+        with self.assertRaises(InvalidFormat):
+            splice_changelog_entry(render_changelog_entry('1.0.1', ['change'], 'date', 'json'), self.file_path,
+                                   'json')
+        self.assertEqual(self.read(), '{"version": "1.0.0"}')
+        self.assertEqual(os.listdir(self.directory.name), ['output'])
+
+    def test_release_format_must_raise_invalid_format(self):
+        with self.assertRaises(InvalidFormat):
+            splice_changelog_entry(render_changelog_entry('1.0.0', ['a', 'b'], output_format='release'),
+                                   self.file_path, 'release')
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import unittest
+from unittest import mock
+
+from ci_helper import validate_changelog, ChangelogEntry
+from tests.unit import BaseTest
+
+
+class TestValidateChangelog(BaseTest):
+    """This class tests the validate_changelog method"""
+
+    @mock.patch('ci_helper.parse_changelog', return_value=iter([
+        ChangelogEntry('1.0.1', ['change'], 'date', 0, 10), ChangelogEntry('1.0.0', ['change'], 'date', 10, 10)]))
+    def test_valid_changelog_must_return_no_problems(self, mock_parse_changelog):
+        self.assertEqual(validate_changelog('file'), [])
+        mock_parse_changelog.assert_called_once_with('file')
+
+    @mock.patch('ci_helper.parse_changelog', return_value=iter([
+        ChangelogEntry('1.0.0', ['change'], 'date', 0, 10), ChangelogEntry('1.0.0', ['change'], 'date', 10, 10)]))
+    def test_duplicated_version_must_be_reported(self, mock_parse_changelog):
+        self.assertEqual(validate_changelog('file'), ['Version 1.0.0 is duplicated (byte 10)'])
+
+    @mock.patch('ci_helper.parse_changelog', return_value=iter([ChangelogEntry('1.0.0', [], '', 0, 10)]))
+    def test_incomplete_entry_must_be_reported(self, mock_parse_changelog):
+        self.assertEqual(validate_changelog('file'), ['Version 1.0.0 has no changes (byte 0)',
+                                                      'Version 1.0.0 has no date (byte 0)'])
+
+
+if __name__ == '__main__':
+    unittest.main()